@@ -0,0 +1,168 @@
+# aligner.py
+"""
+Alignment of two subtitle tracks by time, e.g. a source-language track and its
+translation.
+
+Both tracks are sorted by start time and swept once, merge-join style: each cue
+is compared only with the cues of the other track that are still showing when
+it starts, so finding every overlapping pair costs O(n + m + overlaps) instead of
+comparing all n × m pairs. Overlaps shorter than a fraction of the shorter cue
+(a few frames where one line hands over to the next) are ignored.
+
+Each cue is then grouped with the cue of the other track it overlaps most. A
+group is a 1:1 pair, one cue split into several on the other side (1:n or n:1),
+or a cue with no counterpart. Cues are compared by their 'start'/'end' times,
+so tracks align without a timeline frame rate.
+"""
+from typing import NamedTuple
+
+from .subtitle_store import SubtitleTrack, ms_to_srt_time, srt_time_to_ms
+from .utils import clean_html
+
+# Overlaps below this fraction of the shorter cue's duration do not link two cues.
+ALIGN_MIN_OVERLAP = 0.25
+
+# Group kinds.
+ONE_TO_ONE = '1:1'
+ONE_TO_MANY = '1:n'
+MANY_TO_ONE = 'n:1'
+MANY_TO_MANY = 'n:m'
+PRIMARY_ONLY = 'primary_only'
+SECONDARY_ONLY = 'secondary_only'
+
+KIND_LABELS = {
+    ONE_TO_ONE: "一对一",
+    ONE_TO_MANY: "一对多",
+    MANY_TO_ONE: "多对一",
+    MANY_TO_MANY: "多对多",
+    PRIMARY_ONLY: "仅原文",
+    SECONDARY_ONLY: "仅译文",
+}
+
+
+class AlignedGroup(NamedTuple):
+    """Rows of the primary and secondary track shown together, in track order."""
+    kind: str
+    primary_rows: tuple
+    secondary_rows: tuple
+    start_ms: int
+    end_ms: int
+
+
+def _intervals(subtitles):
+    """(start_ms, end_ms, row) of every cue with valid 'HH:MM:SS,mmm' times, sorted by start."""
+    if isinstance(subtitles, SubtitleTrack):
+        # The time columns are already milliseconds (-1 for a time in any other form).
+        times = zip(subtitles.start_ms, subtitles.end_ms)
+    else:
+        times = ((srt_time_to_ms(sub.get('start')), srt_time_to_ms(sub.get('end'))) for sub in subtitles)
+    intervals = [
+        (start, end, row) for row, (start, end) in enumerate(times)
+        if start is not None and end is not None and 0 <= start < end
+    ]
+    intervals.sort()
+    return intervals
+
+
+def _overlapping_pairs(a, b, min_overlap):
+    """
+    (a_row, b_row, overlap_ms) of every pair of intervals from `a` and `b` (as from
+    _intervals) whose overlap is at least `min_overlap` of the shorter one.
+    """
+    pairs = []
+    active_a, active_b = [], []  # Intervals of each track still showing at the current start
+    i = j = 0
+    while i < len(a) or j < len(b):
+        # Take the next interval to start, from whichever track has it.
+        if j >= len(b) or (i < len(a) and a[i][0] <= b[j][0]):
+            interval, i = a[i], i + 1
+            mine, others, from_a = active_a, active_b, True
+        else:
+            interval, j = b[j], j + 1
+            mine, others, from_a = active_b, active_a, False
+        start, end, row = interval
+        mine[:] = [other for other in mine if other[1] > start]
+        others[:] = [other for other in others if other[1] > start]
+        for other_start, other_end, other_row in others:
+            overlap = min(end, other_end) - start
+            if overlap >= min_overlap * min(end - start, other_end - other_start):
+                pairs.append((row, other_row, overlap) if from_a else (other_row, row, overlap))
+        mine.append(interval)
+    return pairs
+
+
+def align_tracks(primary, secondary, min_overlap=ALIGN_MIN_OVERLAP):
+    """
+    Groups the cues of two tracks by time overlap. Returns AlignedGroups in time
+    order, covering every cue with valid times exactly once.
+    """
+    primary_intervals, secondary_intervals = _intervals(primary), _intervals(secondary)
+    pairs = _overlapping_pairs(primary_intervals, secondary_intervals, min_overlap)
+
+    # Cues are numbered primary rows first, then secondary rows. Each cue links to the
+    # cue of the other track it overlaps most; groups are the connected components.
+    offset = len(primary)
+    best_overlap = [0] * (offset + len(secondary))
+    best_partner = list(range(len(best_overlap)))
+    for primary_row, secondary_row, overlap in pairs:
+        secondary_node = offset + secondary_row
+        if overlap > best_overlap[primary_row]:
+            best_overlap[primary_row], best_partner[primary_row] = overlap, secondary_node
+        if overlap > best_overlap[secondary_node]:
+            best_overlap[secondary_node], best_partner[secondary_node] = overlap, primary_row
+
+    parent = list(range(len(best_overlap)))
+
+    def find(node):
+        while parent[node] != node:
+            parent[node] = node = parent[parent[node]]
+        return node
+
+    for node, partner in enumerate(best_partner):
+        if partner != node:
+            parent[find(node)] = find(partner)
+
+    members = {}  # Root -> ([primary rows], [secondary rows], start_ms, end_ms)
+    for node_offset, intervals in ((0, primary_intervals), (offset, secondary_intervals)):
+        for start, end, row in intervals:
+            root = find(node_offset + row)
+            group = members.get(root)
+            if group is None:
+                members[root] = group = [[], [], start, end]
+            group[node_offset != 0].append(row)
+            group[2], group[3] = min(group[2], start), max(group[3], end)
+
+    groups = []
+    for primary_rows, secondary_rows, start, end in members.values():
+        if not secondary_rows:
+            kind = PRIMARY_ONLY
+        elif not primary_rows:
+            kind = SECONDARY_ONLY
+        elif len(primary_rows) == 1:
+            kind = ONE_TO_ONE if len(secondary_rows) == 1 else ONE_TO_MANY
+        else:
+            kind = MANY_TO_ONE if len(secondary_rows) == 1 else MANY_TO_MANY
+        groups.append(AlignedGroup(kind, tuple(sorted(primary_rows)), tuple(sorted(secondary_rows)), start, end))
+    groups.sort(key=lambda group: (group.start_ms, group.end_ms))
+    return groups
+
+
+def group_text(subtitles, rows):
+    """The texts of `rows`, without HTML tags, one line per cue."""
+    return '\n'.join(clean_html(subtitles[row].get('text', '')) for row in rows)
+
+
+def bilingual_srt(groups, primary, secondary):
+    """
+    SRT content with one cue per aligned group: the primary text above the
+    secondary text, shown for the union of the group's times.
+    """
+    blocks = []
+    for number, group in enumerate(groups, 1):
+        lines = [str(number), f"{ms_to_srt_time(group.start_ms)} --> {ms_to_srt_time(group.end_ms)}"]
+        if group.primary_rows:
+            lines.append(group_text(primary, group.primary_rows))
+        if group.secondary_rows:
+            lines.append(group_text(secondary, group.secondary_rows))
+        blocks.append('\n'.join(lines))
+    return '\n\n'.join(blocks) + '\n' if blocks else ''
@@ -0,0 +1,113 @@
+# alignment_dialog.py
+"""
+Side-by-side view of two aligned subtitle tracks (see aligner.align_tracks).
+"""
+from PySide6.QtCore import Qt, QAbstractTableModel, QModelIndex
+from PySide6.QtGui import QColor
+from PySide6.QtWidgets import (
+    QDialog,
+    QVBoxLayout,
+    QHBoxLayout,
+    QLabel,
+    QPushButton,
+    QTableView,
+    QHeaderView,
+    QAbstractItemView,
+)
+
+from .aligner import KIND_LABELS, ONE_TO_ONE, group_text
+from .subtitle_store import ms_to_srt_time
+
+ALIGNMENT_HEADERS = ['类型', '时间', '原文', '译文']
+KIND_COLUMN, TIME_COLUMN, PRIMARY_COLUMN, SECONDARY_COLUMN = range(len(ALIGNMENT_HEADERS))
+
+# Background of groups that are not a plain 1:1 pair.
+UNMATCHED_COLOR = QColor("#fff4e5")
+
+DisplayRole = int(Qt.DisplayRole)
+BackgroundRole = int(Qt.BackgroundRole)
+
+
+class AlignmentTableModel(QAbstractTableModel):
+    """One row per aligned group; cell texts are built when a row is painted."""
+
+    def __init__(self, groups, primary, secondary, parent=None):
+        super().__init__(parent)
+        self.groups = groups
+        self.primary = primary
+        self.secondary = secondary
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.groups)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(ALIGNMENT_HEADERS)
+
+    def headerData(self, section, orientation, role=DisplayRole):
+        if orientation == Qt.Horizontal and role == DisplayRole:
+            return ALIGNMENT_HEADERS[section]
+        return None
+
+    def data(self, index, role=DisplayRole):
+        if not index.isValid():
+            return None
+        group = self.groups[index.row()]
+        if role == DisplayRole:
+            column = index.column()
+            if column == KIND_COLUMN:
+                return KIND_LABELS[group.kind]
+            if column == TIME_COLUMN:
+                return f"{ms_to_srt_time(group.start_ms)} → {ms_to_srt_time(group.end_ms)}"
+            if column == PRIMARY_COLUMN:
+                return group_text(self.primary, group.primary_rows)
+            if column == SECONDARY_COLUMN:
+                return group_text(self.secondary, group.secondary_rows)
+        elif role == BackgroundRole and group.kind != ONE_TO_ONE:
+            return UNMATCHED_COLOR
+        return None
+
+
+class AlignmentDialog(QDialog):
+    """Shows an alignment with a summary line and a bilingual SRT export button."""
+
+    def __init__(self, groups, primary, secondary, title, parent=None):
+        super().__init__(parent)
+        self.setWindowTitle(title)
+        self.resize(1000, 700)
+        self.model = AlignmentTableModel(groups, primary, secondary, self)
+
+        self.summary_label = QLabel(self._summary(groups))
+        self.table = QTableView()
+        self.table.setModel(self.model)
+        self.table.setSelectionBehavior(QAbstractItemView.SelectRows)
+        self.table.setWordWrap(True)
+        self.table.verticalHeader().setVisible(False)
+        # Fixed widths from the font: ResizeToContents would measure every row.
+        header = self.table.horizontalHeader()
+        font_metrics = self.table.fontMetrics()
+        header.setSectionResizeMode(KIND_COLUMN, QHeaderView.Fixed)
+        header.setSectionResizeMode(TIME_COLUMN, QHeaderView.Fixed)
+        header.resizeSection(KIND_COLUMN, font_metrics.horizontalAdvance("仅原文") + 24)
+        header.resizeSection(TIME_COLUMN, font_metrics.horizontalAdvance("00:00:00,000 → 00:00:00,000") + 24)
+        header.setSectionResizeMode(PRIMARY_COLUMN, QHeaderView.Stretch)
+        header.setSectionResizeMode(SECONDARY_COLUMN, QHeaderView.Stretch)
+        self.export_button = QPushButton("导出双语SRT")
+        self.close_button = QPushButton("关闭")
+        self.close_button.clicked.connect(self.accept)
+
+        layout = QVBoxLayout(self)
+        layout.addWidget(self.summary_label)
+        layout.addWidget(self.table)
+        buttons = QHBoxLayout()
+        buttons.addStretch()
+        buttons.addWidget(self.export_button)
+        buttons.addWidget(self.close_button)
+        layout.addLayout(buttons)
+
+    @staticmethod
+    def _summary(groups):
+        counts = {}
+        for group in groups:
+            counts[group.kind] = counts.get(group.kind, 0) + 1
+        parts = [f"{label} {counts[kind]}" for kind, label in KIND_LABELS.items() if kind in counts]
+        return f"共 {len(groups)} 组：" + "，".join(parts) if groups else "两条轨道都没有带时间的字幕。"
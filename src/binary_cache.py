@@ -0,0 +1,279 @@
+# binary_cache.py
+"""
+Binary cache file for a subtitle track, an alternative to the 'track_N.json' files.
+
+A JSON cache has to be parsed in full, and every subtitle becomes a dict that is
+then split into the columns of a SubtitleTrack. This file stores those columns
+directly, so loading is a few bulk copies and reading a single row touches only
+its bytes:
+
+    header          40 bytes, see HEADER
+    columns         ids, start_ms, end_ms, in_frames, out_frames:
+                    row_count little-endian int64 each (-1 = not set)
+    text offsets    row_count + 1 int64 byte offsets into the text blob
+    text blob       every text, UTF-8, back to back
+    extras          UTF-8 JSON {row: {key: value}} for values that do not fit a
+                    column (a non-integer 'index', a time in another form)
+
+Files are opened with mmap (BinaryTrackFile), so a row range can be read without
+decoding the whole file; the view itself is still filled from a full read_track.
+Like the JSON cache, the file keeps 'index', 'start', 'end' and 'text'; it also
+keeps the frames.
+
+Conversion tools and a benchmark against the JSON cache:
+    python -m src.binary_cache to-binary track_1.json track_1.svt
+    python -m src.binary_cache to-json track_1.svt track_1.json
+    python -m src.binary_cache bench [row_count]
+"""
+import json
+import mmap
+import struct
+import sys
+from array import array
+
+from .subtitle_store import SubtitleTrack
+
+BINARY_EXTENSION = '.svt'
+
+MAGIC = b'SVTRACK\x00'
+VERSION = 1
+# magic, version, column count, reserved, row count, text blob size, extras size
+HEADER = struct.Struct('<8sHHIQQQ')
+COLUMNS = ('ids', 'start_ms', 'end_ms', 'in_frames', 'out_frames')
+# Keys whose values are kept in a row's extras when they do not fit a column.
+_EXTRA_KEYS = {'ids': 'index', 'start_ms': 'start', 'end_ms': 'end'}
+
+_MISSING = -1
+_SWAP = sys.byteorder != 'little'  # Columns are stored little-endian
+
+
+class CacheFormatError(ValueError):
+    """Raised for a file that is not a valid binary cache file."""
+
+
+def _int64_bytes(values):
+    column = array('q', values)
+    if _SWAP:
+        column.byteswap()
+    return column.tobytes()
+
+
+def write_track(file_path, track, texts=None):
+    """
+    Writes a track (a SubtitleTrack or a list of subtitle dicts) as a binary cache
+    file. `texts` replaces the track's texts, e.g. with their clean versions.
+    """
+    track = SubtitleTrack.from_dicts(track)
+    texts = track.texts if texts is None else texts
+    encoded = [text.encode('utf-8') for text in texts]
+    offsets = array('q', [0])
+    position = 0
+    for data in encoded:
+        position += len(data)
+        offsets.append(position)
+
+    extras = {}
+    for name, key in _EXTRA_KEYS.items():
+        column = getattr(track, name)
+        if _MISSING not in column:
+            continue
+        for row, value in enumerate(column):
+            if value == _MISSING and key in track[row]:
+                extras.setdefault(str(row), {})[key] = track[row][key]
+    extras_data = json.dumps(extras, ensure_ascii=False).encode('utf-8') if extras else b''
+
+    with open(file_path, 'wb') as f:
+        f.write(HEADER.pack(MAGIC, VERSION, len(COLUMNS), 0, len(encoded), position, len(extras_data)))
+        for name in COLUMNS:
+            f.write(_int64_bytes(getattr(track, name)))
+        f.write(_int64_bytes(offsets))
+        f.write(b''.join(encoded))
+        f.write(extras_data)
+
+
+class BinaryTrackFile:
+    """
+    A binary cache file opened with mmap. Rows are read on demand; `to_track`
+    reads the whole track. Use as a context manager, or call close().
+    """
+
+    def __init__(self, file_path):
+        self.file_path = file_path
+        with open(file_path, 'rb') as f:
+            try:
+                self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            except ValueError:  # Empty file
+                raise CacheFormatError(f"{file_path} is empty") from None
+        try:
+            self._read_header()
+        except CacheFormatError:
+            self._map.close()
+            raise
+
+    def _read_header(self):
+        if len(self._map) < HEADER.size:
+            raise CacheFormatError(f"{self.file_path} is too short for a cache file")
+        magic, version, column_count, _, rows, blob_size, extras_size = HEADER.unpack_from(self._map)
+        if magic != MAGIC:
+            raise CacheFormatError(f"{self.file_path} is not a subtitle cache file")
+        if version != VERSION or column_count != len(COLUMNS):
+            raise CacheFormatError(f"{self.file_path} has unsupported version {version}")
+        self.row_count = rows
+        self._column_offset = HEADER.size
+        self._text_offsets_offset = HEADER.size + 8 * rows * len(COLUMNS)
+        self._blob_offset = self._text_offsets_offset + 8 * (rows + 1)
+        self._extras_offset = self._blob_offset + blob_size
+        if len(self._map) != self._extras_offset + extras_size:
+            raise CacheFormatError(f"{self.file_path} is truncated or corrupt")
+        self._extras = None
+
+    def close(self):
+        self._map.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def __len__(self):
+        return self.row_count
+
+    def _int64s(self, offset, count):
+        column = array('q')
+        column.frombytes(self._map[offset:offset + 8 * count])
+        if _SWAP:
+            column.byteswap()
+        return column
+
+    def column(self, name):
+        """A whole integer column (one of COLUMNS) as an array('q')."""
+        index = COLUMNS.index(name)
+        return self._int64s(self._column_offset + 8 * self.row_count * index, self.row_count)
+
+    def _text_span(self, row):
+        """Map offsets (start, end) of the text of `row`."""
+        start, end = struct.unpack_from('<qq', self._map, self._text_offsets_offset + 8 * row)
+        return self._blob_offset + start, self._blob_offset + end
+
+    def text(self, row):
+        start, end = self._text_span(row)
+        return str(self._map[start:end], 'utf-8')
+
+    def extras(self):
+        """{row: {key: value}} of the values kept outside the columns."""
+        if self._extras is None:
+            data = self._map[self._extras_offset:]
+            self._extras = {int(row): values for row, values in json.loads(data).items()} if data else {}
+        return self._extras
+
+    def rows(self, start=0, stop=None):
+        """Rows start..stop - 1 as subtitle dicts, reading only their part of the file."""
+        return self.to_track_rows(start, self.row_count if stop is None else stop).to_dicts()
+
+    def to_track_rows(self, start, stop):
+        """Rows start..stop - 1 (clamped to the rows in the file) as a SubtitleTrack."""
+        start, stop = max(start, 0), min(stop, self.row_count)
+        if start >= stop:
+            return SubtitleTrack()
+        count = stop - start
+        columns = [self._int64s(self._column_offset + 8 * (self.row_count * index + start), count)
+                   for index in range(len(COLUMNS))]
+        offsets = self._int64s(self._text_offsets_offset + 8 * start, count + 1)
+        base = offsets[0]
+        data = self._map[self._blob_offset + base:self._blob_offset + offsets[-1]]
+        texts = [str(data[offsets[i] - base:offsets[i + 1] - base], 'utf-8') for i in range(count)]
+        extras = {row - start: values for row, values in self.extras().items() if start <= row < stop}
+        return SubtitleTrack.from_columns(*columns[:1], texts, *columns[1:], extras)
+
+    def to_track(self):
+        """The whole file as a SubtitleTrack."""
+        return self.to_track_rows(0, self.row_count)
+
+
+def read_track(file_path):
+    """Reads a whole binary cache file into a SubtitleTrack. Raises OSError or CacheFormatError."""
+    with BinaryTrackFile(file_path) as track_file:
+        return track_file.to_track()
+
+
+def _json_subtitles(track):
+    """The subtitles as the JSON cache stores them."""
+    return [
+        {'index': sub.get('index'), 'start': sub.get('start'), 'end': sub.get('end'), 'text': sub.get('text', '')}
+        for sub in track
+    ]
+
+
+def json_to_binary(json_path, binary_path):
+    """Converts a JSON cache file to a binary one. Returns the number of subtitles."""
+    with open(json_path, 'r', encoding='utf-8') as f:
+        track = SubtitleTrack(json.load(f))
+    write_track(binary_path, track)
+    return len(track)
+
+
+def binary_to_json(binary_path, json_path):
+    """Converts a binary cache file to a JSON one, as the JSON cache writes it. Returns the number of subtitles."""
+    track = read_track(binary_path)
+    with open(json_path, 'w', encoding='utf-8') as f:
+        json.dump(_json_subtitles(track), f, ensure_ascii=False, indent=2)
+    return len(track)
+
+
+if __name__ == "__main__":
+    import argparse
+    import os
+    import random
+    import tempfile
+    import timeit
+
+    from .subtitle_store import ms_to_srt_time
+
+    parser = argparse.ArgumentParser(prog="python -m src.binary_cache", description="Subtitle cache file tools")
+    commands = parser.add_subparsers(dest='command', required=True)
+    for name, help_text in (('to-binary', "convert a JSON cache file to a binary one"),
+                            ('to-json', "convert a binary cache file to a JSON one")):
+        command = commands.add_parser(name, help=help_text)
+        command.add_argument('source')
+        command.add_argument('target')
+    bench = commands.add_parser('bench', help="compare loading a JSON and a binary cache file")
+    bench.add_argument('rows', nargs='?', type=int, default=50000)
+    args = parser.parse_args()
+
+    if args.command == 'to-binary':
+        print(f"{json_to_binary(args.source, args.target)} subtitles written to {args.target}")
+    elif args.command == 'to-json':
+        print(f"{binary_to_json(args.source, args.target)} subtitles written to {args.target}")
+    else:
+        random.seed(7)
+        words = "我们 现在 就走 他们 马上 回来 the door is open we should go now".split()
+        subtitles = [
+            {'index': i + 1, 'start': ms_to_srt_time(i * 2000), 'end': ms_to_srt_time(i * 2000 + 1500),
+             'text': " ".join(random.choice(words) for _ in range(8))}
+            for i in range(args.rows)
+        ]
+        with tempfile.TemporaryDirectory() as directory:
+            json_path, binary_path = os.path.join(directory, 'track.json'), os.path.join(directory, 'track.svt')
+            with open(json_path, 'w', encoding='utf-8') as f:
+                json.dump(subtitles, f, ensure_ascii=False, indent=2)
+            json_to_binary(json_path, binary_path)
+
+            def load_json():
+                with open(json_path, 'r', encoding='utf-8') as f:
+                    return SubtitleTrack(json.load(f))
+
+            def read_rows():
+                with BinaryTrackFile(binary_path) as track_file:
+                    return track_file.rows(args.rows // 2, args.rows // 2 + 100)
+
+            cases = [
+                ("load JSON", load_json),
+                ("load binary", lambda: read_track(binary_path)),
+                ("100 rows, binary", read_rows),
+            ]
+            for name, function in cases:
+                seconds = min(timeit.repeat(function, number=1, repeat=5))
+                print(f"{name:18s} {seconds * 1000:8.1f} ms")
+            print(f"file size: JSON {os.path.getsize(json_path) / 1e6:.1f} MB, "
+                  f"binary {os.path.getsize(binary_path) / 1e6:.1f} MB")
@@ -0,0 +1,143 @@
+# export_review_dialog.py
+"""
+Review of the changes between a Resolve track and its edited cache (see
+track_diff.diff_tracks), shown before the cache is exported back to Resolve.
+"""
+from PySide6.QtCore import Qt, QAbstractTableModel, QModelIndex
+from PySide6.QtGui import QColor
+from PySide6.QtWidgets import (
+    QDialog,
+    QVBoxLayout,
+    QHBoxLayout,
+    QLabel,
+    QPushButton,
+    QTableView,
+    QHeaderView,
+    QAbstractItemView,
+)
+
+from .track_diff import CHANGE_LABELS, DELETED, INSERTED, RETEXTED
+from .subtitle_table_model import diff_html
+from .timecode_utils import TimecodeUtils
+from .ui_components import HtmlDelegate
+
+REVIEW_HEADERS = ['类型', '原#', '新#', '原时间', '新时间', '字幕']
+KIND_COLUMN, OLD_ROW_COLUMN, NEW_ROW_COLUMN, OLD_TIME_COLUMN, NEW_TIME_COLUMN, TEXT_COLUMN = range(len(REVIEW_HEADERS))
+
+CHANGE_COLORS = {
+    INSERTED: QColor("#e8f5e9"),
+    DELETED: QColor("#fdecea"),
+}
+
+DisplayRole = int(Qt.DisplayRole)
+BackgroundRole = int(Qt.BackgroundRole)
+
+
+class ExportReviewModel(QAbstractTableModel):
+    """One row per DiffEntry; cell texts are built when a row is painted."""
+
+    def __init__(self, diff, frame_rate=None, parent=None):
+        super().__init__(parent)
+        self.entries = diff.entries
+        self.frame_rate = frame_rate
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.entries)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(REVIEW_HEADERS)
+
+    def headerData(self, section, orientation, role=DisplayRole):
+        if orientation == Qt.Horizontal and role == DisplayRole:
+            return REVIEW_HEADERS[section]
+        return None
+
+    def _time(self, cue):
+        """'in → out' of a cue, as times if the frame rate is known, else as frames."""
+        if cue is None or cue.in_frame is None or cue.out_frame is None:
+            return ""
+        if not self.frame_rate:
+            return f"{cue.in_frame} → {cue.out_frame}"
+        to_time = TimecodeUtils.timecode_to_srt_format
+        return f"{to_time(cue.in_frame, self.frame_rate)} → {to_time(cue.out_frame, self.frame_rate)}"
+
+    def data(self, index, role=DisplayRole):
+        if not index.isValid():
+            return None
+        entry = self.entries[index.row()]
+        if role == DisplayRole:
+            column = index.column()
+            if column == KIND_COLUMN:
+                return CHANGE_LABELS[entry.kind]
+            if column == OLD_ROW_COLUMN:
+                return "" if entry.old_row is None else str(entry.old_row + 1)
+            if column == NEW_ROW_COLUMN:
+                return "" if entry.new_row is None else str(entry.new_row + 1)
+            if column == OLD_TIME_COLUMN:
+                return self._time(entry.old)
+            if column == NEW_TIME_COLUMN:
+                return self._time(entry.new)
+            if column == TEXT_COLUMN:
+                if entry.kind == RETEXTED:
+                    return diff_html(entry.old.text, entry.new.text)
+                return (entry.new or entry.old).text
+        elif role == BackgroundRole:
+            return CHANGE_COLORS.get(entry.kind)
+        return None
+
+
+class ExportReviewDialog(QDialog):
+    """
+    Lists the changes about to be exported. Accepted with the export button;
+    the report button is connected by the caller.
+    """
+
+    def __init__(self, diff, frame_rate, title, parent=None):
+        super().__init__(parent)
+        self.setWindowTitle(title)
+        self.resize(1000, 600)
+        self.model = ExportReviewModel(diff, frame_rate, self)
+
+        self.summary_label = QLabel(self._summary(diff))
+        self.table = QTableView()
+        self.table.setModel(self.model)
+        self.table.setItemDelegateForColumn(TEXT_COLUMN, HtmlDelegate(self.table))
+        self.table.setEditTriggers(QAbstractItemView.NoEditTriggers)
+        self.table.setSelectionBehavior(QAbstractItemView.SelectRows)
+        self.table.verticalHeader().setVisible(False)
+        # Fixed widths from the font: ResizeToContents would measure every row.
+        header = self.table.horizontalHeader()
+        font_metrics = self.table.fontMetrics()
+        widths = {
+            KIND_COLUMN: font_metrics.horizontalAdvance("调整时间"),
+            OLD_ROW_COLUMN: font_metrics.horizontalAdvance("00000"),
+            NEW_ROW_COLUMN: font_metrics.horizontalAdvance("00000"),
+            OLD_TIME_COLUMN: font_metrics.horizontalAdvance("00:00:00,000 → 00:00:00,000"),
+            NEW_TIME_COLUMN: font_metrics.horizontalAdvance("00:00:00,000 → 00:00:00,000"),
+        }
+        for column, width in widths.items():
+            header.setSectionResizeMode(column, QHeaderView.Fixed)
+            header.resizeSection(column, width + 24)
+        header.setSectionResizeMode(TEXT_COLUMN, QHeaderView.Stretch)
+
+        self.report_button = QPushButton("导出报告")
+        self.export_button = QPushButton("确认导出")
+        self.cancel_button = QPushButton("取消")
+        self.export_button.clicked.connect(self.accept)
+        self.cancel_button.clicked.connect(self.reject)
+
+        layout = QVBoxLayout(self)
+        layout.addWidget(self.summary_label)
+        layout.addWidget(self.table)
+        buttons = QHBoxLayout()
+        buttons.addWidget(self.report_button)
+        buttons.addStretch()
+        buttons.addWidget(self.export_button)
+        buttons.addWidget(self.cancel_button)
+        layout.addLayout(buttons)
+
+    @staticmethod
+    def _summary(diff):
+        parts = [f"{CHANGE_LABELS[kind]} {count}" for kind, count in diff.counts().items()]
+        return (f"Resolve 中 {diff.old_count} 条，导出 {diff.new_count} 条，共 {len(diff.entries)} 处修改："
+                + "，".join(parts))
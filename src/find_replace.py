@@ -0,0 +1,317 @@
+# find_replace.py
+"""
+Pattern engine shared by filtering, find and replace.
+
+A query (literal text or a regular expression, plus the ignore-case and whole-word
+flags) is compiled once and cached, so typing into the filter or stepping through
+matches never recompiles per row. Replacement supports capture groups (\\1,
+\\g<name>) in regex mode; in literal mode the replacement is inserted verbatim.
+
+Python's `re` cannot be interrupted, so a catastrophic pattern could freeze the UI
+on a long track. Every operation gets a time budget (`MatchGuard`): when the
+third-party `regex` module is installed, each match is given the remaining budget
+as its timeout; without it, user regular expressions are matched in a worker
+process (a whole batch of rows per request), which is killed when the budget runs
+out. Escaped literal queries and wildcard filters cannot backtrack badly and are
+matched in-process, as are all patterns when the worker cannot be started (e.g.
+under an embedded interpreter); the budget is then checked between rows. Patterns
+that are known to backtrack catastrophically, such as `(a+)+` or `(a|aa)+`, are
+rejected up front with a clearer message than a timeout.
+"""
+import functools
+import multiprocessing
+import os
+import re
+import sys
+import time
+from typing import NamedTuple
+
+from .log_utils import get_logger
+
+try:
+    import regex as _regex
+except ImportError:  # Optional: only used for per-match timeouts
+    _regex = None
+
+logger = get_logger("find_replace")
+
+# Errors raised while expanding a replacement template.
+_TEMPLATE_ERRORS = (re.error, IndexError) + ((_regex.error,) if _regex is not None else ())
+
+# Seconds a single filter/find/replace pass may spend matching.
+MATCH_TIME_BUDGET = 2.0
+
+_QUANTIFIER = r'(?:[+*]|\{\d*,\d*\})'
+_GROUP_BODY = r'(?:[^()\\]|\\.)*'
+# A group containing a quantifier that is itself repeated, e.g. (a+)+, (\w*)* or (.*a){20}.
+_NESTED_QUANTIFIER_RE = re.compile(rf'\({_GROUP_BODY}{_QUANTIFIER}{_GROUP_BODY}\)(?:{_QUANTIFIER}|\{{\d+\}})')
+# A quantified group of alternatives, e.g. (a|a)* or (a|aa)+, whose branches can overlap.
+_QUANTIFIED_ALTERNATION_RE = re.compile(rf'\({_GROUP_BODY}\|{_GROUP_BODY}\){_QUANTIFIER}')
+
+
+class FindOptions(NamedTuple):
+    """Flags of a find/replace query."""
+    regex: bool = False
+    ignore_case: bool = False
+    whole_word: bool = False
+
+    @property
+    def is_literal(self):
+        """True for a plain, case-sensitive substring search."""
+        return not (self.regex or self.ignore_case or self.whole_word)
+
+
+class CompiledQuery(NamedTuple):
+    """A compiled pattern, and whether it is a user regex to be matched in the worker process."""
+    pattern: object
+    in_worker: bool = False
+
+
+class PatternError(ValueError):
+    """Raised for an invalid or unsafe search pattern."""
+
+
+class MatchTimeout(PatternError):
+    """Raised when matching exceeds its time budget."""
+
+
+def _compile(source, flags=0, in_worker=False):
+    """Compiles `source` into a CompiledQuery. Raises PatternError."""
+    if _regex is not None:
+        try:
+            # The regex module enforces the budget per match, so nothing needs the worker.
+            return CompiledQuery(_regex.compile(source, flags | _regex.VERSION0))
+        except _regex.error as e:
+            raise PatternError(f"无效的正则表达式: {e}") from e
+    try:
+        return CompiledQuery(re.compile(source, flags), in_worker)
+    except re.error as e:
+        raise PatternError(f"无效的正则表达式: {e}") from e
+
+
+@functools.lru_cache(maxsize=128)
+def compile_query(text, regex=False, ignore_case=False, whole_word=False):
+    """
+    Compiles a find/filter query into a CompiledQuery. Results are cached per
+    (text, flags), so repeated calls with the same query are free.
+    Raises PatternError for invalid or (without the `regex` module) unsafe patterns.
+    """
+    source = text if regex else re.escape(text)
+    if whole_word:
+        source = rf'\b(?:{source})\b'
+    if regex and _regex is None:
+        if _NESTED_QUANTIFIER_RE.search(text):
+            raise PatternError("正则表达式包含嵌套量词，可能导致匹配卡死")
+        if _QUANTIFIED_ALTERNATION_RE.search(text):
+            raise PatternError("正则表达式包含重复的分支组，可能导致匹配卡死")
+    return _compile(source, re.IGNORECASE if ignore_case else 0, in_worker=regex)
+
+
+@functools.lru_cache(maxsize=128)
+def compile_wildcard(text):
+    """
+    Compiles a wildcard filter ('*' matches any run of characters, the whole text
+    must match) into a CompiledQuery. It is only escaped literals joined by '.*',
+    so it is matched in-process.
+    """
+    return _compile('^' + '.*'.join(re.escape(part) for part in text.split('*')) + '$')
+
+
+def _serve(connection):
+    """Worker process loop: answers (operation, source, flags, texts, args) requests until the pipe closes."""
+    while True:
+        try:
+            operation, source, flags, texts, args = connection.recv()
+        except EOFError:
+            return
+        try:
+            pattern = re.compile(source, flags)
+            if operation == 'search':
+                result = [pattern.search(text) is not None for text in texts]
+            else:
+                replacement, count = args
+                result = [pattern.sub(replacement, text, count) for text in texts]
+            connection.send((True, result))
+        except Exception as e:  # Sent back and raised by the caller
+            connection.send((False, e))
+
+
+class _WorkerUnavailable(Exception):
+    """The worker process could not be started or died; match in-process instead."""
+
+
+def _can_spawn():
+    """
+    True if 'spawn' can start a worker: it re-executes sys.executable, which under
+    an embedded interpreter (e.g. inside Resolve) is the host application.
+    """
+    return bool(sys.executable) and os.path.basename(sys.executable).lower().startswith('python')
+
+
+class _MatchWorker:
+    """The process running worker-pattern matches. It is started on first use and killed on a timeout."""
+
+    def __init__(self):
+        # 'spawn' rather than fork: the parent runs Qt, which is not fork-safe.
+        context = multiprocessing.get_context('spawn')
+        self.connection, child_connection = context.Pipe()
+        self.process = context.Process(target=_serve, args=(child_connection,), name="match-worker", daemon=True)
+        try:
+            self.process.start()
+        except Exception as e:
+            self.connection.close()
+            raise _WorkerUnavailable(e) from e
+        finally:
+            child_connection.close()
+
+    def stop(self):
+        self.process.terminate()
+        self.process.join()
+        self.connection.close()
+
+
+_worker = None
+# Set once the worker has failed to start or died; matching then stays in-process.
+_worker_unavailable = False
+
+
+def _run_in_worker(operation, pattern, texts, args, timeout):
+    """
+    Runs a batch in the worker process. Raises MatchTimeout, after killing the
+    worker, if it takes longer than `timeout` seconds, and _WorkerUnavailable if
+    there is no working worker process.
+    """
+    global _worker, _worker_unavailable
+    if _worker_unavailable or not _can_spawn():
+        raise _WorkerUnavailable()
+    try:
+        if _worker is None or not _worker.process.is_alive():
+            _worker = _MatchWorker()
+        worker = _worker
+        worker.connection.send((operation, pattern.pattern, pattern.flags, texts, args))
+        if not worker.connection.poll(timeout):
+            worker.stop()
+            _worker = None
+            raise MatchTimeout("匹配超时，请简化正则表达式")
+        ok, result = worker.connection.recv()
+    except (_WorkerUnavailable, EOFError, OSError) as e:
+        logger.warning("Regex worker process unavailable, matching in-process: %s", e)
+        _worker_unavailable = True
+        if _worker is not None:
+            _worker.stop()
+            _worker = None
+        raise _WorkerUnavailable(e) from e
+    if not ok:
+        raise result
+    return result
+
+
+class MatchGuard:
+    """
+    Time budget for one pass over many rows. The methods raise MatchTimeout once
+    the budget is spent; the `_all` forms match a batch of texts at once, which is
+    much cheaper for worker patterns than one request per row.
+    """
+
+    def __init__(self, budget=MATCH_TIME_BUDGET):
+        self.deadline = time.monotonic() + budget
+
+    def _remaining(self):
+        remaining = self.deadline - time.monotonic()
+        if remaining <= 0:
+            raise MatchTimeout("匹配超时，请简化正则表达式")
+        return remaining
+
+    def _call(self, method, *args):
+        remaining = self._remaining()
+        if _regex is None:
+            return method(*args)
+        try:
+            return method(*args, timeout=remaining)
+        except TimeoutError as e:
+            raise MatchTimeout("匹配超时，请简化正则表达式") from e
+
+    def search(self, query, text):
+        """True if the CompiledQuery `query` matches somewhere in `text`."""
+        return self.search_all(query, [text])[0]
+
+    def search_all(self, query, texts):
+        """For each of `texts`, True if the CompiledQuery `query` matches somewhere in it."""
+        texts = list(texts)
+        if query.in_worker and texts:
+            try:
+                return _run_in_worker('search', query.pattern, texts, None, self._remaining())
+            except _WorkerUnavailable:
+                pass
+        return [self._call(query.pattern.search, text) is not None for text in texts]
+
+    def sub_all(self, query, replacement, texts, count=0):
+        """`texts` with `query.pattern.sub(replacement, text, count)` applied to each."""
+        texts = list(texts)
+        if query.in_worker and texts:
+            try:
+                # Worker queries come from regex mode, where the replacement is a (picklable) template string.
+                return _run_in_worker('sub', query.pattern, texts, (replacement, count), self._remaining())
+            except _WorkerUnavailable:
+                pass
+        return [self._call(query.pattern.sub, replacement, text, count) for text in texts]
+
+
+def make_find_matcher(find_text, options=FindOptions(), guard=None):
+    """
+    Builds a predicate `match(text)` for the find text and flags. A literal query
+    is a plain substring test; anything else goes through the cached pattern and
+    the guard's time budget. Raises PatternError for a bad pattern.
+    """
+    if options.is_literal:
+        return lambda text: find_text in text
+    query = compile_query(find_text, *options)
+    guard = guard or MatchGuard()
+    return lambda text: guard.search(query, text)
+
+
+def find_matches(find_text, texts, options=FindOptions(), guard=None):
+    """
+    For each of `texts`, True if it contains the find text. The batch form of
+    make_find_matcher, for scanning many rows. Raises PatternError or MatchTimeout.
+    """
+    if options.is_literal:
+        return [find_text in text for text in texts]
+    return (guard or MatchGuard()).search_all(compile_query(find_text, *options), texts)
+
+
+def make_replacement(replace_text, regex=False):
+    """
+    Returns the `repl` argument for `pattern.sub`: a template with group references
+    in regex mode, or a function returning the text verbatim in literal mode.
+    """
+    if regex:
+        return replace_text
+    return lambda match: replace_text
+
+
+def replace_in_text(text, find_text, replace_text, count=0, regex=False, ignore_case=False,
+                    whole_word=False, guard=None):
+    """
+    Replaces occurrences of the query in `text` (all of them when `count` is 0).
+    Returns the new text. Raises PatternError or MatchTimeout.
+    """
+    return replace_in_texts([text], find_text, replace_text, count, regex, ignore_case, whole_word, guard)[0]
+
+
+def replace_in_texts(texts, find_text, replace_text, count=0, regex=False, ignore_case=False,
+                     whole_word=False, guard=None):
+    """
+    replace_in_text applied to each of `texts`, in one batch. Returns the new texts.
+    Raises PatternError or MatchTimeout.
+    """
+    if FindOptions(regex, ignore_case, whole_word).is_literal:
+        # Plain literal replace: str.replace is much faster than a pattern.
+        return [text.replace(find_text, replace_text, count or -1) for text in texts]
+    query = compile_query(find_text, regex, ignore_case, whole_word)
+    guard = guard or MatchGuard()
+    try:
+        return guard.sub_all(query, make_replacement(replace_text, regex), texts, count)
+    except _TEMPLATE_ERRORS as e:
+        # Bad group reference in the replacement template
+        raise PatternError(f"无效的替换模板: {e}") from e
@@ -1,9 +1,13 @@
 import json
 import re
 from src.timecode_utils import TimecodeUtils
+from src.log_utils import get_logger, ErrorAggregator
+
+logger = get_logger("format_converter")
 
 def format_subtitles_to_srt(subtitles: list, frame_rate: float, offset_frames: int = 0) -> str:
     srt_content = []
+    errors = ErrorAggregator(logger, "Skipping invalid subtitle entries")
     for i, sub in enumerate(subtitles):
         try:
             # Convert to frames and then apply the offset to make it zero-based
@@ -22,9 +26,10 @@ def format_subtitles_to_srt(subtitles: list, frame_rate: float, offset_frames: i
             srt_content.append(sub['text'])
             srt_content.append("")  # Add a blank line after each entry
         except (KeyError, ValueError) as e:
-            print(f"Skipping invalid subtitle entry at index {i}: {e}")
+            errors.add("index %d: %r", i, e)
             continue
-            
+
+    errors.report()
     return "\n".join(srt_content)
 
 def convert_json_to_srt(json_path: str, frame_rate: float, offset_frames: int = 0) -> str:
@@ -35,7 +40,7 @@ def convert_json_to_srt(json_path: str, frame_rate: float, offset_frames: int =
         with open(json_path, 'r', encoding='utf-8') as f:
             subtitles = json.load(f)
     except (FileNotFoundError, json.JSONDecodeError) as e:
-        print(f"Error reading or parsing JSON file: {e}")
+        logger.error("Error reading or parsing JSON file %s: %s", json_path, e)
         return ""
 
     return format_subtitles_to_srt(subtitles, frame_rate, offset_frames)
@@ -44,7 +49,8 @@ def parse_srt_content(srt_content: str) -> list:
     """Parses SRT content into a list of subtitle dictionaries."""
     subtitle_blocks = srt_content.strip().split('\n\n')
     subtitles = []
-    for block in subtitle_blocks:
+    errors = ErrorAggregator(logger, "Skipping invalid SRT blocks")
+    for block_number, block in enumerate(subtitle_blocks, start=1):
         lines = block.strip().split('\n')
         if len(lines) >= 3:
             try:
@@ -61,6 +67,8 @@ def parse_srt_content(srt_content: str) -> list:
                     'text': '\n'.join(text_lines)
                 })
             except (ValueError, IndexError) as e:
-                print(f"Skipping invalid SRT block: {block} - Error: {e}")
+                # Only a short prefix of the block is kept as a sample, never the full text.
+                errors.add("block %d (%.40r): %s", block_number, block, e)
                 continue
+    errors.report()
     return subtitles
\ No newline at end of file
@@ -0,0 +1,148 @@
+# glossary.py
+"""
+Multi-pattern glossary replacement.
+
+A glossary is a list of literal find → replace rules (names, brand terms,
+punctuation fixes). All rules are compiled into one Aho-Corasick automaton, so a
+subtitle is rewritten in a single left-to-right pass no matter how many rules
+there are. Overlapping matches are resolved leftmost-longest: the match that
+starts first wins, and among matches starting at the same position the longest
+one wins. Replaced text is never matched again.
+
+Rules files are UTF-8 text with one rule per line, `find<TAB>replace` or
+`find => replace`. Blank lines and lines starting with `#` are ignored.
+"""
+from .log_utils import get_logger
+
+logger = get_logger("glossary")
+
+RULE_SEPARATORS = ('\t', ' => ')
+
+
+class GlossaryError(ValueError):
+    """Raised for a malformed glossary rules file."""
+
+
+def parse_glossary_rules(content: str) -> dict:
+    """
+    Parses rules file content into an ordered {find: replace} dict. A find text
+    defined twice keeps its last replacement.
+    """
+    rules = {}
+    for line_number, line in enumerate(content.splitlines(), 1):
+        if not line.strip() or line.lstrip().startswith('#'):
+            continue
+        for separator in RULE_SEPARATORS:
+            if separator in line:
+                find_text, replace_text = line.split(separator, 1)
+                break
+        else:
+            raise GlossaryError(f"术语表第 {line_number} 行格式错误: {line!r}")
+        if not find_text:
+            raise GlossaryError(f"术语表第 {line_number} 行缺少查找内容")
+        if find_text in rules:
+            logger.warning("Glossary rule %r redefined on line %d", find_text, line_number)
+        rules[find_text] = replace_text
+    return rules
+
+
+def load_glossary_rules(path: str) -> dict:
+    """Reads and parses a rules file. Raises IOError or GlossaryError."""
+    with open(path, 'r', encoding='utf-8-sig') as f:
+        return parse_glossary_rules(f.read())
+
+
+class GlossaryAutomaton:
+    """
+    Aho-Corasick automaton over the find texts of a glossary. Build it once per
+    glossary and call `replace` on every subtitle.
+    """
+
+    def __init__(self, rules: dict):
+        # Node 0 is the root. Per node: outgoing edges, failure link, the
+        # length of the rule ending exactly here (0 if none) and a link to the
+        # nearest proper suffix node at which a rule ends.
+        self._goto = [{}]
+        self._fail = [0]
+        self._rule_len = [0]
+        self._output_link = [0]
+        self._replacement = [None]
+        for find_text, replace_text in rules.items():
+            if find_text:
+                self._add(find_text, replace_text)
+        self._link()
+
+    def __len__(self):
+        return sum(1 for length in self._rule_len if length)
+
+    def _add(self, find_text, replace_text):
+        node = 0
+        for ch in find_text:
+            child = self._goto[node].get(ch)
+            if child is None:
+                child = len(self._goto)
+                self._goto[node][ch] = child
+                self._goto.append({})
+                self._fail.append(0)
+                self._rule_len.append(0)
+                self._output_link.append(0)
+                self._replacement.append(None)
+            node = child
+        self._rule_len[node] = len(find_text)
+        self._replacement[node] = replace_text
+
+    def _link(self):
+        """Computes failure and output links breadth-first."""
+        queue = list(self._goto[0].values())
+        for node in queue:
+            for ch, child in self._goto[node].items():
+                queue.append(child)
+                fail = self._fail[node]
+                while fail and ch not in self._goto[fail]:
+                    fail = self._fail[fail]
+                target = self._goto[fail].get(ch, 0)
+                self._fail[child] = target if target != child else 0
+                fail = self._fail[child]
+                self._output_link[child] = fail if self._rule_len[fail] else self._output_link[fail]
+
+    def find_matches(self, text: str):
+        """
+        Non-overlapping leftmost-longest matches in `text`, as (start, end, replacement)
+        tuples in text order.
+        """
+        goto, fail = self._goto, self._fail
+        rule_len, output_link, replacement = self._rule_len, self._output_link, self._replacement
+        longest = {}  # start -> (end, replacement) of the longest rule starting there
+        node = 0
+        for i, ch in enumerate(text):
+            while node and ch not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(ch, 0)
+            match = node if rule_len[node] else output_link[node]
+            while match:
+                # Ends only grow, so a later match at the same start is longer.
+                longest[i + 1 - rule_len[match]] = (i + 1, replacement[match])
+                match = output_link[match]
+
+        matches = []
+        position = 0
+        for start in sorted(longest):
+            if start >= position:
+                end, replace_text = longest[start]
+                matches.append((start, end, replace_text))
+                position = end
+        return matches
+
+    def replace(self, text: str) -> str:
+        """Applies every rule to `text` in one pass."""
+        matches = self.find_matches(text)
+        if not matches:
+            return text
+        parts = []
+        position = 0
+        for start, end, replacement in matches:
+            parts.append(text[position:start])
+            parts.append(replacement)
+            position = end
+        parts.append(text[position:])
+        return ''.join(parts)
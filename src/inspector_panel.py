@@ -8,8 +8,11 @@ from PySide6.QtWidgets import (
     QPushButton,
     QLabel,
     QFrame,
+    QCheckBox,
 )
 
+from .retime import CONFORM_PRESETS
+
 class InspectorPanel(QWidget):
     def __init__(self, parent=None):
         super().__init__(parent)
@@ -24,7 +27,13 @@ class InspectorPanel(QWidget):
         self.search_text = QLineEdit()
         self.search_text.setPlaceholderText("搜索文本...")
         self.search_type_combo = QComboBox()
-        self.search_type_combo.addItems(['包含', '精确', '开头是', '结尾是', '通配符'])
+        self.search_type_combo.addItems(['包含', '精确', '开头是', '结尾是', '通配符', '正则'])
+        self.search_all_tracks_button = QPushButton("搜索全部轨道")
+        self.time_range_label = QLabel("时间:")
+        self.time_from_text = QLineEdit()
+        self.time_from_text.setPlaceholderText("起始 00:00:00,000")
+        self.time_to_text = QLineEdit()
+        self.time_to_text.setPlaceholderText("结束 00:00:00,000")
 
         # Find and Replace widgets
         self.find_label = QLabel("查找:")
@@ -33,15 +42,43 @@ class InspectorPanel(QWidget):
         self.replace_label = QLabel("替换:")
         self.replace_text = QLineEdit()
         self.replace_text.setPlaceholderText("替换为...")
+        self.regex_checkbox = QCheckBox("正则表达式")
+        self.ignore_case_checkbox = QCheckBox("忽略大小写")
+        self.whole_word_checkbox = QCheckBox("全词匹配")
+        self.match_count_label = QLabel("")
+        self.find_prev_button = QPushButton("查找上一个")
         self.find_next_button = QPushButton("查找下一个")
         self.replace_button = QPushButton("替换")
         self.replace_all_button = QPushButton("全部替换")
+        self.glossary_button = QPushButton("应用术语表")
+        self.timing_check_button = QPushButton("检查时间轴")
+        self.lint_profile_combo = QComboBox()
+        self.lint_profile_combo.addItem("中文规范", 'cjk')
+        self.lint_profile_combo.addItem("西文规范", 'latin')
+        self.lint_button = QPushButton("字幕规范检查")
+
+        # Retime controls
+        self.retime_label = QLabel("时间调整:")
+        self.shift_offset_text = QLineEdit()
+        self.shift_offset_text.setPlaceholderText("偏移 帧数 或 ±00:00:01,000")
+        self.shift_button = QPushButton("整体平移")
+        self.ripple_shift_button = QPushButton("从当前行平移")
+        self.conform_combo = QComboBox()
+        for label, from_rate, to_rate in CONFORM_PRESETS:
+            self.conform_combo.addItem(label, (from_rate, to_rate))
+        self.conform_button = QPushButton("转换帧率")
+        self.snap_button = QPushButton("对齐到帧")
+
+        # Bilingual alignment: the current track against another one
+        self.align_track_combo = QComboBox()
+        self.align_button = QPushButton("双语对齐")
 
         # Bottom controls
         self.track_combo = QComboBox()
         self.refresh_button = QPushButton("获取字幕")
         self.export_reimport_button = QPushButton("导出到DaVinci Resolve中")
         self.import_srt_button = QPushButton("导入SRT文件")
+        self.follow_playhead_checkbox = QCheckBox("跟随播放头")
 
     def _setup_layouts(self):
         inspector_layout = QVBoxLayout(self)
@@ -53,7 +90,15 @@ class InspectorPanel(QWidget):
         search_layout.addWidget(self.search_label)
         search_layout.addWidget(self.search_text)
         inspector_layout.addLayout(search_layout)
-        inspector_layout.addWidget(self.search_type_combo)
+        search_type_layout = QHBoxLayout()
+        search_type_layout.addWidget(self.search_type_combo)
+        search_type_layout.addWidget(self.search_all_tracks_button)
+        inspector_layout.addLayout(search_type_layout)
+        time_range_layout = QHBoxLayout()
+        time_range_layout.addWidget(self.time_range_label)
+        time_range_layout.addWidget(self.time_from_text)
+        time_range_layout.addWidget(self.time_to_text)
+        inspector_layout.addLayout(time_range_layout)
 
         # --- Separator ---
         inspector_layout.addSpacing(10)
@@ -66,14 +111,43 @@ class InspectorPanel(QWidget):
         # --- Find/Replace Controls ---
         inspector_layout.addWidget(self.find_label)
         inspector_layout.addWidget(self.find_text)
+        find_options_layout = QHBoxLayout()
+        find_options_layout.addWidget(self.regex_checkbox)
+        find_options_layout.addWidget(self.ignore_case_checkbox)
+        find_options_layout.addWidget(self.whole_word_checkbox)
+        inspector_layout.addLayout(find_options_layout)
+        inspector_layout.addWidget(self.match_count_label)
         inspector_layout.addWidget(self.replace_label)
         inspector_layout.addWidget(self.replace_text)
 
         find_replace_buttons_layout = QHBoxLayout()
+        find_replace_buttons_layout.addWidget(self.find_prev_button)
         find_replace_buttons_layout.addWidget(self.find_next_button)
         find_replace_buttons_layout.addWidget(self.replace_button)
         find_replace_buttons_layout.addWidget(self.replace_all_button)
         inspector_layout.addLayout(find_replace_buttons_layout)
+        inspector_layout.addWidget(self.glossary_button)
+        inspector_layout.addWidget(self.timing_check_button)
+        lint_layout = QHBoxLayout()
+        lint_layout.addWidget(self.lint_profile_combo)
+        lint_layout.addWidget(self.lint_button)
+        inspector_layout.addLayout(lint_layout)
+
+        inspector_layout.addWidget(self.retime_label)
+        inspector_layout.addWidget(self.shift_offset_text)
+        shift_layout = QHBoxLayout()
+        shift_layout.addWidget(self.shift_button)
+        shift_layout.addWidget(self.ripple_shift_button)
+        inspector_layout.addLayout(shift_layout)
+        conform_layout = QHBoxLayout()
+        conform_layout.addWidget(self.conform_combo)
+        conform_layout.addWidget(self.conform_button)
+        conform_layout.addWidget(self.snap_button)
+        inspector_layout.addLayout(conform_layout)
+        align_layout = QHBoxLayout()
+        align_layout.addWidget(self.align_track_combo)
+        align_layout.addWidget(self.align_button)
+        inspector_layout.addLayout(align_layout)
 
         inspector_layout.addStretch()
 
@@ -83,4 +157,5 @@ class InspectorPanel(QWidget):
         bottom_layout.addWidget(self.refresh_button)
         bottom_layout.addWidget(self.import_srt_button)
         inspector_layout.addLayout(bottom_layout)
+        inspector_layout.addWidget(self.follow_playhead_checkbox)
         inspector_layout.addWidget(self.export_reimport_button)
\ No newline at end of file
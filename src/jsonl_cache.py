@@ -0,0 +1,258 @@
+# jsonl_cache.py
+"""
+JSON Lines cache file for a subtitle track, with a side index of line offsets,
+so that a single edited subtitle is saved without rewriting the track.
+
+'track_N.jsonl' holds one compact JSON record per row, in row order, as the JSON
+cache stores them ('index', 'start', 'end', 'text'). 'track_N.jsonl.idx' holds
+the byte offset of each row's current line:
+
+    header      INDEX_HEADER: magic, row count, data file size, compacted size
+    offsets     row count little-endian int64
+
+An edited row is saved by patch_row:
+- if its new line is not longer than the old one, it overwrites the old line in
+  place, padded with spaces (whitespace is valid after a JSON value); over an
+  appended line, the new line keeps the {"row": R, ...} form;
+- otherwise it is appended as {"row": R, ...record} and the row's index entry is
+  pointed at it. Readers apply appended lines over the rows they name.
+Either way the write is the line itself plus one index entry. Once appended
+lines outgrow the compacted file, patch_row declines and the caller rewrites the
+whole file (write_track), which drops the stale lines.
+
+The index records the data file size it matches. If they differ (an
+interrupted write, or a file written by another tool) the index is rebuilt by
+scanning the file. read_rows reads a row range through the index, touching only
+those lines; it serves tools and the benchmark, as loading a track for the view
+still decodes the whole file (read_track).
+"""
+import mmap
+import os
+import struct
+import sys
+from array import array
+
+from .json_codec import cache_records, line_encoder, loads
+from .subtitle_store import SubtitleTrack
+
+JSONL_EXTENSION = '.jsonl'
+INDEX_SUFFIX = '.idx'
+
+INDEX_MAGIC = b'SVJLIDX\x00'
+# magic, row count, data file size, data file size when last compacted
+INDEX_HEADER = struct.Struct('<8sQQQ')
+_OFFSET = struct.Struct('<q')
+_SWAP = sys.byteorder != 'little'  # Offsets are stored little-endian
+
+# patch_row declines once appended lines would make the file this many times its compacted size.
+COMPACT_RATIO = 2
+
+
+class CacheIndexError(ValueError):
+    """Raised for an index that does not match its data file."""
+
+
+def _index_path(file_path):
+    return os.fspath(file_path) + INDEX_SUFFIX
+
+
+def _write_index(file_path, offsets, data_size, compacted_size):
+    offsets = array('q', offsets)
+    if _SWAP:
+        offsets.byteswap()
+    with open(_index_path(file_path), 'wb') as f:
+        f.write(INDEX_HEADER.pack(INDEX_MAGIC, len(offsets), data_size, compacted_size))
+        f.write(offsets.tobytes())
+
+
+def write_track(file_path, track, texts=None, codec='json'):
+    """
+    Writes a whole track (a SubtitleTrack or a list of subtitle dicts) and its
+    index, compacting away appended lines. `texts` are the clean texts, as from
+    json_codec.cache_texts (computed if not given); `codec` is a resolved
+    json_codec name.
+    """
+    track = SubtitleTrack.from_dicts(track)
+    encode = line_encoder('json' if codec == 'indent' else codec)
+    lines = [encode(record) + b'\n' for record in cache_records(track, texts)]
+    offsets = array('q', [0] * len(lines))
+    position = 0
+    for row, line in enumerate(lines):
+        offsets[row] = position
+        position += len(line)
+    with open(file_path, 'wb') as f:
+        f.write(b''.join(lines))
+    _write_index(file_path, offsets, position, position)
+
+
+def _parse_lines(data):
+    """
+    Records of JSON Lines data, with appended {"row": R, ...} lines applied, and
+    the offset of each row's current line.
+    """
+    records, offsets = [], array('q')
+    position = 0
+    for line in data.split(b'\n'):
+        if line.strip():
+            record = loads(line)
+            row = record.pop('row', None)
+            if row is None:
+                records.append(record)
+                offsets.append(position)
+            elif type(row) is int and 0 <= row < len(records):
+                records[row] = record
+                offsets[row] = position
+            else:
+                raise ValueError(f"Replacement line for unknown row {row!r} at byte {position}")
+        position += len(line) + 1
+    return records, offsets
+
+
+def read_track(file_path):
+    """Reads a whole JSON Lines cache file into a SubtitleTrack. Raises OSError or ValueError."""
+    with open(file_path, 'rb') as f:
+        records, _ = _parse_lines(f.read())
+    return SubtitleTrack(records)
+
+
+def _read_index_header(file_path):
+    """(row count, data size, compacted size) of a file's index. Raises OSError or CacheIndexError."""
+    with open(_index_path(file_path), 'rb') as f:
+        header = f.read(INDEX_HEADER.size)
+    if len(header) != INDEX_HEADER.size:
+        raise CacheIndexError(f"{_index_path(file_path)} is truncated")
+    magic, rows, data_size, compacted_size = INDEX_HEADER.unpack(header)
+    if magic != INDEX_MAGIC:
+        raise CacheIndexError(f"{_index_path(file_path)} is not a cache index")
+    if os.path.getsize(file_path) != data_size:
+        raise CacheIndexError(f"{_index_path(file_path)} does not match {file_path}")
+    return rows, data_size, compacted_size
+
+
+def rebuild_index(file_path):
+    """Rewrites a file's index by scanning it. Returns the row count."""
+    with open(file_path, 'rb') as f:
+        data = f.read()
+    _, offsets = _parse_lines(data)
+    _write_index(file_path, offsets, len(data), len(data))
+    return len(offsets)
+
+
+def _checked_index_header(file_path):
+    """The index header, rebuilding the index first if it is missing or stale."""
+    try:
+        return _read_index_header(file_path)
+    except (OSError, CacheIndexError):
+        if not os.path.exists(file_path):
+            raise
+        rebuild_index(file_path)
+        return _read_index_header(file_path)
+
+
+def row_count(file_path):
+    """Number of rows in a JSON Lines cache file."""
+    return _checked_index_header(file_path)[0]
+
+
+def read_rows(file_path, start, stop):
+    """Rows start..stop - 1 as subtitle dicts, read through the index without loading the rest of the file."""
+    rows = _checked_index_header(file_path)[0]
+    start, stop = max(start, 0), min(stop, rows)
+    if start >= stop:
+        return []
+    with open(_index_path(file_path), 'rb') as f:
+        f.seek(INDEX_HEADER.size + 8 * start)
+        offsets = array('q')
+        offsets.frombytes(f.read(8 * (stop - start)))
+    if _SWAP:
+        offsets.byteswap()
+    records = []
+    with open(file_path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+        for offset in offsets:
+            record = loads(data[offset:data.find(b'\n', offset)])
+            record.pop('row', None)
+            records.append(record)
+    return records
+
+
+def patch_row(file_path, track, row, codec='json'):
+    """
+    Saves row `row` of `track` (a SubtitleTrack) into its cache file, in place or
+    as an appended line (see the module docstring). Returns False without writing
+    if the file has to be rewritten instead: it does not hold that row, or it has
+    grown past COMPACT_RATIO times its compacted size.
+    """
+    try:
+        rows, data_size, compacted_size = _checked_index_header(file_path)
+    except (OSError, ValueError):
+        return False
+    if rows != len(track) or not 0 <= row < rows:
+        return False
+    record = cache_records(track, None, row, row + 1)[0]
+    line = line_encoder('json' if codec == 'indent' else codec)(record)
+
+    index_path = _index_path(file_path)
+    with open(index_path, 'rb') as f:
+        f.seek(INDEX_HEADER.size + 8 * row)
+        offset, = _OFFSET.unpack(f.read(8))
+    appended = b'{"row":%d,' % row + line[1:] + b'\n'
+    with open(file_path, 'r+b') as f:
+        f.seek(offset)
+        old_line = f.readline()
+        old_length = len(old_line) - 1
+        # A row already saved as an appended line must keep its "row" key when overwritten.
+        if offset >= compacted_size or old_line.startswith(b'{"row":'):
+            line = appended[:-1]
+        if len(line) <= old_length:
+            f.seek(offset)
+            f.write(line + b' ' * (old_length - len(line)))
+            return True
+        if data_size + len(appended) > COMPACT_RATIO * max(compacted_size, 4096):
+            return False
+        f.seek(data_size)
+        f.write(appended)
+    with open(index_path, 'r+b') as f:
+        f.write(INDEX_HEADER.pack(INDEX_MAGIC, rows, data_size + len(appended), compacted_size))
+        f.seek(INDEX_HEADER.size + 8 * row)
+        f.write(_OFFSET.pack(data_size))
+    return True
+
+
+if __name__ == "__main__":
+    # Benchmark of a one-row text edit and a row-range read on a 50k-row track:
+    #   python -m src.jsonl_cache [row_count]
+    import random
+    import tempfile
+    import timeit
+
+    from .json_codec import available_codecs, write_cache_json
+    from .subtitle_store import ms_to_srt_time
+
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 50000
+    codec = available_codecs()[0]
+    random.seed(7)
+    words = "我们 现在 就走 他们 马上 回来 the door is open we should go now".split()
+    track = SubtitleTrack([
+        {'index': i + 1, 'start': ms_to_srt_time(i * 2000), 'end': ms_to_srt_time(i * 2000 + 1500),
+         'text': " ".join(random.choice(words) for _ in range(8))}
+        for i in range(count)
+    ])
+    with tempfile.TemporaryDirectory() as directory:
+        json_path, jsonl_path = os.path.join(directory, 'track.json'), os.path.join(directory, 'track.jsonl')
+        write_track(jsonl_path, track, codec=codec)
+
+        def edit(text):
+            row = random.randrange(count)
+            track.texts[row] = text
+            return row
+
+        cases = [
+            (f"save JSON ({codec})", lambda: write_cache_json(json_path, track, codec)),
+            ("patch in place", lambda: patch_row(jsonl_path, track, edit("短"), codec)),
+            ("patch appended", lambda: patch_row(jsonl_path, track, edit("一行更长的字幕 " * 4), codec)),
+            ("load JSON Lines", lambda: read_track(jsonl_path)),
+            ("read 100 rows", lambda: read_rows(jsonl_path, count // 2, count // 2 + 100)),
+        ]
+        for name, function in cases:
+            seconds = min(timeit.repeat(function, number=1, repeat=20))
+            print(f"{name:22s} {seconds * 1000:8.2f} ms")
@@ -0,0 +1,219 @@
+# lint.py
+"""
+Delivery checks (lint) for a subtitle track.
+
+A track is loaded once into columns (start and end frames, text length, longest
+line, line count) and every rule is evaluated over whole columns, instead of
+running each rule per row. With NumPy installed the columns are arrays and each
+rule is a couple of vectorized operations; without it the same rules run as
+list comprehensions over `array` columns. The result is a bit mask per row, one
+bit per violated rule, which the subtitle table uses to color rows.
+
+Text lengths are measured on `clean_html` text, like the length column. Timing
+rules skip rows without 'in_frame'/'out_frame'.
+"""
+from array import array
+from typing import NamedTuple
+
+from .utils import DEFAULT_CHAR_LIMIT, clean_html
+from .subtitle_store import SubtitleTrack
+
+try:
+    import numpy as np
+except ImportError:  # Optional: the pure-Python columns give the same results
+    np = None
+
+# Rule bits, in report order.
+CPS = 1 << 0
+MIN_DURATION = 1 << 1
+MAX_DURATION = 1 << 2
+MIN_GAP = 1 << 3
+LINE_LENGTH = 1 << 4
+LINE_COUNT = 1 << 5
+OVERLAP = 1 << 6
+
+RULE_LABELS = {
+    CPS: "阅读速度过快",
+    MIN_DURATION: "持续时间过短",
+    MAX_DURATION: "持续时间过长",
+    MIN_GAP: "与上一条间隔过短",
+    LINE_LENGTH: "单行字数超限",
+    LINE_COUNT: "行数过多",
+    OVERLAP: "与其他字幕重叠",
+}
+
+
+class LintProfile(NamedTuple):
+    """
+    Limits of one delivery spec. Durations are in seconds, gaps in frames. A
+    `max_line_length` of None uses the length column's character limit.
+    """
+    name: str
+    max_cps: float = 9.0
+    min_duration: float = 5 / 6
+    max_duration: float = 7.0
+    min_gap_frames: int = 2
+    max_line_length: int = None
+    max_lines: int = 2
+
+
+# Rule profiles by name. 'cjk' reuses the length column's character limit.
+PROFILES = {
+    'cjk': LintProfile('cjk'),
+    'latin': LintProfile('latin', max_cps=17.0, max_line_length=42),
+}
+DEFAULT_PROFILE = 'cjk'
+
+
+class LintResult(NamedTuple):
+    """Per-row rule bits (0 for a clean row), in the order of the linted list."""
+    flags: list
+
+    def counts(self):
+        """{rule bit: number of rows violating it}, for the rules with any violation."""
+        counts = {}
+        for rule in RULE_LABELS:
+            count = sum(1 for row_flags in self.flags if row_flags & rule)
+            if count:
+                counts[rule] = count
+        return counts
+
+    def rows_with_violations(self):
+        return [row for row, row_flags in enumerate(self.flags) if row_flags]
+
+
+def describe_flags(flags):
+    """The labels of the rules set in `flags`, in report order."""
+    return [label for rule, label in RULE_LABELS.items() if flags & rule]
+
+
+class _Columns:
+    """A track's lint inputs as parallel columns, one entry per row."""
+
+    def __init__(self, subtitles):
+        if isinstance(subtitles, SubtitleTrack):
+            # Frames are already columns; -1 marks a missing frame.
+            texts = subtitles.texts
+            frames = zip(subtitles.in_frames, subtitles.out_frames)
+            frames = ((start, end) if start >= 0 and end >= 0 else (None, None) for start, end in frames)
+        else:
+            texts = [sub.get('text', '') for sub in subtitles]
+            frames = ((sub.get('in_frame'), sub.get('out_frame')) for sub in subtitles)
+
+        starts, ends, timed = array('q'), array('q'), array('b')
+        for start, end in frames:
+            is_timed = start is not None and end is not None
+            timed.append(is_timed)
+            starts.append(start if is_timed else 0)
+            ends.append(end if is_timed else 0)
+
+        lengths, longest_lines, line_counts = array('q'), array('q'), array('q')
+        for text in texts:
+            if '<' in text:
+                text = clean_html(text)
+            if '\n' in text:
+                line_lengths = [len(line) for line in text.split('\n')]
+                lengths.append(sum(line_lengths))
+                longest_lines.append(max(line_lengths))
+                line_counts.append(len(line_lengths))
+            else:
+                # Most subtitles are a single line of plain text.
+                lengths.append(len(text))
+                longest_lines.append(len(text))
+                line_counts.append(1)
+        self.starts, self.ends, self.timed = starts, ends, timed
+        self.lengths, self.longest_lines, self.line_counts = lengths, longest_lines, line_counts
+
+
+def lint_subtitles(subtitles, frame_rate, profile=PROFILES[DEFAULT_PROFILE], char_limit=DEFAULT_CHAR_LIMIT):
+    """
+    Checks every row of `subtitles` against `profile`. `char_limit` is the length
+    column's character limit, for a profile without its own line length.
+    Returns a LintResult.
+    """
+    if profile.max_line_length is None:
+        profile = profile._replace(max_line_length=char_limit)
+    columns = _Columns(subtitles)
+    if np is not None:
+        flags = _lint_numpy(columns, frame_rate, profile)
+    else:
+        flags = _lint_python(columns, frame_rate, profile)
+    return LintResult(flags)
+
+
+def _lint_numpy(columns, frame_rate, profile):
+    n = len(columns.lengths)
+    starts = np.frombuffer(columns.starts, dtype=np.int64)
+    ends = np.frombuffer(columns.ends, dtype=np.int64)
+    timed = np.frombuffer(columns.timed, dtype=np.int8).astype(bool)
+    lengths = np.frombuffer(columns.lengths, dtype=np.int64)
+    longest = np.frombuffer(columns.longest_lines, dtype=np.int64)
+    line_counts = np.frombuffer(columns.line_counts, dtype=np.int64)
+
+    flags = np.zeros(n, dtype=np.int64)
+    flags[longest > profile.max_line_length] |= LINE_LENGTH
+    flags[line_counts > profile.max_lines] |= LINE_COUNT
+    if frame_rate <= 0 or not timed.any():
+        return flags.tolist()
+
+    seconds = (ends - starts) / frame_rate
+    flags[timed & (seconds < profile.min_duration)] |= MIN_DURATION
+    flags[timed & (seconds > profile.max_duration)] |= MAX_DURATION
+    with np.errstate(divide='ignore', invalid='ignore'):
+        cps = np.where(seconds > 0, lengths / np.where(seconds > 0, seconds, 1), 0)
+    flags[timed & (cps > profile.max_cps)] |= CPS
+
+    # Neighbour rules over the timed rows in start order. A row overlaps an earlier
+    # one if it starts before the latest end so far, and a later one if it ends
+    # after the next start.
+    rows = np.flatnonzero(timed)
+    order = rows[np.argsort(starts[rows], kind='stable')]
+    sorted_starts, sorted_ends = starts[order], ends[order]
+    latest_ends = np.maximum.accumulate(sorted_ends)
+    gaps = sorted_starts[1:] - latest_ends[:-1]
+    overlap = np.zeros(len(order), dtype=bool)
+    overlap[1:] |= gaps < 0
+    overlap[:-1] |= sorted_ends[:-1] > sorted_starts[1:]
+    flags[order[overlap]] |= OVERLAP
+    short_gap = (gaps > 0) & (gaps < profile.min_gap_frames)
+    flags[order[1:][short_gap]] |= MIN_GAP
+    return flags.tolist()
+
+
+def _lint_python(columns, frame_rate, profile):
+    max_line_length, max_lines = profile.max_line_length, profile.max_lines
+    flags = [
+        (LINE_LENGTH if longest > max_line_length else 0) | (LINE_COUNT if count > max_lines else 0)
+        for longest, count in zip(columns.longest_lines, columns.line_counts)
+    ]
+    if frame_rate <= 0 or not any(columns.timed):
+        return flags
+
+    starts, ends = columns.starts, columns.ends
+    min_duration, max_duration, max_cps = profile.min_duration, profile.max_duration, profile.max_cps
+    for row, (is_timed, start, end, length) in enumerate(zip(columns.timed, starts, ends, columns.lengths)):
+        if not is_timed:
+            continue
+        seconds = (end - start) / frame_rate
+        if seconds < min_duration:
+            flags[row] |= MIN_DURATION
+        elif seconds > max_duration:
+            flags[row] |= MAX_DURATION
+        if seconds > 0 and length / seconds > max_cps:
+            flags[row] |= CPS
+
+    # Same neighbour rules as the NumPy path, see there.
+    order = sorted((row for row, is_timed in enumerate(columns.timed) if is_timed), key=starts.__getitem__)
+    latest_end = None
+    for position, row in enumerate(order):
+        start = starts[row]
+        if latest_end is not None:
+            gap = start - latest_end
+            if gap < 0:
+                flags[row] |= OVERLAP
+            elif 0 < gap < profile.min_gap_frames:
+                flags[row] |= MIN_GAP
+        if position + 1 < len(order) and ends[row] > starts[order[position + 1]]:
+            flags[row] |= OVERLAP
+        latest_end = ends[row] if latest_end is None else max(latest_end, ends[row])
+    return flags
@@ -0,0 +1,220 @@
+# log_utils.py
+"""
+Logging and tracing helpers shared by all Subvigator modules.
+
+Every module gets its logger through `get_logger` so that output can be configured
+in one place (`configure_logging`). Messages use lazy %-formatting, repeated warnings
+are rate limited by `RateLimitFilter`, and hot loops collect their per-entry problems
+in an `ErrorAggregator` instead of logging every single one.
+
+Span tracing is optional: when enabled, `traced` functions append one JSON object per
+call (name, start time, duration, status) to a JSONL file for offline analysis.
+"""
+import functools
+import json
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+LOGGER_NAME = "subvigator"
+LOG_FORMAT = "LOG: %(levelname)s: %(message)s"
+TRACE_ENV_VAR = "SUBVIGATOR_TRACE"
+
+
+def get_logger(name: str = None) -> logging.Logger:
+    """Returns the application logger, or one of its children (e.g. 'subtitle_manager')."""
+    return logging.getLogger(f"{LOGGER_NAME}.{name}" if name else LOGGER_NAME)
+
+
+class RateLimitFilter(logging.Filter):
+    """
+    Lets at most `burst` records with the same message template through per `interval`
+    seconds. Only records at or above `min_level` are limited. When a new window opens,
+    a separate note saying how many repeats were suppressed is sent to `handler`; the
+    limited records themselves are never modified, since other handlers share them.
+    """
+
+    SUPPRESSED_MSG = "%d similar messages suppressed: %s"
+
+    def __init__(self, burst: int = 5, interval: float = 10.0, min_level: int = logging.WARNING,
+                 handler: logging.Handler = None):
+        super().__init__()
+        self.burst = burst
+        self.interval = interval
+        self.min_level = min_level
+        self.handler = handler
+        self._windows = {}
+        self._lock = threading.Lock()
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno < self.min_level or record.msg == self.SUPPRESSED_MSG:
+            return True
+
+        # Keyed by the unformatted template, so no formatting happens for dropped records.
+        key = (record.name, record.levelno, record.msg)
+        now = time.monotonic()
+        reported = 0
+        with self._lock:
+            window_start, count, suppressed = self._windows.get(key, (now, 0, 0))
+            if now - window_start >= self.interval:
+                window_start, count, reported, suppressed = now, 0, suppressed, 0
+            if count >= self.burst:
+                self._windows[key] = (window_start, count, suppressed + 1)
+                return False
+            self._windows[key] = (window_start, count + 1, suppressed)
+
+        if reported and self.handler is not None:
+            note = logging.makeLogRecord(record.__dict__)
+            note.msg, note.args = self.SUPPRESSED_MSG, (reported, record.msg)
+            note.exc_info = note.exc_text = None
+            self.handler.handle(note)
+        return True
+
+
+class ErrorAggregator:
+    """
+    Collects repeated errors from a loop and logs a single summary: the total count
+    plus the first `max_samples` samples. Samples are stored as (template, args) and
+    only formatted when the summary is emitted.
+
+    Usage:
+        with ErrorAggregator(logger, "Skipping invalid SRT blocks") as errors:
+            for block in blocks:
+                ...
+                errors.add("block %d: %s", i, e)
+    """
+
+    def __init__(self, logger: logging.Logger, summary: str, max_samples: int = 5, level: int = logging.WARNING):
+        self.logger = logger
+        self.summary = summary
+        self.max_samples = max_samples
+        self.level = level
+        self.count = 0
+        self.samples = []
+
+    def add(self, msg: str, *args):
+        self.count += 1
+        if len(self.samples) < self.max_samples:
+            self.samples.append((msg, args))
+
+    def report(self):
+        """Logs the summary if any errors were collected, then resets the aggregator."""
+        if self.count and self.logger.isEnabledFor(self.level):
+            shown = "; ".join(msg % args if args else msg for msg, args in self.samples)
+            self.logger.log(
+                self.level, "%s: %d occurrence(s), first %d: %s",
+                self.summary, self.count, len(self.samples), shown,
+            )
+        self.count = 0
+        self.samples = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.report()
+        return False
+
+
+class SpanTracer:
+    """Writes timing spans as JSON Lines. Disabled (and nearly free) until `enable` is called."""
+
+    def __init__(self):
+        self._file = None
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    @property
+    def enabled(self) -> bool:
+        return self._file is not None
+
+    def enable(self, path: str):
+        self.disable()
+        self._file = open(path, 'a', encoding='utf-8')
+
+    def disable(self):
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+    @contextmanager
+    def span(self, name: str, **attrs):
+        if self._file is None:
+            yield
+            return
+
+        stack = getattr(self._local, 'stack', None)
+        if stack is None:
+            stack = self._local.stack = []
+        parent = stack[-1] if stack else None
+        stack.append(name)
+
+        status = "ok"
+        wall_start = time.time()
+        start = time.perf_counter()
+        try:
+            yield
+        except BaseException as e:
+            status = type(e).__name__
+            raise
+        finally:
+            duration_ms = (time.perf_counter() - start) * 1000.0
+            stack.pop()
+            entry = {
+                "name": name,
+                "parent": parent,
+                "ts": wall_start,
+                "duration_ms": round(duration_ms, 3),
+                "status": status,
+                "thread": threading.current_thread().name,
+            }
+            if attrs:
+                entry["attrs"] = attrs
+            line = json.dumps(entry, ensure_ascii=False, default=str)
+            with self._lock:
+                if self._file is not None:
+                    self._file.write(line + "\n")
+                    self._file.flush()
+
+
+tracer = SpanTracer()
+
+
+def traced(name: str = None):
+    """Decorator that wraps a function call in a tracer span named `name` (defaults to its qualname)."""
+    def decorator(func):
+        span_name = name or func.__qualname__
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not tracer.enabled:
+                return func(*args, **kwargs)
+            with tracer.span(span_name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def configure_logging(level: int = logging.INFO, trace_path: str = None, burst: int = 5, interval: float = 10.0):
+    """
+    Installs a console handler with the classic 'LOG: LEVEL: message' format and a
+    rate limit on repeated warnings. Tracing is enabled when `trace_path` is given
+    or the SUBVIGATOR_TRACE environment variable points to a file.
+    """
+    logger = get_logger()
+    logger.setLevel(level)
+    if not any(getattr(h, '_subvigator_handler', False) for h in logger.handlers):
+        handler = logging.StreamHandler()
+        handler.setFormatter(logging.Formatter(LOG_FORMAT))
+        handler.addFilter(RateLimitFilter(burst=burst, interval=interval, handler=handler))
+        handler._subvigator_handler = True
+        logger.addHandler(handler)
+
+    trace_path = trace_path or os.environ.get(TRACE_ENV_VAR)
+    if trace_path:
+        tracer.enable(trace_path)
+        logger.info("Span tracing enabled, writing to %s", trace_path)
+    return logger
@@ -1,13 +1,29 @@
 # main.py
 import sys
-from PySide6.QtWidgets import QApplication, QMessageBox
+from PySide6.QtWidgets import QApplication, QMessageBox, QDialog
+from PySide6.QtGui import QKeySequence, QShortcut
+from PySide6.QtCore import Qt, QTimer
 
 import os
 
 from src.resolve_integration import ResolveIntegration
 from src.ui import SubvigatorWindow
 from src.subtitle_manager import SubtitleManager
+from src.subtitle_table_model import SubtitleTableModel
+from src.alignment_dialog import AlignmentDialog
+from src.export_review_dialog import ExportReviewDialog
+from src.track_search_dialog import TrackSearchDialog
 from src.services import AppService
+from src.find_replace import PatternError
+from src.log_utils import get_logger, configure_logging, tracer
+from src.metrics import metrics, METRICS_ENV_VAR
+
+logger = get_logger("main")
+
+# Playhead follow polling: the interval doubles while the playhead is idle, up to
+# the maximum, and drops back to the minimum as soon as it moves.
+FOLLOW_MIN_INTERVAL_MS = 100
+FOLLOW_MAX_INTERVAL_MS = 1600
 
 
 class ApplicationController:
@@ -15,27 +31,47 @@ class ApplicationController:
         self.app = QApplication.instance() or QApplication(sys.argv)
         self.resolve_integration = resolve_integration
         self.subtitle_manager = subtitle_manager
-        # self.timecode_utils is now loaded on demand
         self.app_service = AppService(self.resolve_integration, self.subtitle_manager)
         self.window = SubvigatorWindow(self.resolve_integration)
         self.app.aboutToQuit.connect(self.cleanup_on_exit)
+
+        self.follow_timer = QTimer()
+        self.follow_timer.setSingleShot(True)
+        self.follow_timer.timeout.connect(self.on_follow_tick)
+        self.follow_interval = FOLLOW_MIN_INTERVAL_MS
+        self._last_playhead_frame = None
+        self._following = False  # True while the follow mode moves the selection
         
     def cleanup_on_exit(self):
         """
         Cleans up resources when the application is about to quit.
         """
-        print("LOG: INFO: Application is about to quit. Cleaning up cache.")
+        logger.info("Application is about to quit. Cleaning up cache.")
+        self.follow_timer.stop()
         self.subtitle_manager.clear_cache()
+        tracer.disable()
+
+        metrics_path = os.environ.get(METRICS_ENV_VAR)
+        if metrics_path:
+            try:
+                metrics.dump_json(metrics_path)
+                logger.info("Metrics written to %s", metrics_path)
+            except (IOError, TypeError) as e:
+                logger.error("Failed to write metrics to %s: %s", metrics_path, e)
 
     def connect_signals(self):
         self.window.inspector.refresh_button.clicked.connect(self.on_refresh_button_clicked)
-        self.window.tree.itemClicked.connect(self.on_item_clicked)
-        self.window.tree.itemDoubleClicked.connect(self.on_item_double_clicked)
+        self.window.tree.clicked.connect(self.on_item_clicked)
+        self.window.tree.selectionModel().currentChanged.connect(self.on_current_changed)
+        self.window.tree.doubleClicked.connect(self.on_item_double_clicked)
         self.window.subtitleDataChanged.connect(self.on_subtitle_data_changed)
+        self.window.subtitleTimingEdited.connect(self.on_subtitle_timing_edited)
         self.window.inspector.search_text.returnPressed.connect(self.window.filter_tree)
+        self.window.inspector.search_all_tracks_button.clicked.connect(self.on_search_all_tracks_clicked)
         self.window.inspector.track_combo.currentIndexChanged.connect(self.on_track_changed)
         self.window.inspector.export_reimport_button.clicked.connect(self.on_export_reimport_clicked)
         self.window.inspector.find_next_button.clicked.connect(self.on_find_next_clicked)
+        self.window.inspector.find_prev_button.clicked.connect(self.on_find_previous_clicked)
         self.window.inspector.replace_button.clicked.connect(
             lambda: self.handle_replace_current()
         )
@@ -43,6 +79,17 @@ class ApplicationController:
             lambda: self.handle_replace_all()
         )
         self.window.inspector.import_srt_button.clicked.connect(self.on_import_srt_clicked)
+        self.window.inspector.glossary_button.clicked.connect(self.on_apply_glossary_clicked)
+        self.window.inspector.follow_playhead_checkbox.toggled.connect(self.on_follow_playhead_toggled)
+        self.window.inspector.timing_check_button.clicked.connect(self.on_timing_check_clicked)
+        self.window.inspector.lint_button.clicked.connect(self.on_lint_clicked)
+        self.window.inspector.shift_button.clicked.connect(lambda: self.on_shift_clicked())
+        self.window.inspector.ripple_shift_button.clicked.connect(lambda: self.on_shift_clicked(ripple=True))
+        self.window.inspector.conform_button.clicked.connect(self.on_conform_clicked)
+        self.window.inspector.snap_button.clicked.connect(self.on_snap_clicked)
+        self.window.inspector.align_button.clicked.connect(self.on_align_clicked)
+        self.metrics_shortcut = QShortcut(QKeySequence("Ctrl+Shift+M"), self.window)
+        self.metrics_shortcut.activated.connect(self.show_metrics_report)
  
  
     def show_error_message(self, text, title="操作失败"):
@@ -56,6 +103,13 @@ class ApplicationController:
        msg_box.setStandardButtons(QMessageBox.Ok)
        msg_box.exec()
 
+    def show_metrics_report(self):
+        """
+        Shows the collected operation metrics (debug view, Ctrl+Shift+M).
+        """
+        report = metrics.format_report() or "尚未收集到任何指标。"
+        QMessageBox.information(self.window, "性能指标", report)
+
     def on_export_reimport_clicked(self):
         """
         Handles the click of the export/re-import button.
@@ -65,6 +119,9 @@ class ApplicationController:
             self.show_error_message("没有可导出的字幕数据。请先获取轨道字幕或导入SRT文件。", "操作无法进行")
             return
 
+        if not self.review_export_changes():
+            return
+
         # Directly call the unified service, which handles all cases.
         success, message = self.app_service.export_and_reimport_subtitles()
         if success:
@@ -73,6 +130,30 @@ class ApplicationController:
             self.show_error_message(message)
 
 
+    def review_export_changes(self):
+        """
+        Shows what the export will change in Resolve. Returns False if the user
+        cancels; an export with nothing to review goes ahead.
+        """
+        review, error = self.app_service.review_export_changes()
+        if error:
+            logger.warning("Skipping the export review: %s", error)
+            return True
+        if review is None or not review[0].entries:
+            return True
+        diff = review[0]
+        dialog = ExportReviewDialog(*review, f"导出前检查 - ST {self.subtitle_manager.current_track_index}", self.window)
+        dialog.report_button.clicked.connect(lambda: self.on_export_report_clicked(dialog, diff))
+        return dialog.exec() == QDialog.Accepted
+
+    def on_export_report_clicked(self, parent, diff):
+        file_path, error = self.app_service.export_diff_report(parent, diff)
+        if error:
+            if error != "No file selected.":
+                self.show_error_message(error, "导出失败")
+            return
+        QMessageBox.information(parent, "成功", f"修改报告已导出到 {file_path}")
+
     def on_track_changed(self, index):
         if index < 0:
             return
@@ -83,7 +164,8 @@ class ApplicationController:
             self.show_error_message(error)
             return
 
-        self.window.populate_table(subs_data=subtitles)
+        self.window.populate_table(subs_data=subtitles, track=track_index)
+        self.window.set_search_index(self.subtitle_manager.search_index, track_index)
         self.window.filter_tree()
 
     def on_refresh_button_clicked(self):
@@ -100,59 +182,80 @@ class ApplicationController:
             return
 
         self.window.inspector.track_combo.clear()
+        self.window.inspector.align_track_combo.clear()
         for i in range(1, timeline_info['track_count'] + 1):
             self.window.inspector.track_combo.addItem(f"ST {i}")
+            self.window.inspector.align_track_combo.addItem(f"ST {i}", i)
 
         if self.window.inspector.track_combo.count() > 0:
             self.on_track_changed(self.window.inspector.track_combo.currentIndex())
 
 
-    def on_item_clicked(self, item, column):
-        try:
-            item_id_str = item.text(0)
-            if not item_id_str:
-                return
+    def on_item_clicked(self, index):
+        self.seek_to_index(index)
 
-            item_id = int(item_id_str)
-            sub_obj = next((s for s in self.subtitle_manager.get_subtitles() if s['index'] == item_id), None)
+    def on_current_changed(self, current, previous):
+        """Seeks as the selection moves with the keyboard; mouse clicks seek through on_item_clicked."""
+        if QApplication.mouseButtons() == Qt.NoButton and not self._following:
+            self.seek_to_index(current, show_errors=False)
 
-            if not sub_obj:
-                print(f"LOG: WARNING: Failed to get subtitle object for ID {item_id}")
-                return
+    def seek_to_index(self, index, show_errors=True):
+        """
+        Moves Resolve's playhead to the start of the subtitle at `index`. The start
+        frame is stored on the row at load time, so this is a single API call.
+        """
+        if not index.isValid():
+            return
+        frame = index.data(SubtitleTableModel.StartFrameRole)
+        if frame is None:
+            logger.warning("No start frame for subtitle %s; cannot seek.", index.siblingAtColumn(0).data())
+            return
 
-            timeline_info, error = self.resolve_integration.get_current_timeline_info()
-            if error:
+        success, error = self.resolve_integration.seek_to_frame(frame)
+        if not success:
+            if show_errors:
                 self.show_error_message(f"无法导航到时间码: {error}")
-                return
-            if not timeline_info:
-                print("LOG: WARNING: Could not get timeline info.")
-                return
-
-            frame_rate = timeline_info['frame_rate']
-            start_timecode_str = sub_obj['start']
-
-            # Get timecode utils on demand
-            tc_utils = self.resolve_integration.get_timecode_utils()
-            if not tc_utils:
-                self.show_error_message("Timecode utility is not available.")
-                return
-
-            # Convert HH:MM:SS,ms to total frames
-            total_frames = tc_utils.timecode_to_frames(start_timecode_str, frame_rate)
-            
-            # Convert total frames to HH:MM:SS:FF for Resolve
-            resolve_timecode = tc_utils.timecode_from_frame(total_frames, frame_rate)
-            
-            self.resolve_integration.timeline.SetCurrentTimecode(resolve_timecode)
-            print(f"LOG: INFO: Navigated to timecode: {resolve_timecode} (Frame: {total_frames})")
+            else:
+                logger.warning("Failed to seek to frame %s: %s", frame, error)
+            return
+        logger.debug("Navigated to frame %s", frame)
 
-        except (ValueError, IndexError) as e:
-            print(f"LOG: WARNING: Failed to process item click for ID {item_id_str}: {e}")
 
+    def on_follow_playhead_toggled(self, checked):
+        """Starts or stops selecting the subtitle under Resolve's playhead."""
+        self._last_playhead_frame = None
+        self.follow_interval = FOLLOW_MIN_INTERVAL_MS
+        if checked:
+            self.follow_timer.start(0)
+        else:
+            self.follow_timer.stop()
 
-    def on_item_double_clicked(self, item, column):
-        if column == 1: # Only allow editing the 'Subtitle' column
-            self.window.tree.editItem(item, column)
+    def on_follow_tick(self):
+        """
+        Polls the playhead (one Resolve call) and selects the subtitle under it. The
+        poll interval backs off while the playhead is idle.
+        """
+        frame, error = self.resolve_integration.get_playhead_frame()
+        if error or frame == self._last_playhead_frame:
+            if error:
+                logger.debug("Playhead poll failed: %s", error)
+            self.follow_interval = min(self.follow_interval * 2, FOLLOW_MAX_INTERVAL_MS)
+        else:
+            self.follow_interval = FOLLOW_MIN_INTERVAL_MS
+            self._last_playhead_frame = frame
+            row = self.subtitle_manager.get_time_index().row_at(frame)
+            if row is not None:
+                # Selecting the row must not seek the playhead back to its start.
+                self._following = True
+                try:
+                    self.window.select_source_row(row)
+                finally:
+                    self._following = False
+        self.follow_timer.start(self.follow_interval)
+
+    def on_item_double_clicked(self, index):
+        if index.column() == 2: # Only allow editing the 'Subtitle' column
+            self.window.tree.edit(index)
 
     def on_subtitle_data_changed(self, item_index, new_text):
         """
@@ -162,28 +265,74 @@ class ApplicationController:
         try:
             # The subtitle_manager should be updated with the clean text
             if self.subtitle_manager.update_subtitle_text(item_index, new_text):
-                print(f"LOG: INFO: Updated subtitle {item_index} in data and file with clean text.")
+                logger.info("Updated subtitle %s in data and file with clean text.", item_index)
             else:
-                print(f"LOG: ERROR: Failed to update subtitle {item_index} with clean text.")
+                logger.error("Failed to update subtitle %s with clean text.", item_index)
 
         except Exception as e:
-            print(f"LOG: ERROR: An unexpected error occurred while updating subtitle: {e}")
+            logger.error("An unexpected error occurred while updating subtitle: %s", e)
  
+    def on_subtitle_timing_edited(self, item_index, key, time_text):
+        """Applies an edited In/Out cell through the retime engine, or explains why it cannot."""
+        row, error = self.app_service.set_subtitle_time(item_index, key, time_text)
+        if error:
+            self.show_error_message(error, "时间调整失败")
+            return
+        self.window.refresh_timing(row)
+
+    def on_shift_clicked(self, ripple=False):
+        """Shifts the whole track, or with `ripple` the current row and everything after it."""
+        first_row = 0
+        if ripple:
+            current_index = self.window.tree.currentIndex()
+            if not current_index.isValid():
+                self.show_error_message("请先选择一条字幕。", "时间调整")
+                return
+            first_row = self.window.proxy_model.mapToSource(current_index).row()
+        count, error = self.app_service.shift_subtitles(self.window.inspector.shift_offset_text.text(), first_row)
+        self._finish_retime(count, error)
+
+    def on_conform_clicked(self):
+        """Retimes the track for the frame-rate conversion selected in the inspector."""
+        from_rate, to_rate = self.window.inspector.conform_combo.currentData()
+        self._finish_retime(*self.app_service.conform_subtitles(from_rate, to_rate))
+
+    def on_snap_clicked(self):
+        self._finish_retime(*self.app_service.snap_subtitles())
+
+    def _finish_retime(self, count, error):
+        if error:
+            self.show_error_message(error, "时间调整失败")
+            return
+        if count:
+            self.window.refresh_timing()
+        logger.info("Retimed %d subtitles.", count)
+
     def on_find_next_clicked(self):
         """Handles the 'Find Next' button click."""
         self.window.find_next()
 
+    def on_find_previous_clicked(self):
+        """Handles the 'Find Previous' button click."""
+        self.window.find_previous()
+
     def handle_replace_current(self):
         """Handles replacing the text of a single subtitle item."""
-        current_item = self.window.tree.currentItem()
-        if not current_item:
+        current_index = self.window.tree.currentIndex()
+        if not current_index.isValid():
             return
 
-        item_index = int(current_item.text(0))
+        item_index = int(current_index.siblingAtColumn(0).data())
         find_text = self.window.inspector.find_text.text()
         replace_text = self.window.inspector.replace_text.text()
 
-        change = self.app_service.replace_current_subtitle(item_index, find_text, replace_text)
+        try:
+            change = self.app_service.replace_current_subtitle(
+                item_index, find_text, replace_text, **self.window.current_find_options()._asdict()
+            )
+        except PatternError as e:
+            self.show_error_message(str(e), "替换失败")
+            return
 
         if change:
             self.window.update_item_for_replace(change['index'], change['old'], change['new'])
@@ -194,13 +343,96 @@ class ApplicationController:
         find_text = self.window.inspector.find_text.text()
         replace_text = self.window.inspector.replace_text.text()
 
-        changes = self.app_service.replace_all_subtitles(find_text, replace_text)
+        try:
+            changes = self.app_service.replace_all_subtitles(
+                find_text, replace_text, **self.window.current_find_options()._asdict()
+            )
+        except PatternError as e:
+            self.show_error_message(str(e), "替换失败")
+            return
 
         if changes:
             self.window.update_all_items_for_replace(changes)
             self.window.inspector.find_text.clear()
             self.window.inspector.replace_text.clear()
 
+    def on_apply_glossary_clicked(self):
+        """Applies a glossary rules file to the current track."""
+        changes, error = self.app_service.apply_glossary_file(self.window)
+        if error:
+            if error != "No file selected.":
+                self.show_error_message(error, "术语表替换失败")
+            return
+
+        if changes:
+            self.window.update_all_items_for_replace(changes)
+
+    def on_timing_check_clicked(self):
+        """Shows the overlap and short-gap report of the current track."""
+        report, error = self.app_service.check_timing()
+        if error:
+            self.show_error_message(error, "时间轴检查")
+            return
+        QMessageBox.information(self.window, "时间轴检查", report)
+
+    def on_lint_clicked(self):
+        """Runs the selected lint profile, colors the offending rows and shows a summary."""
+        profile_name = self.window.inspector.lint_profile_combo.currentData()
+        # The line-length rule uses the limit the length column shows.
+        report, error = self.app_service.lint_current_track(profile_name, self.window.char_count_delegate.char_limit)
+        if error:
+            self.show_error_message(error, "字幕规范检查")
+            return
+        result, summary = report
+        self.window.set_lint_flags(result.flags)
+        QMessageBox.information(self.window, "字幕规范检查", summary)
+
+    def on_align_clicked(self):
+        """Shows the current track side by side with the track selected for alignment."""
+        secondary_index = self.window.inspector.align_track_combo.currentData()
+        alignment, error = self.app_service.align_tracks(self.subtitle_manager.current_track_index, secondary_index)
+        if error:
+            self.show_error_message(error, "双语对齐")
+            return
+        dialog = AlignmentDialog(*alignment, f"双语对齐 - ST {secondary_index}", self.window)
+        dialog.export_button.clicked.connect(lambda: self.on_export_bilingual_clicked(dialog, alignment))
+        dialog.exec()
+
+    def on_search_all_tracks_clicked(self):
+        """Lists the matches of the filter text in every fetched track."""
+        query = self.window.inspector.search_text.text()
+        filter_type = self.window.inspector.search_type_combo.currentText()
+        results, error = self.app_service.search_all_tracks(query, filter_type)
+        if error:
+            self.show_error_message(error, "搜索全部轨道")
+            return
+        dialog = TrackSearchDialog(results, f"搜索全部轨道 - {query}", self.window)
+        dialog.table.doubleClicked.connect(
+            lambda index: self.on_track_search_result_activated(dialog, results[index.row()])
+        )
+        dialog.exec()
+
+    def on_track_search_result_activated(self, dialog, result):
+        """Switches to the result's track and selects its subtitle."""
+        track_index, subtitle = result
+        if track_index != self.subtitle_manager.current_track_index:
+            if track_index == 0:
+                self.show_error_message("导入的SRT文件已不是当前轨道，无法跳转。", "搜索全部轨道")
+                return
+            self.window.inspector.track_combo.setCurrentIndex(track_index - 1)
+            if track_index != self.subtitle_manager.current_track_index:
+                return  # The switch failed and has already been reported
+        dialog.accept()
+        self.window.select_source_row(self.window.model.row_for_id(subtitle['index']))
+
+    def on_export_bilingual_clicked(self, parent, alignment):
+        file_path, error = self.app_service.export_bilingual_srt(parent, alignment)
+        if error:
+            if error != "No file selected.":
+                self.show_error_message(error, "导出失败")
+            return
+        QMessageBox.information(parent, "成功", f"双语字幕已导出到 {file_path}")
+
     def on_import_srt_clicked(self):
         if self.subtitle_manager.is_dirty:
             reply = QMessageBox.question(self.window, '未同步的修改',
@@ -215,6 +447,7 @@ class ApplicationController:
             return
         
         self.window.populate_table(subs_data=subtitles)
+        self.window.set_search_index(self.subtitle_manager.search_index, self.subtitle_manager.current_track_index)
         self.window.filter_tree()
         QMessageBox.information(self.window, "成功", "SRT文件已成功导入。")
 
@@ -225,6 +458,7 @@ class ApplicationController:
 
 def main():
     """Main function to run the application."""
+    configure_logging()
     try:
         resolve_integration = ResolveIntegration()
         subtitle_manager = SubtitleManager(resolve_integration)
@@ -234,7 +468,7 @@ def main():
         )
         controller.run()
     except ImportError as e:
-        print(f"LOG: CRITICAL: Error initializing application: {e}")
+        logger.critical("Error initializing application: %s", e)
         # Optionally, show a GUI message box here
         sys.exit(1)
 
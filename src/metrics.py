@@ -0,0 +1,152 @@
+# metrics.py
+"""
+A lightweight in-process metrics registry.
+
+Counters count events (cache hits, misses, ...) and histograms record latencies in
+milliseconds using fixed buckets, so recording a sample is O(log buckets) with no
+allocation. A snapshot of everything can be dumped to JSON, e.g. on application exit
+when the SUBVIGATOR_METRICS environment variable points to a file.
+"""
+import bisect
+import functools
+import json
+import threading
+import time
+from contextlib import contextmanager
+
+METRICS_ENV_VAR = "SUBVIGATOR_METRICS"
+
+# Upper bounds of the latency buckets in milliseconds; the last bucket is unbounded.
+LATENCY_BUCKETS_MS = (0.1, 0.25, 0.5, 1, 2.5, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+
+
+class Histogram:
+    """Fixed-bucket latency histogram with count, sum, min and max."""
+    __slots__ = ('buckets', 'count', 'total', 'min', 'max')
+
+    def __init__(self):
+        self.buckets = [0] * (len(LATENCY_BUCKETS_MS) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.min = None
+        self.max = None
+
+    def observe(self, value_ms: float):
+        self.buckets[bisect.bisect_left(LATENCY_BUCKETS_MS, value_ms)] += 1
+        self.count += 1
+        self.total += value_ms
+        if self.min is None or value_ms < self.min:
+            self.min = value_ms
+        if self.max is None or value_ms > self.max:
+            self.max = value_ms
+
+    def quantile(self, q: float) -> float:
+        """Estimates a quantile as the upper bound of the bucket it falls into."""
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for i, n in enumerate(self.buckets):
+            seen += n
+            if seen >= rank:
+                return LATENCY_BUCKETS_MS[i] if i < len(LATENCY_BUCKETS_MS) else self.max
+        return self.max
+
+    def to_dict(self) -> dict:
+        return {
+            'count': self.count,
+            'total_ms': round(self.total, 3),
+            'mean_ms': round(self.total / self.count, 3) if self.count else 0.0,
+            'min_ms': round(self.min, 3) if self.min is not None else None,
+            'max_ms': round(self.max, 3) if self.max is not None else None,
+            'p50_ms': self.quantile(0.5),
+            'p95_ms': self.quantile(0.95),
+            'buckets': {
+                (f"<={bound}" if i < len(LATENCY_BUCKETS_MS) else f">{LATENCY_BUCKETS_MS[-1]}"): n
+                for i, (bound, n) in enumerate(zip(LATENCY_BUCKETS_MS + (None,), self.buckets))
+                if n
+            },
+        }
+
+
+class MetricsRegistry:
+    """Thread-safe collection of named counters and latency histograms."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.counters = {}
+        self.histograms = {}
+
+    def incr(self, name: str, amount: int = 1):
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + amount
+
+    def observe(self, name: str, value_ms: float):
+        with self._lock:
+            histogram = self.histograms.get(name)
+            if histogram is None:
+                histogram = self.histograms[name] = Histogram()
+            histogram.observe(value_ms)
+
+    @contextmanager
+    def timer(self, name: str):
+        """Records the duration of the block in the histogram `name`, and counts errors."""
+        start = time.perf_counter()
+        try:
+            yield
+        except BaseException:
+            self.incr(f"{name}.errors")
+            raise
+        finally:
+            self.observe(name, (time.perf_counter() - start) * 1000.0)
+
+    def timed(self, name: str = None):
+        """Decorator form of `timer`; the histogram name defaults to the function's qualname."""
+        def decorator(func):
+            metric_name = name or func.__qualname__
+
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                start = time.perf_counter()
+                try:
+                    return func(*args, **kwargs)
+                except BaseException:
+                    self.incr(f"{metric_name}.errors")
+                    raise
+                finally:
+                    self.observe(metric_name, (time.perf_counter() - start) * 1000.0)
+            return wrapper
+        return decorator
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {
+                'timestamp': time.time(),
+                'counters': dict(sorted(self.counters.items())),
+                'histograms': {name: h.to_dict() for name, h in sorted(self.histograms.items())},
+            }
+
+    def dump_json(self, path: str):
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(self.snapshot(), f, ensure_ascii=False, indent=2)
+
+    def format_report(self) -> str:
+        """Returns a plain-text table of all metrics, for the debug panel or the log."""
+        snap = self.snapshot()
+        lines = []
+        for name, h in snap['histograms'].items():
+            lines.append(
+                f"{name}: n={h['count']} mean={h['mean_ms']}ms p95<={h['p95_ms']}ms max={h['max_ms']}ms"
+            )
+        for name, value in snap['counters'].items():
+            lines.append(f"{name}: {value}")
+        return "\n".join(lines)
+
+    def reset(self):
+        with self._lock:
+            self.counters.clear()
+            self.histograms.clear()
+
+
+metrics = MetricsRegistry()
+timed = metrics.timed
@@ -4,8 +4,12 @@ import tempfile
 import os
 import sys
 import platform
-from src.timecode_utils import TimecodeUtils
+from src.timecode_utils import TimecodeUtils, Timebase
 from src.format_converter import convert_json_to_srt, format_subtitles_to_srt
+from src.log_utils import get_logger
+from src.metrics import timed
+
+logger = get_logger("resolve_integration")
 
 class ResolveIntegration:
     def __init__(self):
@@ -13,15 +17,16 @@ class ResolveIntegration:
         self.project_manager = None
         self.project = None
         self.timeline = None
+        self._timebase = None  # Cached by get_timebase()
         if self.resolve:
-            print("LOG: INFO: DaVinci Resolve instance found. Initializing integration.")
+            logger.info("DaVinci Resolve instance found. Initializing integration.")
             self.initialized = True
             self.project_manager = self.resolve.GetProjectManager()
             self.project = self.project_manager.GetCurrentProject()
             self.timeline = self.project.GetCurrentTimeline()
         else:
             self.initialized = False
-            print("LOG: INFO: DaVinci Resolve instance not found. Running in offline mode.")
+            logger.info("DaVinci Resolve instance not found. Running in offline mode.")
 
     def _get_resolve_bmd(self):
         """
@@ -35,7 +40,7 @@ class ResolveIntegration:
             script_module_path = "/opt/resolve/libs/Fusion/Modules/"
 
         if not os.path.exists(script_module_path):
-            print(f"LOG: ERROR: Resolve scripting module path not found: {script_module_path}")
+            logger.error("Resolve scripting module path not found: %s", script_module_path)
             return None
 
         sys.path.append(script_module_path)
@@ -43,7 +48,7 @@ class ResolveIntegration:
             import DaVinciResolveScript as bmd
             return bmd.scriptapp("Resolve")
         except ImportError:
-            print("LOG: ERROR: Failed to import DaVinciResolveScript module.")
+            logger.error("Failed to import DaVinciResolveScript module.")
             return None
 
     def get_resolve(self):
@@ -58,11 +63,12 @@ class ResolveIntegration:
         # Fallback for internal/legacy environments
         try:
             import fusionscript
-            print("LOG: INFO: Falling back to fusionscript.")
+            logger.info("Falling back to fusionscript.")
             return fusionscript.scriptapp("Resolve")
         except ImportError:
             return None
 
+    @timed("resolve.get_current_timeline_info")
     def get_current_timeline_info(self):
         """
         Safely retrieves timeline information.
@@ -72,6 +78,7 @@ class ResolveIntegration:
         """
         if not self.timeline:
             return None, "No active timeline."
+        self._timebase = None  # Settings may have changed; re-read on the next seek
         try:
             info = {
                 'frame_rate': self.timeline.GetSetting('timelineFrameRate'),
@@ -81,6 +88,65 @@ class ResolveIntegration:
         except Exception as e:
             return None, f"Failed to get timeline info: {e}"
 
+    def get_timebase(self):
+        """
+        The timeline's frame rate and drop-frame flag, read from Resolve once and
+        cached. Returns None if there is no timeline or it cannot be read.
+        """
+        if self._timebase is None and self.timeline:
+            try:
+                frame_rate = float(self.timeline.GetSetting('timelineFrameRate'))
+                drop_frame = str(self.timeline.GetSetting('timelineDropFrameTimecode')) == '1'
+                self._timebase = Timebase(frame_rate, drop_frame)
+            except Exception as e:
+                logger.warning("Failed to read the timeline timebase: %s", e)
+        return self._timebase
+
+    def get_start_frame(self):
+        """The timeline's first frame (86400 for a 01:00:00:00 start at 24 fps), or 0 if it cannot be read."""
+        if self.timeline:
+            try:
+                return int(self.timeline.GetStartFrame())
+            except Exception as e:
+                logger.warning("Failed to read the timeline start frame: %s", e)
+        return 0
+
+    def seek_to_frame(self, frame):
+        """
+        Moves the playhead to an absolute timeline frame. The timecode string is
+        built from the cached timebase, so this is a single Resolve API call.
+
+        Returns:
+            tuple: (True, None) on success, (False, str) on failure.
+        """
+        timebase = self.get_timebase()
+        if timebase is None:
+            return False, "No active timeline."
+        try:
+            timecode = TimecodeUtils.smpte_from_frame(frame, timebase)
+            if not self.timeline.SetCurrentTimecode(timecode):
+                return False, f"Resolve rejected timecode {timecode}."
+            return True, None
+        except Exception as e:
+            return False, f"Failed to seek to frame {frame}: {e}"
+
+    def get_playhead_frame(self):
+        """
+        The playhead position as an absolute timeline frame, with a single Resolve
+        API call (GetCurrentTimecode).
+
+        Returns:
+            tuple: (int, None) on success, (None, str) on failure.
+        """
+        timebase = self.get_timebase()
+        if timebase is None:
+            return None, "No active timeline."
+        try:
+            return TimecodeUtils.frame_from_smpte(self.timeline.GetCurrentTimecode(), timebase), None
+        except Exception as e:
+            return None, f"Failed to read the playhead position: {e}"
+
+    @timed("resolve.get_subtitles")
     def get_subtitles(self, track_number=1):
         """
         Safely retrieves subtitles from a specific track.
@@ -95,6 +161,8 @@ class ResolveIntegration:
             return subtitles, None
         except Exception as e:
             return None, f"Failed to get subtitles for track {track_number}: {e}"
+
+    @timed("resolve.get_subtitles_with_timecode")
     def get_subtitles_with_timecode(self, track_number=1):
         """
         Safely retrieves subtitles with their timecode information.
@@ -133,6 +201,7 @@ class ResolveIntegration:
         except Exception as e:
             return None, f"Failed to get subtitles with timecode: {e}"
 
+    @timed("resolve.set_active_subtitle_track")
     def set_active_subtitle_track(self, track_index: int):
         """
         Safely sets the active subtitle track.
@@ -154,10 +223,12 @@ class ResolveIntegration:
             return True, None
         except Exception as e:
             return None, f"Failed to set active subtitle track: {e}"
+
+    @timed("resolve.export_subtitles_to_json")
     def export_subtitles_to_json(self, track_number=1):
         subtitles, error = self.get_subtitles_with_timecode(track_number)
         if error:
-            print(f"LOG: ERROR: Could not export subtitles to JSON due to: {error}")
+            logger.error("Could not export subtitles to JSON due to: %s", error)
             return None
         if not subtitles:
             return []
@@ -172,13 +243,14 @@ class ResolveIntegration:
             })
         return output_data
 
+    @timed("resolve.export_subtitles_to_srt")
     def export_subtitles_to_srt(self, track_number=1, zero_based=False):
         if not self.timeline:
             return None
 
         subtitles_with_tc, error = self.get_subtitles_with_timecode(track_number)
         if error:
-            print(f"LOG: ERROR: Could not export to SRT, failed to get subtitles: {error}")
+            logger.error("Could not export to SRT, failed to get subtitles: %s", error)
             return None
         if not subtitles_with_tc:
             return ""
@@ -212,6 +284,7 @@ class ResolveIntegration:
         srt_content = format_subtitles_to_srt(subs_for_conversion, frame_rate, offset_frames)
         return srt_content
 
+    @timed("resolve.reimport_from_json_file")
     def reimport_from_json_file(self, json_path):
         """
         Re-imports subtitles from a JSON file onto a new, isolated
@@ -263,7 +336,7 @@ class ResolveIntegration:
                         self.timeline.SetTrackEnable("subtitle", i, True)
                     return None, "Failed to append clip to the timeline."
 
-                print("LOG: SUCCESS: Subtitles re-imported and placed correctly on a new, isolated track.")
+                logger.info("Subtitles re-imported and placed correctly on a new, isolated track.")
                 return True, None
             finally:
                 if os.path.exists(srt_file_path):
@@ -0,0 +1,169 @@
+# retime.py
+"""
+Track-wide timing operations: shift, ripple shift, scale (frame-rate conform)
+and snap to frame boundaries.
+
+Every operation is one pass over the 'in_frame'/'out_frame' columns of a
+`SubtitleTrack`, after which the 'start'/'end' times of the touched rows are
+rewritten from their new frames. All arithmetic is on integers and exact
+fractions, so a conform by 25/(24000/1001) or a round trip through the table's
+'HH:MM:SS,mmm' times never drifts by a frame, however long the track is. Rows
+without frames (no timeline frame rate was known when they were loaded) are left
+alone.
+
+Frames and times are converted with the timeline rate as Resolve reports it
+(23.976 is 2997/125), like TimecodeUtils, so times written here convert back to
+the same frames on reload. Conform factors use the exact NTSC rates instead.
+"""
+import re
+from fractions import Fraction
+
+from .timecode_utils import TimecodeUtils
+
+# Nominal NTSC rates and their exact values.
+NTSC_RATES = {
+    23.976: Fraction(24000, 1001),
+    29.97: Fraction(30000, 1001),
+    47.952: Fraction(48000, 1001),
+    59.94: Fraction(60000, 1001),
+    119.88: Fraction(120000, 1001),
+}
+
+# Frame-rate conversions offered in the inspector, as (label, from rate, to rate).
+CONFORM_PRESETS = (
+    ("25 → 23.976", 25, 23.976),
+    ("23.976 → 25", 23.976, 25),
+    ("24 → 25", 24, 25),
+    ("25 → 24", 25, 24),
+    ("24 → 23.976", 24, 23.976),
+    ("23.976 → 24", 23.976, 24),
+)
+
+_FRAME_OFFSET_RE = re.compile(r'([+-]?)\s*(\d+)', re.ASCII)
+
+
+class RetimeError(ValueError):
+    """Raised for a timing change that cannot be applied (e.g. before the timeline start)."""
+
+
+def timeline_rate(frame_rate) -> Fraction:
+    """The timeline frame rate as a fraction, as Resolve reports it (23.976 is 2997/125)."""
+    return Fraction(str(frame_rate)).limit_denominator(1001)
+
+
+def exact_rate(frame_rate) -> Fraction:
+    """The exact rate of a nominal frame rate: 23.976 is 24000/1001."""
+    return NTSC_RATES.get(round(float(frame_rate), 3), timeline_rate(frame_rate))
+
+
+def conform_factor(from_rate, to_rate) -> Fraction:
+    """
+    Time scale factor for media made at `from_rate` and played at `to_rate`
+    (e.g. 25 → 23.976 lengthens every time by 25 / (24000/1001)).
+    """
+    return exact_rate(from_rate) / exact_rate(to_rate)
+
+
+def parse_offset(text: str, timebase) -> int:
+    """
+    A shift typed by the user, in frames: a signed frame count ('-12') or a
+    signed time ('+00:00:01,500' or '-00:00:01:12'). Raises ValueError.
+    """
+    text = text.strip()
+    match = _FRAME_OFFSET_RE.fullmatch(text)
+    if match:
+        sign, frames = match[1], int(match[2])
+    else:
+        sign = text[:1] if text[:1] in ('+', '-') else ''
+        frames = TimecodeUtils.frame_from_time_input(text[len(sign):], timebase)
+    return -frames if sign == '-' else frames
+
+
+def _round_ratio(numerator, denominator):
+    """numerator / denominator rounded to the nearest integer, halves up (denominator > 0)."""
+    return (2 * numerator + denominator) // (2 * denominator)
+
+
+def frames_to_ms(frames, rate: Fraction):
+    """Milliseconds of each frame in `frames` at `rate`, exactly rounded (halves up)."""
+    # _round_ratio(frame * 1000 / rate), with the constants folded.
+    numerator, denominator = 2000 * rate.denominator, rate.numerator
+    divisor = 2 * denominator
+    return [(frame * numerator + denominator) // divisor for frame in frames]
+
+
+def _write(track, rows, in_frames, out_frames, rate, start_frame=0):
+    """
+    Stores new frames for `rows` and rewrites their times. Returns the number of
+    rows. Raises RetimeError, changing nothing, if one would start before `start_frame`.
+    """
+    if in_frames and min(in_frames) < start_frame:
+        raise RetimeError("调整后的字幕早于时间线起点")
+    track.set_timing(rows, in_frames, out_frames, frames_to_ms(in_frames, rate), frames_to_ms(out_frames, rate))
+    return len(rows)
+
+
+def shift(track, frames: int, frame_rate, first_row=0, start_frame=0):
+    """
+    Moves every timed subtitle from `first_row` on (a ripple edit when it is not 0)
+    by `frames`. Returns the number of retimed rows. Raises RetimeError if a
+    subtitle would start before `start_frame`, the timeline's first frame.
+    """
+    rows = track.timed_rows(first_row)
+    in_frames = [frame + frames for frame in track.column_values(track.in_frames, rows)]
+    out_frames = [frame + frames for frame in track.column_values(track.out_frames, rows)]
+    return _write(track, rows, in_frames, out_frames, timeline_rate(frame_rate), start_frame)
+
+
+def scale(track, factor, frame_rate, origin=0, start_frame=0):
+    """
+    Scales the time of every timed subtitle from `origin` (a frame) by `factor`, as
+    for a conform (see conform_factor). Subtitles keep at least one frame.
+    Returns the number of retimed rows. Raises RetimeError if a subtitle would
+    start before `start_frame`.
+    """
+    factor = Fraction(factor)
+    if factor <= 0:
+        raise RetimeError("缩放比例必须大于 0")
+    # origin + _round_ratio((frame - origin) * factor), with the constants folded.
+    numerator, divisor = 2 * factor.numerator, 2 * factor.denominator
+    offset = factor.denominator - origin * numerator + origin * divisor
+    rows = track.timed_rows()
+    in_frames = [(frame * numerator + offset) // divisor for frame in track.column_values(track.in_frames, rows)]
+    out_frames = [
+        max((frame * numerator + offset) // divisor, start + 1)
+        for frame, start in zip(track.column_values(track.out_frames, rows), in_frames)
+    ]
+    return _write(track, rows, in_frames, out_frames, timeline_rate(frame_rate), start_frame)
+
+
+def snap(track, frame_rate):
+    """
+    Rewrites the times of every timed subtitle to fall exactly on its frames.
+    Returns the number of rows whose times changed.
+    """
+    rate = timeline_rate(frame_rate)
+    rows = track.timed_rows()
+    in_frames, out_frames = track.column_values(track.in_frames, rows), track.column_values(track.out_frames, rows)
+    start_ms, end_ms = frames_to_ms(in_frames, rate), frames_to_ms(out_frames, rate)
+    old_start_ms, old_end_ms = track.column_values(track.start_ms, rows), track.column_values(track.end_ms, rows)
+    changed = [
+        position for position, (start, end, old_start, old_end)
+        in enumerate(zip(start_ms, end_ms, old_start_ms, old_end_ms))
+        if start != old_start or end != old_end
+    ]
+    track.set_timing([rows[i] for i in changed], [in_frames[i] for i in changed], [out_frames[i] for i in changed],
+                     [start_ms[i] for i in changed], [end_ms[i] for i in changed])
+    return len(changed)
+
+
+def set_row_frames(track, row, in_frame, out_frame, frame_rate, start_frame=0):
+    """
+    Sets one subtitle's frames, as when its In or Out cell is edited. Raises
+    RetimeError if it would start before `start_frame` or end before it starts.
+    """
+    if in_frame < start_frame:
+        raise RetimeError("入点不能早于时间线起点")
+    if out_frame <= in_frame:
+        raise RetimeError("出点必须晚于入点")
+    return _write(track, [row], [in_frame], [out_frame], timeline_rate(frame_rate))
@@ -0,0 +1,175 @@
+# search_index.py
+"""
+Trigram inverted index over subtitle text, for substring search without scanning
+every row.
+
+Each track is indexed separately; a row is identified by its position in the
+track's subtitle list. Text is casefolded, and every trigram of it maps to the set
+of rows containing it. A query of three or more characters is answered by
+intersecting the posting lists of its trigrams, which yields a small superset of
+the matching rows; callers verify only those.
+
+Chinese and Japanese subtitles are mostly searched with one- or two-character
+words, which trigrams cannot answer, so CJK characters are also indexed as
+unigrams and as bigrams with their neighbours. Short non-CJK queries cannot be
+narrowed and return None ("scan everything").
+
+Postings for a track are built on its first query, so loading a track does not
+pay for indexing it.
+"""
+import re
+
+from .metrics import metrics
+from .utils import FILTER_TYPE_ALIASES
+
+# Unicode blocks treated as CJK: kana, CJK punctuation, unified ideographs and
+# extension A, Hangul syllables, compatibility ideographs and full-width forms.
+CJK_RANGES = (
+    (0x3000, 0x30FF),
+    (0x3400, 0x4DBF),
+    (0x4E00, 0x9FFF),
+    (0xAC00, 0xD7AF),
+    (0xF900, 0xFAFF),
+    (0xFF00, 0xFFEF),
+)
+
+_CJK_RE = re.compile('[' + ''.join(f'\\u{low:04x}-\\u{high:04x}' for low, high in CJK_RANGES) + ']')
+
+
+def is_cjk(ch: str) -> bool:
+    return _CJK_RE.match(ch) is not None
+
+
+def text_grams(folded: str) -> set:
+    """All grams indexed for a casefolded text."""
+    grams = {folded[i:i + 3] for i in range(len(folded) - 2)}
+    for match in _CJK_RE.finditer(folded):
+        i = match.start()
+        grams.add(folded[i])
+        if i > 0:
+            grams.add(folded[i - 1:i + 1])
+        if i + 1 < len(folded):
+            grams.add(folded[i:i + 2])
+    return grams
+
+
+def query_grams(folded: str):
+    """The grams a casefolded query must contain, or None if the index cannot narrow it."""
+    if len(folded) >= 3:
+        return {folded[i:i + 3] for i in range(len(folded) - 2)}
+    if folded and any(is_cjk(ch) for ch in folded):
+        return {folded}
+    return None
+
+
+class _TrackIndex:
+    __slots__ = ('folded', 'postings')
+
+    def __init__(self, texts):
+        self.folded = [text.casefold() for text in texts]
+        self.postings = None  # gram -> set of rows, built on first query
+
+    def build(self):
+        postings = {}
+        for row, folded in enumerate(self.folded):
+            for gram in text_grams(folded):
+                rows = postings.get(gram)
+                if rows is None:
+                    postings[gram] = {row}
+                else:
+                    rows.add(row)
+        self.postings = postings
+
+
+class SubtitleSearchIndex:
+    """Per-track trigram index, kept up to date by SubtitleManager."""
+
+    def __init__(self):
+        self._tracks = {}
+
+    def tracks(self):
+        return sorted(self._tracks)
+
+    def index_track(self, track, texts):
+        """(Re)indexes a whole track from its subtitle texts, in row order."""
+        self._tracks[track] = _TrackIndex(texts)
+
+    def drop_track(self, track):
+        self._tracks.pop(track, None)
+
+    def update(self, track, row, text):
+        """Re-indexes a single row after an edit or replace."""
+        index = self._tracks.get(track)
+        if index is None or not 0 <= row < len(index.folded):
+            return
+        old_folded, new_folded = index.folded[row], text.casefold()
+        if old_folded == new_folded:
+            return
+        index.folded[row] = new_folded
+        if index.postings is None:
+            return
+        old_grams, new_grams = text_grams(old_folded), text_grams(new_folded)
+        for gram in old_grams - new_grams:
+            rows = index.postings.get(gram)
+            if rows is not None:
+                rows.discard(row)
+                if not rows:
+                    del index.postings[gram]
+        for gram in new_grams - old_grams:
+            index.postings.setdefault(gram, set()).add(row)
+
+    def _postings(self, track):
+        index = self._tracks.get(track)
+        if index is None:
+            return None
+        if index.postings is None:
+            with metrics.timer("search_index.build"):
+                index.build()
+        return index.postings
+
+    def candidates(self, track, query):
+        """
+        Sorted rows of `track` that may contain `query` (case-insensitively), or None
+        if the track is not indexed or the query is too short to narrow.
+        """
+        grams = query_grams(query.casefold())
+        if grams is None:
+            return None
+        postings = self._postings(track)
+        if postings is None:
+            return None
+        posting_lists = sorted((postings.get(gram, ()) for gram in grams), key=len)
+        rows = set(posting_lists[0])
+        for posting in posting_lists[1:]:
+            if not rows:
+                break
+            rows &= posting
+        return sorted(rows)
+
+    def search(self, query, filter_type='Contains', tracks=None):
+        """
+        Verified case-insensitive matches as sorted (track, row) pairs, for the
+        Contains, Starts With and Ends With modes. Searches every indexed track
+        unless `tracks` is given.
+        """
+        filter_type = FILTER_TYPE_ALIASES.get(filter_type, filter_type)
+        if filter_type not in ('Contains', 'Starts With', 'Ends With'):
+            raise ValueError(f"Unsupported filter type for indexed search: {filter_type}")
+        folded_query = query.casefold()
+        if filter_type == 'Starts With':
+            verify = lambda folded: folded.startswith(folded_query)
+        elif filter_type == 'Ends With':
+            verify = lambda folded: folded.endswith(folded_query)
+        else:
+            verify = lambda folded: folded_query in folded
+
+        results = []
+        for track in (self.tracks() if tracks is None else tracks):
+            index = self._tracks.get(track)
+            if index is None:
+                continue
+            rows = self.candidates(track, query)
+            if rows is None:
+                rows = range(len(index.folded))
+            results.extend((track, row) for row in rows if verify(index.folded[row]))
+        return results
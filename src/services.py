@@ -1,13 +1,33 @@
+import json
+
 from .resolve_integration import ResolveIntegration
 from .subtitle_manager import SubtitleManager
+from .log_utils import get_logger, traced, tracer
+from .metrics import metrics, timed
+from .glossary import GlossaryError, load_glossary_rules
+from .time_index import DEFAULT_MIN_GAP_FRAMES
+from .subtitle_table_model import subtitle_id
+from .lint import PROFILES, RULE_LABELS
+from .utils import DEFAULT_CHAR_LIMIT
+from .retime import RetimeError, conform_factor, parse_offset
+from .aligner import bilingual_srt
+from .track_diff import diff_tracks
+from .timecode_utils import TimecodeUtils
 from PySide6.QtWidgets import QFileDialog
 
+logger = get_logger("services")
+
+# The timing report lists at most this many issues; the rest are only counted.
+TIMING_REPORT_MAX_ISSUES = 200
+
 
 class AppService:
     def __init__(self, resolve_integration: ResolveIntegration, subtitle_manager: SubtitleManager):
         self.resolve_integration = resolve_integration
         self.subtitle_manager = subtitle_manager
 
+    @traced()
+    @timed("service.export_and_reimport_subtitles")
     def export_and_reimport_subtitles(self):
         """
         Handles the core logic for exporting and re-importing subtitles.
@@ -18,12 +38,12 @@ class AppService:
 
         # Performance: Save any pending changes before re-importing
         if self.subtitle_manager.is_dirty:
-            print("LOG: INFO: Saving dirty changes before export...")
+            logger.info("Saving dirty changes before export...")
             self.subtitle_manager._save_changes_to_json()
 
-        print(f"LOG: INFO: Starting export and re-import process from service for {self.subtitle_manager.current_json_path}")
+        logger.info("Starting export and re-import process from service for %s", self.subtitle_manager.current_json_path)
         success, error = self.resolve_integration.reimport_from_json_file(
-            self.subtitle_manager.current_json_path
+            self.subtitle_manager.json_export_path()
         )
         if error:
             return False, f"导入/导出失败: {error}"
@@ -31,6 +51,8 @@ class AppService:
         self.subtitle_manager.is_dirty = False
         return True, "字幕已成功导入到新的轨道。"
 
+    @traced()
+    @timed("service.change_active_track")
     def change_active_track(self, track_index):
         """
         Handles the logic for changing the active subtitle track.
@@ -38,7 +60,7 @@ class AppService:
         """
         # Performance: Save changes on the current track before switching
         if self.subtitle_manager.is_dirty:
-            print(f"LOG: INFO: Saving dirty changes for track {self.subtitle_manager.current_track_index} before switching.")
+            logger.info("Saving dirty changes for track %s before switching.", self.subtitle_manager.current_track_index)
             self.subtitle_manager._save_changes_to_json()
             self.subtitle_manager.is_dirty = False # Reset dirty flag after saving
 
@@ -49,6 +71,8 @@ class AppService:
         subtitles = self.subtitle_manager.load_subtitles(track_index)
         return subtitles, None
 
+    @traced()
+    @timed("service.refresh_timeline_info")
     def refresh_timeline_info(self):
         """
         Refreshes timeline information from Resolve.
@@ -61,38 +85,289 @@ class AppService:
             return None, "未能获取时间线信息，请确保DaVinci Resolve中已打开项目和时间线。"
         return timeline_info, None
 
-    def replace_current_subtitle(self, item_index, find_text, replace_text):
+    @traced()
+    @timed("service.replace_current_subtitle")
+    def replace_current_subtitle(self, item_index, find_text, replace_text, **options):
         """
         Handles replacing the text of a single subtitle item.
+        `options` are the find flags (regex, ignore_case, whole_word).
         Returns the change dictionary if successful, otherwise None.
         """
-        change = self.subtitle_manager.handle_replace_current(item_index, find_text, replace_text)
+        change = self.subtitle_manager.handle_replace_current(item_index, find_text, replace_text, **options)
         if change:
             self.subtitle_manager.update_subtitle_text(change['index'], change['new'])
         return change
 
-    def replace_all_subtitles(self, find_text, replace_text):
+    @traced()
+    @timed("service.replace_all_subtitles")
+    def replace_all_subtitles(self, find_text, replace_text, **options):
         """
         Handles replacing text across all subtitle items.
+        `options` are the find flags (regex, ignore_case, whole_word).
         Returns a list of changes.
         """
-        changes = self.subtitle_manager.handle_replace_all(find_text, replace_text)
+        changes = self.subtitle_manager.handle_replace_all(find_text, replace_text, **options)
         if changes:
             self.subtitle_manager._save_changes_to_json()
         return changes
 
+    def apply_glossary_file(self, parent_widget):
+        """
+        Opens a file dialog to pick a glossary rules file and applies all of its
+        rules to the current track in one pass.
+        Returns a tuple (changes, error_message).
+        """
+        file_path, _ = QFileDialog.getOpenFileName(parent_widget, "选择术语表文件", "", "Glossary Files (*.txt *.tsv)")
+        if not file_path:
+            return None, "No file selected."
+        # Measured separately so time spent in the modal dialog is not.
+        return self.apply_glossary(file_path)
+
+    @traced()
+    @timed("service.apply_glossary")
+    def apply_glossary(self, file_path):
+        """
+        Applies all rules of a glossary file to the current track in one pass.
+        Returns a tuple (changes, error_message).
+        """
+        try:
+            rules = load_glossary_rules(file_path)
+            changes = self.subtitle_manager.handle_glossary_replace(rules)
+        except (IOError, UnicodeDecodeError, GlossaryError) as e:
+            return None, f"读取术语表时出错: {e}"
+
+        if changes:
+            self.subtitle_manager._save_changes_to_json()
+        return changes, None
+
+    @traced()
+    @timed("service.check_timing")
+    def check_timing(self, min_gap=DEFAULT_MIN_GAP_FRAMES):
+        """
+        Builds the timing QC report of the current track: overlapping subtitles and
+        gaps shorter than `min_gap` frames.
+        Returns a tuple (report_text, error_message).
+        """
+        subtitles = self.subtitle_manager.subtitles_data
+        if not subtitles:
+            return None, "没有可检查的字幕。请先获取轨道字幕或导入SRT文件。"
+        time_index = self.subtitle_manager.get_time_index()
+        if not len(time_index):
+            return None, "字幕缺少帧信息，无法检查时间轴。"
+
+        issues = time_index.timing_issues(min_gap)
+        if not issues:
+            return f"共检查 {len(time_index)} 条字幕，未发现重叠或小于 {min_gap} 帧的间隔。", None
+
+        overlap_count = sum(1 for issue in issues if issue.kind == 'overlap')
+        lines = [f"共检查 {len(time_index)} 条字幕：{overlap_count} 处重叠，"
+                 f"{len(issues) - overlap_count} 处间隔小于 {min_gap} 帧。", ""]
+        for issue in issues[:TIMING_REPORT_MAX_ISSUES]:
+            first, second = subtitles[issue.first_row], subtitles[issue.second_row]
+            start = second.get('start', second.get('in_timecode', ''))
+            if issue.kind == 'overlap':
+                lines.append(f"#{subtitle_id(first)} 与 #{subtitle_id(second)} 重叠 {issue.frames} 帧 ({start})")
+            else:
+                lines.append(f"#{subtitle_id(first)} 与 #{subtitle_id(second)} 间隔 {issue.frames} 帧 ({start})")
+        if len(issues) > TIMING_REPORT_MAX_ISSUES:
+            lines.append(f"…… 另有 {len(issues) - TIMING_REPORT_MAX_ISSUES} 处未列出")
+        return "\n".join(lines), None
+
+    @traced()
+    @timed("service.lint_current_track")
+    def lint_current_track(self, profile_name, char_limit=DEFAULT_CHAR_LIMIT):
+        """
+        Runs the delivery checks of a lint profile on the current track, with the
+        length column's `char_limit`.
+        Returns a tuple ((lint_result, summary_text), error_message).
+        """
+        profile = PROFILES.get(profile_name)
+        if profile is None:
+            return None, f"未知的检查规则: {profile_name}"
+        if not self.subtitle_manager.subtitles_data:
+            return None, "没有可检查的字幕。请先获取轨道字幕或导入SRT文件。"
+
+        result = self.subtitle_manager.lint(profile, char_limit)
+        counts = result.counts()
+        total = len(result.rows_with_violations())
+        if not total:
+            return (result, f"共检查 {len(result.flags)} 条字幕，全部符合规范。"), None
+        lines = [f"共检查 {len(result.flags)} 条字幕，{total} 条不符合规范：", ""]
+        lines.extend(f"{RULE_LABELS[rule]}: {count} 条" for rule, count in counts.items())
+        return (result, "\n".join(lines)), None
+
+    @traced()
+    @timed("service.shift_subtitles")
+    def shift_subtitles(self, offset_text, first_row=0):
+        """
+        Shifts the current track by a typed offset (frames or a signed time), from
+        `first_row` on. Returns a tuple (retimed_row_count, error_message).
+        """
+        timebase = self.resolve_integration.get_timebase()
+        if timebase is None:
+            return None, "没有时间线，无法调整时间。"
+        try:
+            frames = parse_offset(offset_text, timebase)
+        except ValueError:
+            return None, "偏移格式无效，请输入帧数或 ±HH:MM:SS,mmm"
+        try:
+            return self.subtitle_manager.shift_subtitles(frames, first_row), None
+        except RetimeError as e:
+            return None, str(e)
+
+    @traced()
+    @timed("service.conform_subtitles")
+    def conform_subtitles(self, from_rate, to_rate):
+        """
+        Retimes the current track for a frame-rate conform (media made at
+        `from_rate` played at `to_rate`), anchored at the timeline start (frame 0
+        for an imported SRT). Returns a tuple (retimed_row_count, error_message).
+        """
+        try:
+            return self.subtitle_manager.scale_subtitles(
+                conform_factor(from_rate, to_rate), self.subtitle_manager.start_frame()
+            ), None
+        except RetimeError as e:
+            return None, str(e)
+
+    @traced()
+    @timed("service.snap_subtitles")
+    def snap_subtitles(self):
+        """Snaps the current track's times to frames. Returns a tuple (changed_row_count, error_message)."""
+        try:
+            return self.subtitle_manager.snap_subtitles(), None
+        except RetimeError as e:
+            return None, str(e)
+
+    @traced()
+    @timed("service.set_subtitle_time")
+    def set_subtitle_time(self, item_id, key, time_text):
+        """
+        Applies an edited In ('start') or Out ('end') cell.
+        Returns a tuple (row, error_message).
+        """
+        timebase = self.resolve_integration.get_timebase()
+        if timebase is None:
+            return None, "没有时间线，无法调整时间。"
+        try:
+            frame = TimecodeUtils.frame_from_time_input(time_text, timebase)
+        except ValueError:
+            return None, "时间格式无效，请输入 HH:MM:SS,mmm 或 HH:MM:SS:FF"
+        try:
+            if key == 'start':
+                row = self.subtitle_manager.set_subtitle_frames(item_id, in_frame=frame)
+            else:
+                row = self.subtitle_manager.set_subtitle_frames(item_id, out_frame=frame)
+        except RetimeError as e:
+            return None, str(e)
+        if row < 0:
+            return None, f"字幕 #{item_id} 没有帧信息，无法调整时间。"
+        return row, None
+
+    @traced()
+    @timed("service.align_tracks")
+    def align_tracks(self, primary_index, secondary_index):
+        """
+        Aligns two fetched tracks by time, e.g. a source track and its translation.
+        Returns a tuple ((groups, primary, secondary), error_message).
+        """
+        if primary_index is None:
+            return None, "请先获取轨道字幕。"
+        if primary_index == secondary_index:
+            return None, "请选择另一条轨道进行对齐。"
+        alignment = self.subtitle_manager.align_tracks(primary_index, secondary_index)
+        if alignment is None:
+            return None, f"轨道 ST {secondary_index} 尚未获取，请先切换到该轨道获取字幕。"
+        return alignment, None
+
+    @traced()
+    @timed("service.search_all_tracks")
+    def search_all_tracks(self, query, filter_type):
+        """
+        Searches the text of every fetched track, e.g. for a line anywhere on the timeline.
+        Returns a tuple (results, error_message); results are (track_index, subtitle) pairs.
+        """
+        if not query:
+            return None, "请输入要搜索的文本。"
+        try:
+            return self.subtitle_manager.search_all_tracks(query, filter_type), None
+        except ValueError:
+            return None, "搜索全部轨道仅支持“包含”、“开头是”和“结尾是”。"
+
+    def export_bilingual_srt(self, parent_widget, alignment):
+        """
+        Saves an alignment (as from align_tracks) as a bilingual SRT file.
+        Returns a tuple (file_path, error_message).
+        """
+        file_path, _ = QFileDialog.getSaveFileName(parent_widget, "导出双语SRT", "", "SRT Files (*.srt)")
+        if not file_path:
+            return None, "No file selected."
+        return self.write_bilingual_srt(file_path, alignment)
+
+    @traced()
+    @timed("service.export_bilingual_srt")
+    def write_bilingual_srt(self, file_path, alignment):
+        """Writes an alignment as a bilingual SRT file. Returns a tuple (file_path, error_message)."""
+        try:
+            with open(file_path, 'w', encoding='utf-8') as f:
+                f.write(bilingual_srt(*alignment))
+        except IOError as e:
+            return None, f"写入文件时出错: {e}"
+        return file_path, None
+
+    @traced()
+    @timed("service.review_export_changes")
+    def review_export_changes(self):
+        """
+        Compares the current track in Resolve with its edited cache, before an export.
+        Returns a tuple ((diff, frame_rate), error_message); the review is None for
+        data that did not come from a Resolve track (an imported SRT).
+        """
+        track_index = self.subtitle_manager.current_track_index
+        if not track_index:
+            return None, None
+        resolve_subtitles, error = self.resolve_integration.get_subtitles_with_timecode(track_index)
+        if error:
+            return None, f"无法读取 Resolve 中的轨道 ST {track_index}: {error}"
+        timebase = self.resolve_integration.get_timebase()
+        frame_rate = timebase.frame_rate if timebase is not None else None
+        return (diff_tracks(resolve_subtitles, self.subtitle_manager.subtitles_data), frame_rate), None
+
+    def export_diff_report(self, parent_widget, diff):
+        """
+        Saves a track diff (as from review_export_changes) as a JSON report.
+        Returns a tuple (file_path, error_message).
+        """
+        file_path, _ = QFileDialog.getSaveFileName(parent_widget, "导出修改报告", "", "JSON Files (*.json)")
+        if not file_path:
+            return None, "No file selected."
+        return self.write_diff_report(file_path, diff)
+
+    @traced()
+    @timed("service.export_diff_report")
+    def write_diff_report(self, file_path, diff):
+        """Writes a track diff as a JSON report. Returns a tuple (file_path, error_message)."""
+        try:
+            with open(file_path, 'w', encoding='utf-8') as f:
+                json.dump(diff.to_report(), f, ensure_ascii=False, indent=2)
+        except IOError as e:
+            return None, f"写入文件时出错: {e}"
+        return file_path, None
+
     def import_srt_file(self, parent_widget):
         """Opens a file dialog to import an SRT file."""
         file_path, _ = QFileDialog.getOpenFileName(parent_widget, "选择SRT文件", "", "SRT Files (*.srt)")
         if not file_path:
             return None, "No file selected."
         
+        # Only the read and parse are measured; time spent in the modal dialog is not.
         try:
-            with open(file_path, 'r', encoding='utf-8') as f:
-                content = f.read()
-            
-            # 调用我们之前在 subtitle_manager 中创建的方法
-            subtitles = self.subtitle_manager.load_subtitles_from_srt_content(content)
+            with metrics.timer("service.import_srt_file"), tracer.span("AppService.import_srt_file"):
+                with open(file_path, 'r', encoding='utf-8') as f:
+                    content = f.read()
+
+                # 调用我们之前在 subtitle_manager 中创建的方法
+                subtitles = self.subtitle_manager.load_subtitles_from_srt_content(content)
             if subtitles:
                 return subtitles, None
             else:
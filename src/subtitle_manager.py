@@ -1,25 +1,101 @@
 import re
-from .utils import clean_html
+from .utils import DEFAULT_CHAR_LIMIT, sort_subtitles_by_id
 import json
 import os
 from .format_converter import parse_srt_content
-import os
+from .search_index import SubtitleSearchIndex
+from .time_index import SubtitleTimeIndex
+from .find_replace import MatchGuard, replace_in_text, replace_in_texts
+from .glossary import GlossaryAutomaton
+from .lint import lint_subtitles
+from .aligner import align_tracks
+from . import retime
+from .subtitle_store import SubtitleTrack
+from . import binary_cache
+from .binary_cache import BINARY_EXTENSION
+from . import jsonl_cache
+from .jsonl_cache import JSONL_EXTENSION
+from .json_codec import JSON_CODEC_ENV_VAR, cache_texts, resolve_codec, write_cache_json
+from .timecode_utils import TimecodeUtils
 import tempfile
 import shutil
+from .log_utils import get_logger
+from .metrics import metrics, timed
+
+logger = get_logger("subtitle_manager")
+
+# Cache file format: 'json' (track_N.json), 'binary' (track_N.svt, see binary_cache)
+# or 'jsonl' (track_N.jsonl with a line index, see jsonl_cache).
+CACHE_FORMAT_ENV_VAR = "SUBVIGATOR_CACHE_FORMAT"
+CACHE_EXTENSIONS = {'json': '.json', 'binary': BINARY_EXTENSION, 'jsonl': JSONL_EXTENSION}
 
 class SubtitleManager:
     """
     Manages subtitle data, including loading, processing, and saving.
     """
-    def __init__(self, resolve_integration):
+    def __init__(self, resolve_integration, cache_format=None, json_codec=None):
         self.resolve_integration = resolve_integration
-        self.subtitles_data = []
+        self._subtitles_data = SubtitleTrack()
         self.raw_obj_map = {}
         self.current_json_path = None
         self.is_dirty = False
         self.cache_dir = os.path.join(tempfile.gettempdir(), 'subvigator_cache')
+        self.cache_format = cache_format or os.environ.get(CACHE_FORMAT_ENV_VAR) or 'json'
+        if self.cache_format not in CACHE_EXTENSIONS:
+            logger.warning("Unknown cache format %r, using JSON.", self.cache_format)
+            self.cache_format = 'json'
+        # Encoder for JSON cache saves (see json_codec).
+        self.json_codec = resolve_codec(json_codec or os.environ.get(JSON_CODEC_ENV_VAR) or 'auto')
         self.current_track_index = None
+        # Subtitle lists of every track loaded so far, and a text index over all of them.
+        self.track_subtitles = {}
+        self.search_index = SubtitleSearchIndex()
+        self._time_index = None  # SubtitleTimeIndex of subtitles_data, built on first use
+
+    @property
+    def subtitles_data(self):
+        """The current track's subtitles, as a columnar SubtitleTrack."""
+        return self._subtitles_data
+
+    @subtitles_data.setter
+    def subtitles_data(self, subtitles):
+        # Any list of subtitle dicts is stored as columns.
+        self._subtitles_data = SubtitleTrack.from_dicts(subtitles)
+
+    def _cache_file(self, name):
+        """Path of the cache file `name` (e.g. 'track_1') in the configured format."""
+        return os.path.join(self.cache_dir, name + CACHE_EXTENSIONS[self.cache_format])
+
+    def _read_cache_file(self, file_path):
+        """The subtitles of a cache file in any format. Raises OSError or ValueError."""
+        if file_path.endswith(BINARY_EXTENSION):
+            with metrics.timer("subtitle_manager.load_binary"):
+                return binary_cache.read_track(file_path)
+        if file_path.endswith(JSONL_EXTENSION):
+            with metrics.timer("subtitle_manager.load_jsonl"):
+                return jsonl_cache.read_track(file_path)
+        with metrics.timer("subtitle_manager.load_json"), open(file_path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+
+    def json_export_path(self):
+        """
+        Path of a JSON file with the current subtitles, for re-importing into
+        Resolve: the cache file itself, or a JSON copy of a binary or JSON Lines
+        cache file.
+        """
+        file_path = self.current_json_path
+        if file_path is None or file_path.endswith('.json'):
+            return file_path
+        json_path = os.path.splitext(file_path)[0] + '.json'
+        write_cache_json(json_path, SubtitleTrack.from_dicts(self._read_cache_file(file_path)), self.json_codec)
+        return json_path
 
+    def _find_row(self, item_id):
+        """Row and row view of the subtitle with the given index, or (-1, None)."""
+        row = self.subtitles_data.find_row(item_id)
+        return (row, self.subtitles_data[row]) if row >= 0 else (-1, None)
+
+    @timed("subtitle_manager.load_subtitles")
     def load_subtitles(self, track_index):
         """
         Loads subtitles from the cache, fetching from Resolve if not present (lazy loading).
@@ -28,50 +104,59 @@ class SubtitleManager:
         if not os.path.exists(self.cache_dir):
             os.makedirs(self.cache_dir)
 
-        file_path = os.path.join(self.cache_dir, f"track_{track_index}.json")
+        file_path = self._cache_file(f"track_{track_index}")
         self.current_json_path = file_path
 
         if not os.path.exists(file_path):
-            print(f"LOG: INFO: Cache miss for track {track_index}. Fetching from Resolve.")
+            logger.info("Cache miss for track %s. Fetching from Resolve.", track_index)
+            metrics.incr("subtitle_manager.cache_miss")
             # Fetch from Resolve and cache it
             json_data = self.resolve_integration.export_subtitles_to_json(track_number=track_index)
             if json_data is not None:
                 try:
-                    with open(file_path, 'w', encoding='utf-8') as f:
-                        json.dump(json_data, f, ensure_ascii=False, indent=2)
+                    if file_path.endswith(BINARY_EXTENSION):
+                        binary_cache.write_track(file_path, json_data)
+                    elif file_path.endswith(JSONL_EXTENSION):
+                        jsonl_cache.write_track(file_path, json_data, codec=self.json_codec)
+                    else:
+                        write_cache_json(file_path, SubtitleTrack.from_dicts(json_data), self.json_codec)
                     self.subtitles_data = json_data
-                except (IOError, json.JSONDecodeError) as e:
-                    print(f"LOG: ERROR: Error writing or encoding JSON file for track {track_index}: {e}")
+                except (IOError, TypeError, ValueError) as e:
+                    logger.error("Error writing or encoding JSON file for track %s: %s", track_index, e)
                     self.subtitles_data = []
             else:
                 # Handle case where fetching from Resolve fails or returns no data
                 self.subtitles_data = []
         else:
             # Load from existing cache file
+            metrics.incr("subtitle_manager.cache_hit")
             try:
-                with open(file_path, 'r', encoding='utf-8') as f:
-                    self.subtitles_data = json.load(f)
-            except (FileNotFoundError, json.JSONDecodeError):
+                self.subtitles_data = self._read_cache_file(file_path)
+            except (OSError, ValueError) as e:
+                logger.error("Error reading cache file for track %s: %s", track_index, e)
                 self.subtitles_data = []
         
+        # The view shows the store as-is, so keep it in ascending id order.
+        sort_subtitles_by_id(self.subtitles_data)
+        self._assign_frames(self.subtitles_data)
+        self._index_track(track_index, self.subtitles_data)
         return self.subtitles_data
 
     def get_subtitles(self):
-        for sub in self.subtitles_data:
-            # Also remove HTML tags for accurate counting, similar to saving
-            clean_text = clean_html(sub.get('text', ''))
-            sub['char_count'] = len(clean_text)
+        # Each row's 'char_count' (length without HTML tags) is a derived column of the track.
         return self.subtitles_data
 
     def load_subtitles_from_srt_content(self, srt_content: str):
         """Loads subtitles from SRT content, replacing current data."""
         parsed_subs = parse_srt_content(srt_content)
         if parsed_subs:
-            self.subtitles_data = parsed_subs
+            self.subtitles_data = sort_subtitles_by_id(parsed_subs)
+            self._assign_frames(self.subtitles_data)
             self.is_dirty = True
             # 将 current_track_index 设置为 0 或其他特殊值，以表示数据源是导入的SRT文件
             self.current_track_index = 0
-            self.current_json_path = os.path.join(self.cache_dir, 'imported_srt.json')
+            self.current_json_path = self._cache_file('imported_srt')
+            self._index_track(self.current_track_index, self.subtitles_data)
             self._save_changes_to_json()
             return self.subtitles_data
         return []
@@ -82,76 +167,281 @@ class SubtitleManager:
         This is useful for bulk updates from the UI.
         """
         self.subtitles_data = subtitles_data
+        if self.current_track_index is not None:
+            self._index_track(self.current_track_index, self.subtitles_data)
         self._save_changes_to_json()
 
     def update_subtitle_text(self, item_id, new_text):
         """Updates the text of a single subtitle and saves the changes."""
-        sub_obj = next((s for s in self.subtitles_data if s['index'] == item_id), None)
+        row, sub_obj = self._find_row(item_id)
         if sub_obj:
             sub_obj['text'] = new_text
-            self._save_changes_to_json() # Performance: Avoid saving on every single change
+            self.search_index.update(self.current_track_index, row, new_text)
+            self._save_row(row)
             self.is_dirty = True
             return True
         return False
 
-    def handle_replace_current(self, item_id, find_text, replace_text):
-        """Handles replacing the text of a single subtitle item."""
+    def handle_replace_current(self, item_id, find_text, replace_text, regex=False, ignore_case=False, whole_word=False):
+        """
+        Handles replacing the text of a single subtitle item. In regex mode the
+        replacement may reference capture groups. Raises PatternError for a bad pattern.
+        """
         if not find_text:
             return None
-        sub_obj = next((s for s in self.subtitles_data if s['index'] == item_id), None)
+        row, sub_obj = self._find_row(item_id)
         if sub_obj:
             original_text = sub_obj['text']
-            new_text = original_text.replace(find_text, replace_text, 1)
+            new_text = replace_in_text(original_text, find_text, replace_text, 1, regex, ignore_case, whole_word)
             if original_text != new_text:
                 sub_obj['text'] = new_text
+                self.search_index.update(self.current_track_index, row, new_text)
                 self.is_dirty = True # Mark as dirty, but don't save yet
-                self._save_changes_to_json() # Performance: Avoid saving on every single change
+                self._save_row(row)
                 return {'index': item_id, 'old': original_text, 'new': new_text}
         return None
 
-    def handle_replace_all(self, find_text, replace_text):
-        """Handles replacing text across all subtitle items."""
+    def handle_replace_all(self, find_text, replace_text, regex=False, ignore_case=False, whole_word=False):
+        """
+        Handles replacing text across all subtitle items. The whole pass shares one
+        match-time budget; if it runs out, MatchTimeout is raised and nothing is changed.
+        """
         if not find_text:
             return []
         
+        guard = MatchGuard()
+        track = self.subtitles_data
+        new_texts = replace_in_texts(track.texts, find_text, replace_text, 0, regex, ignore_case, whole_word, guard)
         changes = []
-        for sub_obj in self.subtitles_data:
-            original_text = sub_obj['text']
-            new_text = original_text.replace(find_text, replace_text)
+        for row, (original_text, new_text) in enumerate(zip(track.texts, new_texts)):
             if original_text != new_text:
-                changes.append({'index': sub_obj['index'], 'old': original_text, 'new': new_text})
-                sub_obj['text'] = new_text
+                changes.append((row, {'index': track[row].get('index'), 'old': original_text, 'new': new_text}))
+
+        for row, change in changes:
+            track[row]['text'] = change['new']
+            self.search_index.update(self.current_track_index, row, change['new'])
         
         if changes:
             self.is_dirty = True
         
+        return [change for _, change in changes]
+
+    def handle_glossary_replace(self, rules):
+        """
+        Applies a glossary ({find: replace} rules) to every subtitle in a single
+        Aho-Corasick pass. Returns the list of changes, like handle_replace_all.
+        """
+        automaton = GlossaryAutomaton(rules)
+        if not len(automaton):
+            return []
+
+        track = self.subtitles_data
+        changes = []
+        for row, original_text in enumerate(track.texts):
+            new_text = automaton.replace(original_text)
+            if original_text != new_text:
+                track[row]['text'] = new_text
+                self.search_index.update(self.current_track_index, row, new_text)
+                changes.append({'index': track[row].get('index'), 'old': original_text, 'new': new_text})
+
+        if changes:
+            self.is_dirty = True
         return changes
 
+    def _frame_rate(self):
+        """The timeline's frame rate, or None if there is no usable timeline."""
+        timebase = self.resolve_integration.get_timebase()
+        if timebase is None or not isinstance(timebase.frame_rate, (int, float)) or timebase.frame_rate <= 0:
+            return None
+        return timebase.frame_rate
+
+    def _assign_frames(self, subtitles):
+        """
+        Stores each subtitle's absolute start and end frame ('in_frame', 'out_frame'),
+        so seeking to a row needs no timecode parsing or Resolve calls.
+        """
+        self._time_index = None
+        frame_rate = self._frame_rate()
+        if frame_rate is None:
+            return
+        to_frames = TimecodeUtils.timecode_to_frames
+        # Rows with canonical times are converted over the columns; the rest one by one.
+        rows = subtitles.assign_frames_from_times(frame_rate)
+        for sub in (subtitles[row] for row in rows):
+            try:
+                sub['in_frame'] = to_frames(sub['start'], frame_rate)
+                sub['out_frame'] = to_frames(sub['end'], frame_rate)
+            except (KeyError, ValueError):
+                continue
+
+    def _retime(self, operation, *args, **kwargs):
+        """
+        Runs a retime operation on the current track and saves the result.
+        Returns the number of retimed rows. Raises RetimeError.
+        """
+        frame_rate = self._frame_rate()
+        if frame_rate is None:
+            raise retime.RetimeError("没有时间线帧率，无法调整时间")
+        with metrics.timer(f"subtitle_manager.retime.{operation.__name__}"):
+            count = operation(self.subtitles_data, *args, frame_rate=frame_rate, **kwargs)
+        if count:
+            self._time_index = None
+            self.is_dirty = True
+            self._save_changes_to_json()
+        return count
+
+    def start_frame(self):
+        """
+        The first frame the current subtitles can start on: the timeline's start frame
+        for a Resolve track, 0 for an imported SRT, whose frames count from 0.
+        """
+        if self.current_track_index == 0:
+            return 0
+        return self.resolve_integration.get_start_frame()
+
+    def shift_subtitles(self, frames, first_row=0):
+        """Moves the subtitles from `first_row` on by `frames` (a ripple edit when it is not 0)."""
+        return self._retime(retime.shift, frames, first_row=first_row, start_frame=self.start_frame())
+
+    def scale_subtitles(self, factor, origin=0):
+        """Scales subtitle times from frame `origin` by `factor`, e.g. retime.conform_factor(25, 23.976)."""
+        return self._retime(retime.scale, factor, origin=origin, start_frame=self.start_frame())
+
+    def snap_subtitles(self):
+        """Moves subtitle times onto the frame boundaries of their frames."""
+        return self._retime(retime.snap)
+
+    def set_subtitle_frames(self, item_id, in_frame=None, out_frame=None):
+        """
+        Sets the start and/or end frame of one subtitle. Returns its row, or -1 if
+        there is no such subtitle or it has no frames. Raises RetimeError.
+        """
+        row, sub_obj = self._find_row(item_id)
+        if sub_obj is None or sub_obj.get('in_frame') is None or sub_obj.get('out_frame') is None:
+            return -1
+        in_frame = sub_obj['in_frame'] if in_frame is None else in_frame
+        out_frame = sub_obj['out_frame'] if out_frame is None else out_frame
+        self._retime(retime.set_row_frames, row, in_frame, out_frame, start_frame=self.start_frame())
+        return row
+
+    def get_time_index(self):
+        """The SubtitleTimeIndex of the current subtitles, rebuilt after they are reloaded."""
+        if self._time_index is None or self._time_index.subtitles is not self.subtitles_data:
+            self._time_index = SubtitleTimeIndex(self.subtitles_data)
+        return self._time_index
+
+    def lint(self, profile, char_limit=DEFAULT_CHAR_LIMIT):
+        """
+        Checks the current subtitles against a lint profile, with `char_limit` as the
+        length column's character limit. Timing rules need the timeline's frame rate
+        and are skipped without one.
+        """
+        timebase = self.resolve_integration.get_timebase()
+        with metrics.timer("subtitle_manager.lint"):
+            return lint_subtitles(self.subtitles_data, timebase.frame_rate if timebase else 0, profile, char_limit)
+
+    def _index_track(self, track_index, subtitles):
+        """Registers a track's subtitle list with the search index."""
+        self.track_subtitles[track_index] = subtitles
+        self.search_index.index_track(track_index, list(subtitles.texts))
+
+    def _load_cached_track(self, track_index):
+        """
+        Reads a track that has not been opened from its cache file and indexes it.
+        Returns the SubtitleTrack, or None if there is no readable cache file.
+        """
+        file_path = self._cache_file(f"track_{track_index}")
+        try:
+            subtitles = SubtitleTrack.from_dicts(sort_subtitles_by_id(self._read_cache_file(file_path)))
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError) as e:
+            logger.warning("Skipping unreadable cache file %s: %s", os.path.basename(file_path), e)
+            return None
+        self._index_track(track_index, subtitles)
+        return subtitles
+
+    def get_track_subtitles(self, track_index):
+        """The subtitles of any track loaded or cached so far, or None if the track was never fetched."""
+        subtitles = self.track_subtitles.get(track_index)
+        if subtitles is None:
+            subtitles = self._load_cached_track(track_index)
+        return subtitles
+
+    def align_tracks(self, primary_index, secondary_index):
+        """
+        Aligns two tracks by time (see aligner.align_tracks). Returns
+        (groups, primary, secondary), or None if either track was never fetched.
+        """
+        primary, secondary = self.get_track_subtitles(primary_index), self.get_track_subtitles(secondary_index)
+        if primary is None or secondary is None:
+            return None
+        with metrics.timer("subtitle_manager.align_tracks"):
+            return align_tracks(primary, secondary), primary, secondary
+
+    def search_all_tracks(self, query, filter_type='Contains'):
+        """
+        Searches the text of every cached track, loading cache files of tracks that
+        have not been opened yet. Returns a list of (track_index, subtitle) pairs.
+        """
+        if os.path.isdir(self.cache_dir):
+            extension = os.path.splitext(self._cache_file('track'))[1]
+            for file_name in os.listdir(self.cache_dir):
+                match = re.fullmatch(r'track_(\d+)' + re.escape(extension), file_name)
+                if match and int(match.group(1)) not in self.track_subtitles:
+                    self._load_cached_track(int(match.group(1)))
+
+        return [
+            (track, self.track_subtitles[track][row])
+            for track, row in self.search_index.search(query, filter_type)
+        ]
+
     def _save_changes_to_json(self):
-        """Saves the current subtitle data to the JSON file."""
+        """Saves the current subtitle data to its cache file (JSON, binary or JSON Lines, by extension)."""
         if self.current_json_path:
             file_path = self.current_json_path
         elif self.current_track_index is not None:
-            file_path = os.path.join(self.cache_dir, f"track_{self.current_track_index}.json")
+            file_path = self._cache_file(f"track_{self.current_track_index}")
         else:
-            print("Error: No current track index or json path is set. Cannot save.")
+            logger.error("No current track index or json path is set. Cannot save.")
             return
         
+        if file_path.endswith(BINARY_EXTENSION):
+            try:
+                with metrics.timer("subtitle_manager.save_binary"):
+                    binary_cache.write_track(file_path, self.subtitles_data, cache_texts(self.subtitles_data))
+            except (OSError, TypeError, ValueError) as e:
+                logger.error("Failed to auto-save subtitle changes: %s", e)
+            return
+        if file_path.endswith(JSONL_EXTENSION):
+            try:
+                with metrics.timer("subtitle_manager.save_jsonl"):
+                    jsonl_cache.write_track(file_path, self.subtitles_data, cache_texts(self.subtitles_data),
+                                            self.json_codec)
+            except (OSError, TypeError, ValueError) as e:
+                logger.error("Failed to auto-save subtitle changes: %s", e)
+            return
+
         try:
-            output_data = []
-            for sub in self.subtitles_data:
-                clean_text = clean_html(sub.get('text', ''))
-                output_data.append({
-                    "index": sub.get('index'),
-                    "start": sub.get('start'),
-                    "end": sub.get('end'),
-                    "text": clean_text,
-                })
-
-            with open(file_path, 'w', encoding='utf-8') as f:
-                json.dump(output_data, f, ensure_ascii=False, indent=2)
-        except (IOError, TypeError) as e:
-            print(f"Failed to auto-save subtitle changes: {e}")
+            with metrics.timer("subtitle_manager.save_json"):
+                write_cache_json(file_path, self.subtitles_data, self.json_codec)
+        except (OSError, TypeError, ValueError) as e:
+            logger.error("Failed to auto-save subtitle changes: %s", e)
+
+    def _save_row(self, row):
+        """
+        Saves a change to one row: as a small patch of a JSON Lines cache file, or
+        by saving the whole track.
+        """
+        file_path = self.current_json_path
+        if file_path and file_path.endswith(JSONL_EXTENSION):
+            try:
+                with metrics.timer("subtitle_manager.patch_jsonl"):
+                    if jsonl_cache.patch_row(file_path, self.subtitles_data, row, self.json_codec):
+                        return
+            except (OSError, TypeError, ValueError) as e:
+                logger.warning("Could not patch row %s of %s, saving the whole track: %s", row, file_path, e)
+        self._save_changes_to_json()
 
     def clear_cache(self):
         """
@@ -159,4 +449,4 @@ class SubtitleManager:
         """
         if os.path.exists(self.cache_dir):
             shutil.rmtree(self.cache_dir, ignore_errors=True)
-            print(f"Cache directory {self.cache_dir} cleared.")
\ No newline at end of file
+            logger.info("Cache directory %s cleared.", self.cache_dir)
\ No newline at end of file
@@ -0,0 +1,474 @@
+# subtitle_store.py
+"""
+Columnar storage for a subtitle track.
+
+`SubtitleTrack` keeps one column per field instead of one dict per subtitle: ids,
+times and frames are packed integers (`array('q')`), texts are a plain list, and
+derived columns (clean character counts) are computed on first use. A track of
+50k subtitles takes a fraction of the memory of the equivalent list of dicts, and
+batch operations (replace all, lint, frame assignment) run over whole columns.
+
+For the code that treats subtitles as dicts, the track is also a mutable sequence
+of `SubtitleRow` views: small `__slots__` objects with the mapping interface of
+the old dicts ('index', 'start', 'end', 'text', 'in_frame', 'out_frame'). Reads
+and writes go straight to the columns. A view addresses a row position, so it
+stays valid until rows are inserted or removed before it.
+
+Values that do not fit a column (a non-integer id, a time not in the canonical
+'HH:MM:SS,mmm' form, or any other key such as Resolve's 'raw_obj') are kept in a
+small per-row dict and round-trip unchanged. Every row has a 'text' ('' if the
+source had none).
+"""
+import re
+from array import array
+from collections.abc import Mapping, MutableMapping, MutableSequence
+
+from .utils import clean_html
+
+_MISSING = -1  # Integer column value for "not set, or kept in the row's extras"
+_ABSENT = object()  # get_value default meaning "the row has no such key"
+
+# Keys stored in columns, by column position (see SubtitleTrack._columns).
+_KEY_COLUMNS = {'index': 0, 'text': 1, 'start': 2, 'end': 3, 'in_frame': 4, 'out_frame': 5}
+_TIME_COLUMNS = (2, 3)
+# Only times in this exact form are stored as milliseconds, so they format back unchanged.
+_SRT_TIME_RE = re.compile(r'(\d\d):([0-5]\d):([0-5]\d),(\d\d\d)', re.ASCII)
+# Keys never kept in a row's extras ('char_count' is derived).
+_COLUMN_KEYS = frozenset(_KEY_COLUMNS) | {'char_count'}
+_NON_TEXT_COLUMNS = tuple((key, column) for key, column in _KEY_COLUMNS.items() if column != 1)
+
+
+def srt_time_to_ms(value):
+    """Milliseconds of an 'HH:MM:SS,mmm' string, or None if `value` is not in exactly that form."""
+    match = _SRT_TIME_RE.fullmatch(value) if type(value) is str else None
+    if match is None:
+        return None
+    return int(match[1]) * 3600000 + int(match[2]) * 60000 + int(match[3]) * 1000 + int(match[4])
+
+
+def ms_to_srt_time(ms):
+    seconds, milliseconds = divmod(ms, 1000)
+    minutes, seconds = divmod(seconds, 60)
+    hours, minutes = divmod(minutes, 60)
+    return f"{hours:02d}:{minutes:02d}:{seconds:02d},{milliseconds:03d}"
+
+
+_TWO_DIGITS = [f"{i:02d}" for i in range(100)]
+_THREE_DIGITS = [f"{i:03d}" for i in range(1000)]
+
+
+def ms_to_srt_times(values):
+    """ms_to_srt_time of every value of a time column, with None for _MISSING; for whole-track writes."""
+    two, three = _TWO_DIGITS, _THREE_DIGITS
+    times = []
+    for ms in values:
+        if ms == _MISSING:
+            times.append(None)
+            continue
+        seconds, milliseconds = divmod(ms, 1000)
+        minutes, seconds = divmod(seconds, 60)
+        hours, minutes = divmod(minutes, 60)
+        times.append(f"{two[hours] if hours < 100 else hours}:{two[minutes]}:{two[seconds]},{three[milliseconds]}")
+    return times
+
+
+def _to_column(column, value):
+    """The column representation of `value`, or _MISSING if it must go to the row's extras."""
+    if column == 1:
+        return value
+    if column in _TIME_COLUMNS:
+        ms = srt_time_to_ms(value)
+        return ms if ms is not None else _MISSING
+    return value if type(value) is int and value >= 0 else _MISSING
+
+
+class SubtitleRow(MutableMapping):
+    """Dict-like view of one row of a SubtitleTrack."""
+    __slots__ = ('track', 'row')
+
+    def __init__(self, track, row):
+        self.track = track
+        self.row = row
+
+    def __getitem__(self, key):
+        value = self.track.get_value(self.row, key, _ABSENT)
+        if value is _ABSENT:
+            raise KeyError(key)
+        return value
+
+    def __setitem__(self, key, value):
+        self.track.set_value(self.row, key, value)
+
+    def __delitem__(self, key):
+        self.track.del_value(self.row, key)
+
+    def __iter__(self):
+        return iter([key for key, _ in self.track.row_items(self.row)])
+
+    def __len__(self):
+        return len(self.track.row_items(self.row))
+
+    def __repr__(self):
+        return f"SubtitleRow({dict(self.track.row_items(self.row))!r})"
+
+    # Faster than the Mapping mixins, which go through __getitem__ and KeyError.
+    def get(self, key, default=None):
+        return self.track.get_value(self.row, key, default)
+
+    def __contains__(self, key):
+        return self.track.get_value(self.row, key, _ABSENT) is not _ABSENT
+
+
+class SubtitleTrack(MutableSequence):
+    """A subtitle track stored as columns. See the module docstring."""
+
+    def __init__(self, subtitles=()):
+        self.ids = array('q')
+        self.texts = []
+        self.start_ms = array('q')
+        self.end_ms = array('q')
+        self.in_frames = array('q')
+        self.out_frames = array('q')
+        self._extras = []          # Per row: None, or a dict of values kept outside the columns
+        self._char_counts = None   # Derived: clean text length per row; None entries are stale
+        # Columns by position, in _KEY_COLUMNS order. Columns are only ever modified in place.
+        self._column_tuple = (self.ids, self.texts, self.start_ms, self.end_ms, self.in_frames, self.out_frames)
+        self.extend(subtitles)
+
+    @classmethod
+    def from_dicts(cls, subtitles):
+        """A track holding the given subtitle dicts (or rows). A track is returned as-is."""
+        if isinstance(subtitles, cls):
+            return subtitles
+        return cls(subtitles)
+
+    @classmethod
+    def from_columns(cls, ids, texts, start_ms, end_ms, in_frames, out_frames, extras=None):
+        """
+        A track from whole columns, as read back from a binary cache file: integer
+        columns are iterables of ints (_MISSING for values kept in `extras`, a
+        {row: {key: value}} dict).
+        """
+        track = cls()
+        for column, values in zip(track._columns(), (ids, texts, start_ms, end_ms, in_frames, out_frames)):
+            column.extend(values)
+        track._extras.extend([None] * len(track.texts))
+        for row, values in (extras or {}).items():
+            track._extras[row] = dict(values)
+        return track
+
+    def to_dicts(self):
+        """The rows as plain dicts."""
+        return [dict(self.row_items(row)) for row in range(len(self.texts))]
+
+    def _columns(self):
+        return self._column_tuple
+
+    # --- Values by key ---
+
+    def get_value(self, row, key, default=None):
+        if key == 'text':
+            return self.texts[row]
+        column = _KEY_COLUMNS.get(key)
+        if column is not None:
+            value = self._column_tuple[column][row]
+            if value != _MISSING:
+                return ms_to_srt_time(value) if column in _TIME_COLUMNS else value
+        elif key == 'char_count':
+            return self.char_count(row)
+        extras = self._extras[row]
+        if extras is not None:
+            return extras.get(key, default)
+        return default
+
+    def set_value(self, row, key, value):
+        column = _KEY_COLUMNS.get(key)
+        if key == 'char_count':
+            return  # Derived from the text
+        if column is None:
+            column_value = _MISSING
+        else:
+            column_value = _to_column(column, value)
+            self._columns()[column][row] = column_value
+            if column == 1 and self._char_counts is not None:
+                self._char_counts[row] = None
+        if column is None or (column != 1 and column_value == _MISSING):
+            extras = self._extras[row]
+            if extras is None:
+                extras = self._extras[row] = {}
+            extras[key] = value
+        else:
+            self._pop_extra(row, key)
+
+    def del_value(self, row, key):
+        if self.get_value(row, key, _ABSENT) is _ABSENT or key in ('text', 'char_count'):
+            raise KeyError(key)
+        column = _KEY_COLUMNS.get(key)
+        if column is not None:
+            self._columns()[column][row] = _MISSING
+        self._pop_extra(row, key)
+
+    def _pop_extra(self, row, key):
+        extras = self._extras[row]
+        if extras is not None and key in extras:
+            del extras[key]
+            if not extras:
+                self._extras[row] = None
+
+    def row_items(self, row):
+        """The (key, value) pairs of a row, as its dict would have them."""
+        items = []
+        for key, column in _KEY_COLUMNS.items():
+            value = self._columns()[column][row]
+            if column == 1:
+                items.append((key, value))
+            elif value != _MISSING:
+                items.append((key, ms_to_srt_time(value) if column in _TIME_COLUMNS else value))
+        extras = self._extras[row]
+        if extras is not None:
+            items.extend(extras.items())
+        return items
+
+    # --- Batch operations ---
+
+    def assign_frames_from_times(self, frame_rate):
+        """
+        Sets 'in_frame'/'out_frame' from 'start'/'end' for every row whose times are
+        in the columns, rounding like TimecodeUtils.timecode_to_frames. Returns the
+        rows whose times are not (missing or in another format).
+        """
+        skipped = []
+        in_frames, out_frames = self.in_frames, self.out_frames
+        for row, (start, end) in enumerate(zip(self.start_ms, self.end_ms)):
+            if start == _MISSING or end == _MISSING:
+                skipped.append(row)
+                continue
+            in_frames[row] = int(round((start // 1000 + (start % 1000) / 1000.0) * frame_rate))
+            out_frames[row] = int(round((end // 1000 + (end % 1000) / 1000.0) * frame_rate))
+            if self._extras[row] is not None:
+                self._pop_extra(row, 'in_frame')
+                self._pop_extra(row, 'out_frame')
+        return skipped
+
+    def timed_rows(self, first_row=0):
+        """
+        Rows from `first_row` on whose 'in_frame' and 'out_frame' are both in the
+        columns: a range when that is all of them (the usual case), else a list.
+        """
+        first_row = max(first_row, 0)
+        in_frames, out_frames = self.in_frames, self.out_frames
+        if _MISSING not in in_frames[first_row:] and _MISSING not in out_frames[first_row:]:
+            return range(first_row, len(self.texts))
+        return [
+            row for row in range(first_row, len(self.texts))
+            if in_frames[row] != _MISSING and out_frames[row] != _MISSING
+        ]
+
+    def column_values(self, column, rows):
+        """The values of an integer column (e.g. `track.in_frames`) at `rows`, as from timed_rows."""
+        if isinstance(rows, range) and rows.step == 1:
+            return column[rows.start:rows.stop]
+        return [column[row] for row in rows]
+
+    def set_timing(self, rows, in_frames, out_frames, start_ms, end_ms):
+        """Writes new frames and times (parallel sequences) for `rows`, as from timed_rows, into the columns."""
+        columns = (self.in_frames, self.out_frames, self.start_ms, self.end_ms)
+        for column, values in zip(columns, (in_frames, out_frames, start_ms, end_ms)):
+            if isinstance(rows, range) and rows.step == 1:
+                column[rows.start:rows.stop] = array('q', values)
+                continue
+            for row, value in zip(rows, values):
+                column[row] = value
+        extras = self._extras
+        for row in (row for row in rows if extras[row] is not None):
+            for key in ('start', 'end', 'in_frame', 'out_frame'):
+                self._pop_extra(row, key)
+
+    def find_row(self, item_id):
+        """Row of the first subtitle whose 'index' equals `item_id`, or -1."""
+        if type(item_id) is int and item_id >= 0:
+            try:
+                return self.ids.index(item_id)
+            except ValueError:
+                pass
+        for row, extras in enumerate(self._extras):
+            if extras is not None and extras.get('index', _ABSENT) == item_id:
+                return row
+        return -1
+
+    # --- Derived columns ---
+
+    def char_count(self, row):
+        """Length of the row's text without HTML tags."""
+        counts = self.char_counts()
+        if counts[row] is None:
+            counts[row] = len(clean_html(self.texts[row]))
+        return counts[row]
+
+    def char_counts(self):
+        """Clean text length per row, computed on first use; entries of edited rows are refreshed lazily."""
+        if self._char_counts is None:
+            self._char_counts = [len(clean_html(text)) if '<' in text else len(text) for text in self.texts]
+        return self._char_counts
+
+    # --- Sequence interface ---
+
+    def __len__(self):
+        return len(self.texts)
+
+    def _row_position(self, row):
+        if row < 0:
+            row += len(self.texts)
+        if not 0 <= row < len(self.texts):
+            raise IndexError("subtitle row out of range")
+        return row
+
+    def __getitem__(self, row):
+        if isinstance(row, slice):
+            return [SubtitleRow(self, i) for i in range(*row.indices(len(self.texts)))]
+        return SubtitleRow(self, self._row_position(row))
+
+    def __setitem__(self, row, value):
+        if not isinstance(row, slice):
+            self._write_record(self._row_position(row), self._record(value))
+            return
+        # Snapshot first: the new rows may be views of this very track (as in a sort).
+        records = [self._record(sub) for sub in value]
+        start, stop, step = row.indices(len(self))
+        if step != 1:
+            positions = range(start, stop, step)
+            if len(positions) != len(records):
+                raise ValueError("extended slice assignment needs a sequence of the same size")
+            for position, record in zip(positions, records):
+                self._write_record(position, record)
+            return
+        tail = [self._record_at(i) for i in range(max(start, stop), len(self))]
+        self._truncate(start)
+        for record in records + tail:
+            self._append_record(record)
+
+    def __delitem__(self, row):
+        if isinstance(row, slice):
+            for position in sorted(range(*row.indices(len(self))), reverse=True):
+                del self[position]
+            return
+        row = self._row_position(row)
+        for column in self._columns():
+            del column[row]
+        del self._extras[row]
+        if self._char_counts is not None:
+            del self._char_counts[row]
+
+    def insert(self, row, value):
+        n = len(self.texts)
+        row = max(0, min(n, row + n if row < 0 else row))
+        values, extras = self._record(value)
+        for column, column_value in zip(self._columns(), values):
+            column.insert(row, column_value)
+        self._extras.insert(row, extras)
+        if self._char_counts is not None:
+            self._char_counts.insert(row, None)
+
+    def append(self, value):
+        self._append_record(self._record(value))
+
+    def extend(self, values):
+        if values is self:
+            values = list(values)
+        if isinstance(values, list) and all(type(sub) is dict for sub in values):
+            self._extend_dicts(values)
+            return
+        for value in values:
+            self._append_record(self._record(value))
+
+    def _extend_dicts(self, subs):
+        """Appends plain dicts column by column: the bulk path used when a track is loaded."""
+        extras = [None] * len(subs)
+        for key, column in _NON_TEXT_COLUMNS:
+            raw = [sub.get(key, _ABSENT) for sub in subs]
+            if column in _TIME_COLUMNS:
+                match = _SRT_TIME_RE.fullmatch
+                matches = [match(value) if type(value) is str else None for value in raw]
+                values = [
+                    int(m[1]) * 3600000 + int(m[2]) * 60000 + int(m[3]) * 1000 + int(m[4]) if m else _MISSING
+                    for m in matches
+                ]
+            else:
+                values = [value if type(value) is int and value >= 0 else _MISSING for value in raw]
+            for row, (value, raw_value) in enumerate(zip(values, raw)):
+                if value == _MISSING and raw_value is not _ABSENT:
+                    extras[row] = extras[row] or {}
+                    extras[row][key] = raw_value
+            self._column_tuple[column].extend(values)
+        for row, sub in enumerate(subs):
+            other_keys = sub.keys() - _COLUMN_KEYS
+            if other_keys:
+                extras[row] = extras[row] or {}
+                extras[row].update((key, sub[key]) for key in other_keys)
+        self.texts.extend([sub.get('text', '') for sub in subs])
+        self._extras.extend(extras)
+        if self._char_counts is not None:
+            self._char_counts.extend([None] * len(subs))
+
+    def __eq__(self, other):
+        if isinstance(other, (SubtitleTrack, list, tuple)):
+            return len(self) == len(other) and all(a == b for a, b in zip(self, other))
+        return NotImplemented
+
+    def __repr__(self):
+        return f"SubtitleTrack({len(self)} rows)"
+
+    # --- Records: a row's column values and extras, detached from any track ---
+
+    def _record_at(self, row):
+        extras = self._extras[row]
+        return tuple(column[row] for column in self._columns()), dict(extras) if extras else None
+
+    def _record(self, sub):
+        if isinstance(sub, SubtitleRow):
+            return sub.track._record_at(sub.row)
+        if not isinstance(sub, Mapping):
+            raise TypeError(f"A subtitle must be a mapping, not {type(sub).__name__}")
+        values = [_MISSING, sub.get('text', ''), _MISSING, _MISSING, _MISSING, _MISSING]
+        extras = None
+        known = 'text' in sub
+        for key, column in _NON_TEXT_COLUMNS:
+            value = sub.get(key, _ABSENT)
+            if value is _ABSENT:
+                continue
+            known += 1
+            column_value = _to_column(column, value)
+            if column_value != _MISSING:
+                values[column] = column_value
+            else:
+                extras = extras or {}
+                extras[key] = value
+        if len(sub) > known:
+            for key, value in sub.items():
+                if key not in _KEY_COLUMNS and key != 'char_count':
+                    extras = extras or {}
+                    extras[key] = value
+        return tuple(values), extras
+
+    def _write_record(self, row, record):
+        values, extras = record
+        for column, value in zip(self._columns(), values):
+            column[row] = value
+        self._extras[row] = extras
+        if self._char_counts is not None:
+            self._char_counts[row] = None
+
+    def _append_record(self, record):
+        values, extras = record
+        for column, value in zip(self._columns(), values):
+            column.append(value)
+        self._extras.append(extras)
+        if self._char_counts is not None:
+            self._char_counts.append(None)
+
+    def _truncate(self, length):
+        for column in self._columns():
+            del column[length:]
+        del self._extras[length:]
+        if self._char_counts is not None:
+            del self._char_counts[length:]
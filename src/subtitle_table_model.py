@@ -0,0 +1,688 @@
+# subtitle_table_model.py
+"""
+Qt model/view layer for the subtitle list.
+
+`SubtitleTableModel` does not copy subtitle data: it keeps a reference to the list
+owned by `SubtitleManager` and answers `data()` calls straight from it, so populating
+a track is a single model reset regardless of its length, and reloading a track
+only touches the rows whose content changed. Only UI-specific state (the pre-edit
+text of modified rows, lint results) lives in small side tables. Diff highlighting
+is generated when a modified row is first painted, not when it is modified, so a
+replace-all over thousands of rows only records their pre-edit texts.
+
+`SubtitleFilterProxyModel` applies the inspector's filter and find criteria.
+"""
+import bisect
+import functools
+
+from PySide6.QtCore import Qt, Signal, QAbstractTableModel, QAbstractProxyModel, QModelIndex
+from PySide6.QtGui import QColor
+
+from . import text_diff, ui_logic
+from .lint import describe_flags
+from .utils import clean_html, subtitle_content_hash, FILTER_TYPE_ALIASES
+from .find_replace import FindOptions, MatchGuard, PatternError, find_matches
+from .time_index import SubtitleTimeIndex
+from .log_utils import get_logger
+
+logger = get_logger("subtitle_table_model")
+
+COLUMN_HEADERS = ['#', '长度', '字幕', '入点', '出点', '开始帧']
+ID_COLUMN, LENGTH_COLUMN, TEXT_COLUMN, IN_COLUMN, OUT_COLUMN, FRAME_COLUMN = range(len(COLUMN_HEADERS))
+EDITABLE_COLUMNS = (TEXT_COLUMN, IN_COLUMN, OUT_COLUMN)
+
+# Roles are cached as plain ints: looking up a Qt enum member costs microseconds,
+# and data() is called several times per visible cell on every repaint.
+DisplayRole = int(Qt.DisplayRole)
+EditRole = int(Qt.EditRole)
+UserRole = int(Qt.UserRole)
+OriginalTextRole = UserRole + 1
+StartFrameRole = UserRole + 2  # Absolute start frame of the row's subtitle (any column)
+LintFlagsRole = UserRole + 3   # Lint rule bits of the row (any column), 0 if clean or not linted
+BackgroundRole = int(Qt.BackgroundRole)
+ToolTipRole = int(Qt.ToolTipRole)
+
+# Background of rows that violate a lint rule.
+LINT_VIOLATION_COLOR = QColor("#fdecea")
+# Roles that only change how a row looks, never what it matches.
+LINT_ROLES = (BackgroundRole, ToolTipRole, LintFlagsRole)
+
+
+@functools.lru_cache(maxsize=4096)
+def diff_html(original_text, new_text):
+    """Diff highlighting HTML for a modified row, memoized per (original, new) pair."""
+    return ui_logic._generate_diff_html(original_text, new_text, ui_logic.DIFF_STYLE)
+
+
+def subtitle_id(sub: dict):
+    """Returns the identifier of a subtitle, whichever key its source uses."""
+    return sub.get('index', sub.get('id', ''))
+
+
+class SubtitleTableModel(QAbstractTableModel):
+    """Table model that reads rows directly from a list of subtitle dictionaries."""
+    OriginalTextRole = OriginalTextRole
+    StartFrameRole = StartFrameRole
+    LintFlagsRole = LintFlagsRole
+
+    # Emitted after the user edits a subtitle's text. Arguments: subtitle id, new clean text.
+    subtitleTextEdited = Signal(int, str)
+    # Emitted when the user edits an In or Out cell. Arguments: subtitle id, 'start' or 'end', typed text.
+    # The store is only changed once the edit has been applied (see timing_changed).
+    subtitleTimingEdited = Signal(int, str, str)
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._subtitles = []
+        self._original_text = {}  # row -> text before the first edit/replace
+        self._row_by_id = None
+        self._row_hashes = None    # subtitle_content_hash per row, computed on reload
+        self._source = None        # What the shown list was loaded from (see reload_subtitles)
+        self._lint_flags = None    # Lint rule bits per row, or None if not linted
+
+    # --- Store access ---
+
+    @property
+    def subtitles(self):
+        """The underlying subtitle list (shared with SubtitleManager, not a copy)."""
+        return self._subtitles
+
+    def set_subtitles(self, subtitles):
+        """Points the model at a new subtitle list. O(1) apart from the view reset."""
+        self.beginResetModel()
+        self._subtitles = subtitles if subtitles is not None else []
+        self._original_text = {}
+        self._row_by_id = None
+        self._row_hashes = None
+        self._lint_flags = None
+        self.endResetModel()
+
+    def reload_subtitles(self, subtitles, source=None):
+        """
+        Shows a reloaded copy of a track (after a refresh or reimport). `source`
+        identifies where the list came from, e.g. the track number; a list from a
+        different source than the one shown resets the view.
+
+        Otherwise the old and new rows are diffed by content hash and only
+        inserted, removed or modified rows are touched, so the selection, scroll
+        position and edit highlighting of every other row survive. Returns True
+        if the view was reset.
+        """
+        subtitles = subtitles if subtitles is not None else []
+        if subtitles is self._subtitles or source != self._source:
+            self.set_subtitles(subtitles)
+            self._source = source
+            return True
+
+        new_hashes = [subtitle_content_hash(sub) for sub in subtitles]
+        opcodes = text_diff.sequence_opcodes(self._content_hashes(), new_hashes)
+        if opcodes is None:
+            # Too many differences for row updates to beat a reset
+            self.set_subtitles(subtitles)
+            return True
+
+        # Rows are patched on a copy of the old list (which other tracks' caches may
+        # share), back to front so the positions of earlier opcodes stay valid.
+        self._subtitles = list(self._subtitles)
+        for tag, i1, i2, j1, j2 in reversed(opcodes):
+            if tag == 'equal':
+                continue
+            modified = min(i2 - i1, j2 - j1)
+            if i2 - i1 > modified:
+                self._remove_rows(i1 + modified, i2 - 1)
+            elif j2 - j1 > modified:
+                self._insert_rows(i1 + modified, subtitles[j1 + modified:j2], new_hashes[j1 + modified:j2])
+            if modified:
+                self._modify_rows(i1, subtitles[j1:j1 + modified], new_hashes[j1:j1 + modified])
+
+        # The patched copy now matches the new list row for row.
+        self._subtitles = subtitles
+        self._row_hashes = new_hashes
+        self._row_by_id = None
+        return False
+
+    def _remove_rows(self, first, last):
+        self.beginRemoveRows(QModelIndex(), first, last)
+        del self._subtitles[first:last + 1]
+        del self._row_hashes[first:last + 1]
+        if self._lint_flags is not None:
+            del self._lint_flags[first:last + 1]
+        self._shift_side_tables(first, last + 1, first - last - 1)
+        self.endRemoveRows()
+
+    def _insert_rows(self, row, subtitles, hashes):
+        self.beginInsertRows(QModelIndex(), row, row + len(subtitles) - 1)
+        self._subtitles[row:row] = subtitles
+        self._row_hashes[row:row] = hashes
+        if self._lint_flags is not None:
+            self._lint_flags[row:row] = [0] * len(subtitles)
+        self._shift_side_tables(row, row, len(subtitles))
+        self.endInsertRows()
+
+    def _modify_rows(self, first, subtitles, hashes):
+        last = first + len(subtitles) - 1
+        self._subtitles[first:last + 1] = subtitles
+        self._row_hashes[first:last + 1] = hashes
+        # A row whose content changed underneath loses its edit highlighting.
+        self._shift_side_tables(first, last + 1, 0)
+        self.dataChanged.emit(self.index(first, 0), self.index(last, len(COLUMN_HEADERS) - 1))
+
+    def set_lint_flags(self, flags):
+        """Shows lint results (rule bits per row, as from lint.lint_subtitles); None clears them."""
+        if flags is not None and len(flags) != len(self._subtitles):
+            raise ValueError("Lint results do not match the shown rows.")
+        self._lint_flags = list(flags) if flags is not None else None
+        if self._subtitles:
+            self.dataChanged.emit(self.index(0, 0), self.index(len(self._subtitles) - 1, len(COLUMN_HEADERS) - 1),
+                                  list(LINT_ROLES))
+
+    def timing_changed(self, first=0, last=None):
+        """Refreshes the In/Out/frame cells of rows first..last (default: all) after they were retimed."""
+        last = len(self._subtitles) - 1 if last is None else last
+        if last < first:
+            return
+        self._row_hashes = None
+        self.dataChanged.emit(self.index(first, IN_COLUMN), self.index(last, FRAME_COLUMN))
+
+    def _shift_side_tables(self, drop_from, shift_from, delta):
+        """Drops per-row UI state for rows in [drop_from, shift_from) and moves rows from `shift_from` on by `delta`."""
+        self._original_text = {
+            (row + delta if row >= shift_from else row): text
+            for row, text in self._original_text.items() if not drop_from <= row < shift_from
+        }
+
+    def _content_hashes(self):
+        if self._row_hashes is None:
+            self._row_hashes = [subtitle_content_hash(sub) for sub in self._subtitles]
+        return self._row_hashes
+
+    def _row_content_changed(self, row):
+        if self._row_hashes is not None:
+            self._row_hashes[row] = subtitle_content_hash(self._subtitles[row])
+
+    def row_for_id(self, item_id):
+        """Returns the row of the subtitle with the given id, or -1."""
+        if self._row_by_id is None:
+            self._row_by_id = {str(subtitle_id(sub)): row for row, sub in enumerate(self._subtitles)}
+        return self._row_by_id.get(str(item_id), -1)
+
+    def text_at(self, row):
+        return self._subtitles[row].get('text', '')
+
+    # --- QAbstractTableModel interface ---
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self._subtitles)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(COLUMN_HEADERS)
+
+    def headerData(self, section, orientation, role=DisplayRole):
+        if orientation == Qt.Horizontal and role == DisplayRole:
+            return COLUMN_HEADERS[section]
+        return None
+
+    def flags(self, index):
+        if not index.isValid():
+            return Qt.NoItemFlags
+        flags = Qt.ItemIsEnabled | Qt.ItemIsSelectable
+        if index.column() in EDITABLE_COLUMNS:
+            flags |= Qt.ItemIsEditable
+        return flags
+
+    def data(self, index, role=DisplayRole):
+        if not index.isValid():
+            return None
+        row, column = index.row(), index.column()
+        sub = self._subtitles[row]
+
+        if role == DisplayRole or role == EditRole:
+            if column == ID_COLUMN:
+                return str(subtitle_id(sub))
+            if column == LENGTH_COLUMN:
+                return str(len(sub.get('text', '')))
+            if column == TEXT_COLUMN:
+                text = sub.get('text', '')
+                if role == DisplayRole:
+                    original_text = self._original_text.get(row)
+                    if original_text is not None and original_text != text:
+                        return diff_html(original_text, text)
+                return text
+            if column == IN_COLUMN:
+                return sub.get('start', sub.get('in_timecode', ''))
+            if column == OUT_COLUMN:
+                return sub.get('end', sub.get('out_timecode', ''))
+            if column == FRAME_COLUMN:
+                return str(sub.get('in_frame', ''))
+        elif role == StartFrameRole:
+            return sub.get('in_frame')
+        elif role == LintFlagsRole:
+            return self._lint_flags[row] if self._lint_flags is not None else 0
+        elif role == BackgroundRole:
+            if self._lint_flags is not None and self._lint_flags[row]:
+                return LINT_VIOLATION_COLOR
+        elif role == ToolTipRole:
+            if self._lint_flags is not None and self._lint_flags[row]:
+                return "；".join(describe_flags(self._lint_flags[row]))
+        elif column == TEXT_COLUMN:
+            if role == UserRole:
+                return sub.get('text', '')
+            if role == OriginalTextRole:
+                return self._original_text.get(row)
+        return None
+
+    def setData(self, index, value, role=EditRole):
+        if not index.isValid() or role != EditRole:
+            return False
+        row, column = index.row(), index.column()
+
+        if column in (IN_COLUMN, OUT_COLUMN):
+            # Timing edits go through the retime engine, which validates and stores them.
+            try:
+                item_id = int(subtitle_id(self._subtitles[row]))
+            except (ValueError, TypeError):
+                return False
+            self.subtitleTimingEdited.emit(item_id, 'start' if column == IN_COLUMN else 'end', str(value))
+            return True
+        if column != TEXT_COLUMN:
+            return False
+
+        sub = self._subtitles[row]
+        original_text = self._original_text.get(row, sub.get('text', ''))
+        clean_new_text = clean_html(value)
+        sub['text'] = clean_new_text
+        if clean_new_text == original_text:
+            # Reverted to the original text: drop the highlighting
+            self._original_text.pop(row, None)
+        else:
+            self._original_text[row] = original_text
+        self._row_content_changed(row)
+        self.dataChanged.emit(self.index(row, LENGTH_COLUMN), self.index(row, TEXT_COLUMN))
+
+        try:
+            self.subtitleTextEdited.emit(int(subtitle_id(sub)), clean_new_text)
+        except (ValueError, TypeError):
+            pass
+        return True
+
+    # --- Replace highlighting ---
+
+    def apply_replacements(self, changes):
+        """
+        Shows diff highlighting for a list of {'index', 'old', 'new'} changes.
+        The diff base is the text before the row's first modification; the HTML
+        itself is built lazily in data(). Rows are resolved through the id map.
+        """
+        first_row = last_row = None
+        for change in changes:
+            row = self.row_for_id(change['index'])
+            if row < 0:
+                continue
+            self._original_text.setdefault(row, change['old'])
+            self._subtitles[row]['text'] = change['new']
+            self._row_content_changed(row)
+            first_row = row if first_row is None else min(first_row, row)
+            last_row = row if last_row is None else max(last_row, row)
+
+        if first_row is not None:
+            self.dataChanged.emit(self.index(first_row, LENGTH_COLUMN), self.index(last_row, TEXT_COLUMN))
+
+
+def _frame_range_matcher(frame_range):
+    """Predicate: does a subtitle show at any frame of `frame_range` [start, end)? None if no range."""
+    if frame_range is None:
+        return None
+    start, end = frame_range
+
+    def in_range(sub):
+        in_frame, out_frame = sub.get('in_frame'), sub.get('out_frame')
+        return in_frame is not None and out_frame is not None and in_frame < end and out_frame > start
+    return in_range
+
+
+class SubtitleFilterProxyModel(QAbstractProxyModel):
+    """
+    Shows only the rows that match the filter text/type, the find text and the
+    time range.
+
+    The accepted source rows are kept in a sorted list; with no active filter the
+    proxy is an identity mapping and costs nothing, so populating a track stays O(1).
+    Filtering is a single pass over a casefolded shadow copy of the texts instead of
+    one callback per row, and a query that only extends the previous one (typing
+    another character) re-checks just the rows that matched before.
+    """
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.search_text = ""
+        self.filter_type = ""
+        self.find_text = ""
+        self.find_options = FindOptions()
+        self.hide_all = False
+        self.pattern_error = None  # Message of the last invalid or timed-out pattern
+        self._visible_rows = None  # Sorted source rows, or None when every row is shown
+        self._folded_texts = None  # Casefolded text per source row, built on first filter
+        self._last_query = None    # The (query, frame range) `_visible_rows` was computed for
+        self.search_index = None   # Optional SubtitleSearchIndex covering the source rows
+        self.search_track = None
+        self._match_cache = None   # ((find text, options), sorted proxy rows matching it)
+        self._removing = False     # A beginRemoveRows is pending for a source removal
+        self.frame_range = None    # (start, end) frames a row must overlap to be shown
+        self._time_index = None    # SubtitleTimeIndex of the source rows, built on first time filter
+
+    # --- Filtering ---
+
+    def set_filter(self, search_text, filter_type, find_text, find_options=FindOptions(), frame_range=None):
+        # Hiding every row on populate only lasts until the next filter, as it always did.
+        self.hide_all = False
+        self.search_text = search_text
+        self.filter_type = filter_type
+        self.find_text = find_text
+        self.find_options = find_options
+        self.frame_range = frame_range
+        self._apply_visible_rows(self._compute_visible_rows())
+
+    def refresh(self):
+        """Re-applies the current criteria, e.g. after `hide_all` changed."""
+        self._apply_visible_rows(self._compute_visible_rows())
+
+    def set_search_index(self, search_index, track):
+        """
+        Uses `search_index` (rows of `track`, in source order) to find candidate rows
+        instead of checking every row. Pass None to disable.
+        """
+        self.search_index = search_index
+        self.search_track = track
+        self._last_query = None
+        self._match_cache = None
+
+    def _index_candidates(self, search_text, filter_type, find_text, find_options=FindOptions()):
+        """Sorted source rows that may match, according to the search index, or None."""
+        if self.search_index is None:
+            return None
+        candidates = None
+        if search_text and FILTER_TYPE_ALIASES.get(filter_type, filter_type) in ('Contains', 'Starts With', 'Ends With'):
+            candidates = self.search_index.candidates(self.search_track, search_text)
+        if find_text and not find_options.regex:
+            # The index is case-insensitive, so it also gives a superset for whole-word queries.
+            find_candidates = self.search_index.candidates(self.search_track, find_text)
+            if candidates is None:
+                candidates = find_candidates
+            elif find_candidates is not None:
+                candidates = sorted(set(candidates).intersection(find_candidates))
+        return candidates
+
+    def candidate_rows(self, text, find_options=FindOptions()):
+        """Sorted proxy rows whose text may match `text`, or None if unknown (check every row)."""
+        source_rows = self._index_candidates("", "", text, find_options) if text else None
+        if source_rows is None:
+            return None
+        if self._visible_rows is None:
+            return source_rows
+        proxy_rows = []
+        for row in source_rows:
+            position = bisect.bisect_left(self._visible_rows, row)
+            if position < len(self._visible_rows) and self._visible_rows[position] == row:
+                proxy_rows.append(position)
+        return proxy_rows
+
+    def match_rows(self, text, find_options=FindOptions()):
+        """
+        Sorted proxy rows whose text matches `text` with the given find options. The
+        list is cached until the query, the visible rows or the data change, so
+        stepping through matches is a bisect instead of a scan.
+        """
+        key = (text, find_options)
+        if self._match_cache is not None and self._match_cache[0] == key:
+            return self._match_cache[1]
+        source = self.sourceModel()
+        if not text or source is None:
+            return []
+        rows = self.candidate_rows(text, find_options)
+        if rows is None:
+            rows = range(self.rowCount())
+        subtitles, visible_rows = source.subtitles, self._visible_rows
+        try:
+            texts = [subtitles[row if visible_rows is None else visible_rows[row]].get('text', '') for row in rows]
+            matches = [row for row, found in zip(rows, find_matches(text, texts, find_options)) if found]
+        except PatternError as e:
+            self.pattern_error = str(e)
+            matches = []
+        self._match_cache = (key, matches)
+        return matches
+
+    def is_filtered(self):
+        return self.hide_all or bool(self.search_text) or bool(self.find_text) or self.frame_range is not None
+
+    def _time_candidates(self):
+        """Sorted source rows showing within `frame_range`, from the time index."""
+        if self._time_index is None:
+            self._time_index = SubtitleTimeIndex(self.sourceModel().subtitles)
+        return self._time_index.rows_in_range(*self.frame_range)
+
+    def _folded(self):
+        if self._folded_texts is None:
+            self._folded_texts = [sub.get('text', '').casefold() for sub in self.sourceModel().subtitles]
+        return self._folded_texts
+
+    def _compute_visible_rows(self):
+        source = self.sourceModel()
+        query = (self.search_text, self.filter_type, self.find_text, self.find_options)
+        frame_range = self.frame_range
+        last_query, self._last_query = self._last_query, None
+        self.pattern_error = None
+        if source is None or not self.is_filtered():
+            return None
+        if self.hide_all:
+            return []
+
+        if (last_query is not None and self._visible_rows is not None and last_query[1] == frame_range
+                and ui_logic.query_narrows(last_query[0], query)):
+            candidates = self._visible_rows
+        else:
+            candidates = self._index_candidates(*query)
+            if frame_range is not None:
+                time_candidates = self._time_candidates()
+                if candidates is not None:
+                    time_candidates = sorted(set(candidates).intersection(time_candidates))
+                candidates = time_candidates
+            if candidates is None:
+                candidates = range(len(source.subtitles))
+
+        try:
+            visible_rows = self._matching_rows(candidates)
+        except PatternError as e:
+            # Typically a half-typed regex: show nothing rather than everything.
+            self.pattern_error = str(e)
+            logger.debug("Filter pattern rejected: %s", e)
+            return []
+        self._last_query = (query, frame_range)
+        return visible_rows
+
+    def _matching_rows(self, candidates):
+        """The source rows among `candidates` that match the filter and find text. Raises PatternError."""
+        # Both predicates share one time budget, so a catastrophic regex cannot hang the UI.
+        guard = MatchGuard()
+        subtitles = self.sourceModel().subtitles
+        find_text = self.find_text
+        folded = self._folded()
+        in_range = _frame_range_matcher(self.frame_range)
+        rows = [row for row in candidates if in_range is None or in_range(subtitles[row])]
+        # Each predicate checks the surviving rows in one batch, so a regex costs one worker round trip.
+        texts = [subtitles[row].get('text', '') for row in rows]
+        folded_texts = [folded[row] for row in rows]
+        matched = ui_logic.match_texts(self.search_text, self.filter_type, texts, folded_texts, guard)
+        rows = [row for row, found in zip(rows, matched) if found]
+        if find_text:
+            texts = [subtitles[row].get('text', '') for row in rows]
+            matched = find_matches(find_text, texts, self.find_options, guard)
+            rows = [row for row, found in zip(rows, matched) if found]
+        return rows
+
+    def _apply_visible_rows(self, visible_rows):
+        """Swaps the row mapping while keeping selection and current index where possible."""
+        if visible_rows == self._visible_rows:
+            return  # Same rows as before: nothing for the view to relayout.
+        self._match_cache = None
+        self.layoutAboutToBeChanged.emit()
+        old_indexes = self.persistentIndexList()
+        source_indexes = [self.mapToSource(index) for index in old_indexes]
+        self._visible_rows = visible_rows
+        self.changePersistentIndexList(old_indexes, [self.mapFromSource(index) for index in source_indexes])
+        self.layoutChanged.emit()
+
+    # --- Source model wiring ---
+
+    def setSourceModel(self, source_model):
+        old_source = self.sourceModel()
+        if old_source is not None:
+            old_source.modelAboutToBeReset.disconnect(self.beginResetModel)
+            old_source.modelReset.disconnect(self._on_source_reset)
+            old_source.dataChanged.disconnect(self._on_source_data_changed)
+            old_source.rowsAboutToBeRemoved.disconnect(self._on_source_rows_about_to_be_removed)
+            old_source.rowsRemoved.disconnect(self._on_source_rows_removed)
+            old_source.rowsAboutToBeInserted.disconnect(self._on_source_rows_about_to_be_inserted)
+            old_source.rowsInserted.disconnect(self._on_source_rows_inserted)
+        self.beginResetModel()
+        super().setSourceModel(source_model)
+        self._match_cache = None
+        self._folded_texts = None
+        self._time_index = None
+        self._last_query = None
+        self._visible_rows = self._compute_visible_rows()
+        self.endResetModel()
+        source_model.modelAboutToBeReset.connect(self.beginResetModel)
+        source_model.modelReset.connect(self._on_source_reset)
+        source_model.dataChanged.connect(self._on_source_data_changed)
+        source_model.rowsAboutToBeRemoved.connect(self._on_source_rows_about_to_be_removed)
+        source_model.rowsRemoved.connect(self._on_source_rows_removed)
+        source_model.rowsAboutToBeInserted.connect(self._on_source_rows_about_to_be_inserted)
+        source_model.rowsInserted.connect(self._on_source_rows_inserted)
+
+    def _on_source_reset(self):
+        self._match_cache = None
+        self._folded_texts = None
+        self._time_index = None
+        self._last_query = None
+        self._visible_rows = self._compute_visible_rows()
+        self.endResetModel()
+
+    def _on_source_data_changed(self, top_left, bottom_right, roles=()):
+        # Lint colors change how rows look, not what they match: filter state stays valid.
+        if not (roles and all(role in LINT_ROLES for role in roles)):
+            if self._folded_texts is not None:
+                subtitles = self.sourceModel().subtitles
+                for row in range(top_left.row(), bottom_right.row() + 1):
+                    self._folded_texts[row] = subtitles[row].get('text', '').casefold()
+            # An edited row may now match a query it failed before, so the next filter
+            # must start from the whole track again.
+            self._last_query = None
+            self._time_index = None
+            self._match_cache = None
+
+        if self._visible_rows is None:
+            first, last = top_left.row(), bottom_right.row()
+        else:
+            # Rows stay put after an edit, like the old tree widget: only re-filtered on demand.
+            first = bisect.bisect_left(self._visible_rows, top_left.row())
+            last = bisect.bisect_right(self._visible_rows, bottom_right.row()) - 1
+            if first > last:
+                return
+        self.dataChanged.emit(
+            self.index(first, top_left.column()), self.index(last, bottom_right.column()), roles
+        )
+
+    def _proxy_range(self, first, last):
+        """Proxy rows [start, end) showing source rows first..last."""
+        if self._visible_rows is None:
+            return first, last + 1
+        return bisect.bisect_left(self._visible_rows, first), bisect.bisect_right(self._visible_rows, last)
+
+    def _on_source_rows_about_to_be_removed(self, parent, first, last):
+        start, end = self._proxy_range(first, last)
+        self._removing = start < end
+        if self._removing:
+            self.beginRemoveRows(QModelIndex(), start, end - 1)
+
+    def _on_source_rows_removed(self, parent, first, last):
+        count = last - first + 1
+        if self._folded_texts is not None:
+            del self._folded_texts[first:last + 1]
+        self._time_index = None
+        if self._visible_rows is not None:
+            start, end = self._proxy_range(first, last)
+            self._visible_rows = self._visible_rows[:start] + [row - count for row in self._visible_rows[end:]]
+        self._last_query = None
+        self._match_cache = None
+        if self._removing:
+            self.endRemoveRows()
+
+    def _on_source_rows_about_to_be_inserted(self, parent, first, last):
+        if self._visible_rows is None:
+            self.beginInsertRows(QModelIndex(), first, last)
+
+    def _on_source_rows_inserted(self, parent, first, last):
+        count = last - first + 1
+        if self._folded_texts is not None:
+            subtitles = self.sourceModel().subtitles
+            self._folded_texts[first:first] = [sub.get('text', '').casefold() for sub in subtitles[first:last + 1]]
+        self._time_index = None
+        self._last_query = None
+        self._match_cache = None
+        if self._visible_rows is None:
+            self.endInsertRows()
+            return
+
+        # Rows after the insertion point move down; new rows appear only if they match.
+        start = bisect.bisect_left(self._visible_rows, first)
+        self._visible_rows[start:] = [row + count for row in self._visible_rows[start:]]
+        try:
+            new_rows = [] if self.hide_all else self._matching_rows(range(first, last + 1))
+        except PatternError:
+            new_rows = []
+        if new_rows:
+            self.beginInsertRows(QModelIndex(), start, start + len(new_rows) - 1)
+            self._visible_rows[start:start] = new_rows
+            self.endInsertRows()
+
+    # --- QAbstractProxyModel interface ---
+
+    def mapToSource(self, proxy_index):
+        source = self.sourceModel()
+        if source is None or not proxy_index.isValid():
+            return QModelIndex()
+        row = proxy_index.row()
+        if self._visible_rows is not None:
+            row = self._visible_rows[row]
+        return source.index(row, proxy_index.column())
+
+    def mapFromSource(self, source_index):
+        if not source_index.isValid():
+            return QModelIndex()
+        row = source_index.row()
+        if self._visible_rows is not None:
+            position = bisect.bisect_left(self._visible_rows, row)
+            if position == len(self._visible_rows) or self._visible_rows[position] != row:
+                return QModelIndex()
+            row = position
+        return self.index(row, source_index.column())
+
+    def index(self, row, column, parent=QModelIndex()):
+        if parent.isValid() or row < 0 or column < 0 or row >= self.rowCount() or column >= self.columnCount():
+            return QModelIndex()
+        return self.createIndex(row, column)
+
+    def parent(self, index=QModelIndex()):
+        return QModelIndex()
+
+    def rowCount(self, parent=QModelIndex()):
+        source = self.sourceModel()
+        if parent.isValid() or source is None:
+            return 0
+        if self._visible_rows is not None:
+            return len(self._visible_rows)
+        return source.rowCount()
+
+    def columnCount(self, parent=QModelIndex()):
+        source = self.sourceModel()
+        return 0 if parent.isValid() or source is None else source.columnCount()
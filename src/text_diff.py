@@ -0,0 +1,295 @@
+# text_diff.py
+"""
+Character-level diff used for edit and replace highlighting.
+
+`diff_opcodes` returns difflib-style opcodes (tag, i1, i2, j1, j2) computed with
+Myers' O(ND) algorithm, where D is the number of edits. Subtitle edits are small
+and local, so after stripping the common prefix and suffix (usually most of the
+line) there is little left to compare. Unlike `difflib.SequenceMatcher` there is
+no autojunk heuristic, which treats frequent characters as junk and produces
+poor diffs on repetitive CJK text.
+
+Text is compared by grapheme cluster, so a combining accent, an emoji with a skin
+tone or a ZWJ sequence is never split across a highlight boundary. Opcode offsets
+are code-point indices into the original strings, as with difflib.
+"""
+import re
+import unicodedata
+
+# Beyond this many edits the middle section is reported as a single replace:
+# the texts have little in common and a finer diff would not be readable anyway.
+MAX_EDIT_DISTANCE = 400
+
+_ZWJ = '\u200d'
+
+# Text made only of these characters (ASCII, Latin-1, kana without the combining
+# voicing marks, CJK ideographs, Hangul syllables, full-width forms) is one
+# cluster per code point.
+_SIMPLE_TEXT_RE = re.compile('[\x00-\x0c\x0e-\xff\u3000-\u3098\u309b-\u30ff\u4e00-\u9fff\uac00-\ud7a3\uff00-\uffef]*')
+
+
+def _is_regional_indicator(ch):
+    return '\U0001F1E6' <= ch <= '\U0001F1FF'
+
+
+def _extends_cluster(cluster, ch):
+    """True if `ch` continues the grapheme cluster `cluster` instead of starting a new one."""
+    if cluster[-1] == _ZWJ or (cluster == '\r' and ch == '\n'):
+        return True
+    if ch == _ZWJ or '\ufe00' <= ch <= '\ufe0f' or '\U0001F3FB' <= ch <= '\U0001F3FF':
+        return True  # Joiner, variation selector or emoji skin tone modifier
+    if _is_regional_indicator(ch):
+        # Flags are pairs of regional indicators
+        return len(cluster) == 1 and _is_regional_indicator(cluster)
+    return unicodedata.category(ch) in ('Mn', 'Me', 'Mc')
+
+
+def graphemes(text: str) -> list:
+    """Splits text into (approximate extended) grapheme clusters."""
+    if _SIMPLE_TEXT_RE.fullmatch(text):
+        return list(text)
+    clusters = []
+    for ch in text:
+        if clusters and _extends_cluster(clusters[-1], ch):
+            clusters[-1] += ch
+        else:
+            clusters.append(ch)
+    return clusters
+
+
+def _myers_script(a, b):
+    """
+    Shortest edit script between sequences `a` and `b` as a list of
+    ('equal' | 'delete' | 'insert') steps, or None if it needs more than
+    MAX_EDIT_DISTANCE edits.
+    """
+    n, m = len(a), len(b)
+    max_d = min(n + m, MAX_EDIT_DISTANCE)
+    offset = max_d + 1
+    v = [0] * (2 * max_d + 3)
+    trace = []
+    for d in range(max_d + 1):
+        trace.append(v[:])
+        for k in range(-d, d + 1, 2):
+            if k == -d or (k != d and v[offset + k - 1] < v[offset + k + 1]):
+                x = v[offset + k + 1]      # Step down: insertion
+            else:
+                x = v[offset + k - 1] + 1  # Step right: deletion
+            y = x - k
+            while x < n and y < m and a[x] == b[y]:
+                x += 1
+                y += 1
+            v[offset + k] = x
+            if x >= n and y >= m:
+                return _backtrack(trace, offset, n, m)
+    return None
+
+
+def _backtrack(trace, offset, x, y):
+    script = []
+    for d in range(len(trace) - 1, -1, -1):
+        v = trace[d]
+        k = x - y
+        if k == -d or (k != d and v[offset + k - 1] < v[offset + k + 1]):
+            prev_k = k + 1
+        else:
+            prev_k = k - 1
+        prev_x = v[offset + prev_k]
+        prev_y = prev_x - prev_k
+        while x > prev_x and y > prev_y:
+            script.append('equal')
+            x -= 1
+            y -= 1
+        if d > 0:
+            script.append('insert' if x == prev_x else 'delete')
+        x, y = prev_x, prev_y
+    script.reverse()
+    return script
+
+
+def _slide_hunks(script, a, b):
+    """
+    Moves each pure insertion or deletion next to the longest unchanged run it can
+    join. A shortest edit script often has several equally short placements
+    ("Hello |Python |world" vs "Hello| Python| world"); difflib prefers the one
+    that keeps the longest match contiguous, and so does this.
+    """
+    position = i = j = 0
+    while position < len(script):
+        step = script[position]
+        if step == 'equal':
+            i += 1
+            j += 1
+            position += 1
+            continue
+        end = position
+        while end < len(script) and script[end] == step:
+            end += 1
+        if end < len(script) and script[end] != 'equal':
+            # Mixed replace hunk: cannot slide
+            while position < len(script) and script[position] != 'equal':
+                if script[position] == 'delete':
+                    i += 1
+                else:
+                    j += 1
+                position += 1
+            continue
+
+        seq, start = (b, j) if step == 'insert' else (a, i)
+        length = end - position
+        left_run = 0
+        while position - left_run > 0 and script[position - left_run - 1] == 'equal':
+            left_run += 1
+        right_run = 0
+        while end + right_run < len(script) and script[end + right_run] == 'equal':
+            right_run += 1
+        max_left = 0
+        while max_left < left_run and seq[start - max_left - 1] == seq[start + length - max_left - 1]:
+            max_left += 1
+        max_right = 0
+        while max_right < right_run and seq[start + max_right] == seq[start + length + max_right]:
+            max_right += 1
+
+        shift = 0
+        if right_run + max_left > left_run + max_right:
+            shift = -max_left
+        elif left_run + max_right > right_run + max_left:
+            shift = max_right
+        if shift:
+            new_start = position + shift
+            script[position:end] = ['equal'] * length
+            script[new_start:new_start + length] = [step] * length
+        # Continue after the (possibly moved) hunk
+        position = position + shift + length
+        if step == 'insert':
+            i, j = i + shift, j + shift + length
+        else:
+            i, j = i + shift + length, j + shift
+    return script
+
+
+def _group_script(script, i, j):
+    """
+    Groups edit steps into opcodes over grapheme indices, starting at (i, j).
+    Adjacent deletions and insertions become a single 'replace', as in difflib.
+    """
+    opcodes = []
+    position = 0
+    while position < len(script):
+        i1, j1 = i, j
+        if script[position] == 'equal':
+            while position < len(script) and script[position] == 'equal':
+                i += 1
+                j += 1
+                position += 1
+            opcodes.append(('equal', i1, i, j1, j))
+            continue
+        while position < len(script) and script[position] != 'equal':
+            if script[position] == 'delete':
+                i += 1
+            else:
+                j += 1
+            position += 1
+        tag = 'replace' if i > i1 and j > j1 else ('delete' if i > i1 else 'insert')
+        opcodes.append((tag, i1, i, j1, j))
+    return opcodes
+
+
+def _common_affixes(a, b):
+    """Lengths of the common prefix and (non-overlapping) common suffix of `a` and `b`."""
+    prefix = 0
+    limit = min(len(a), len(b))
+    while prefix < limit and a[prefix] == b[prefix]:
+        prefix += 1
+    suffix = 0
+    limit -= prefix
+    while suffix < limit and a[-1 - suffix] == b[-1 - suffix]:
+        suffix += 1
+    return prefix, suffix
+
+
+def _edit_script(a, b, fallback=False):
+    """
+    Edit script over whole sequences `a` and `b`, common prefix and suffix included.
+    If the middle needs more than MAX_EDIT_DISTANCE edits, returns None, or with
+    `fallback` a script replacing the whole middle.
+    """
+    prefix, suffix = _common_affixes(a, b)
+    middle_a, middle_b = a[prefix:len(a) - suffix], b[prefix:len(b) - suffix]
+    script = _myers_script(middle_a, middle_b)
+    if script is None:
+        if not fallback:
+            return None
+        script = ['delete'] * len(middle_a) + ['insert'] * len(middle_b)
+    return ['equal'] * prefix + script + ['equal'] * suffix
+
+
+def sequence_opcodes(a, b):
+    """
+    Opcodes turning sequence `a` into sequence `b` (of any comparable items, such
+    as row hashes), or None if they differ in more than MAX_EDIT_DISTANCE places.
+    """
+    script = _edit_script(a, b)
+    if script is None:
+        return None
+    return _group_script(script, 0, 0)
+
+
+def diff_opcodes(original_text: str, new_text: str) -> list:
+    """
+    Opcodes (tag, i1, i2, j1, j2) turning `original_text` into `new_text`, with
+    tags 'equal', 'replace', 'delete' and 'insert' and code-point offsets.
+    """
+    if original_text == new_text:
+        return [('equal', 0, len(original_text), 0, len(new_text))] if original_text else []
+    a, b = graphemes(original_text), graphemes(new_text)
+
+    script = _edit_script(a, b, fallback=True)
+    opcodes = _group_script(_slide_hunks(script, a, b), 0, 0)
+
+    if len(a) == len(original_text) and len(b) == len(new_text):
+        return opcodes
+    # Map grapheme indices back to code-point offsets
+    a_offsets, b_offsets = _offsets(a), _offsets(b)
+    return [(tag, a_offsets[i1], a_offsets[i2], b_offsets[j1], b_offsets[j2])
+            for tag, i1, i2, j1, j2 in opcodes]
+
+
+def _offsets(clusters):
+    offsets = [0]
+    for cluster in clusters:
+        offsets.append(offsets[-1] + len(cluster))
+    return offsets
+
+
+if __name__ == "__main__":
+    # Benchmark against difflib on typical subtitle edits:
+    #   python -m src.text_diff
+    import difflib
+    import random
+    import timeit
+
+    random.seed(7)
+    words = ["the", "door", "is", "open", "we", "should", "go", "now", "before", "they", "come", "back"]
+    cjk = "我们现在就走吧他们马上回来门是开着的的的了了"
+    cases = {}
+    latin = [" ".join(random.choice(words) for _ in range(12)) for _ in range(200)]
+    cases["latin word swap"] = [(t, t.replace("door", "gate", 1)) for t in latin]
+    chinese = ["".join(random.choice(cjk) for _ in range(30)) for _ in range(200)]
+    cases["cjk one-char fix"] = [(t, t[:10] + "门" + t[11:]) for t in chinese]
+    repetitive = ["哈" * 60 + "好的" + "哈" * 60 for _ in range(200)]
+    cases["repetitive cjk"] = [(t, t.replace("好的", "好吧")) for t in repetitive]
+    cases["full rewrite"] = [(a, b) for a, b in zip(latin, reversed(latin))]
+
+    def run_difflib(pairs):
+        for a, b in pairs:
+            difflib.SequenceMatcher(None, a, b).get_opcodes()
+
+    def run_myers(pairs):
+        for a, b in pairs:
+            diff_opcodes(a, b)
+
+    for name, pairs in cases.items():
+        old = min(timeit.repeat(lambda: run_difflib(pairs), number=5, repeat=3)) / (5 * len(pairs))
+        new = min(timeit.repeat(lambda: run_myers(pairs), number=5, repeat=3)) / (5 * len(pairs))
+        print(f"{name:18s} difflib {old * 1e6:8.1f} us   myers {new * 1e6:8.1f} us   x{old / new:5.1f}")
@@ -0,0 +1,136 @@
+# time_index.py
+"""
+Lookup of subtitles by timeline frame.
+
+`SubtitleTimeIndex` keeps a track's subtitles sorted by start frame, with a
+max-end segment tree over that order (an implicit, balanced augmented interval
+tree). Built by SubtitleManager from the 'in_frame'/'out_frame' of each row, it
+answers:
+
+- the subtitle at a frame (`row_at`),
+- the subtitles intersecting a frame range (`rows_in_range`),
+- overlapping pairs (`overlaps`) and short gaps (`gaps`) for timing QC,
+
+in O(log n) per lookup plus the size of the result, instead of a scan (or, for
+overlaps, an O(n²) comparison of every pair). Ranges are half-open: a subtitle
+covers the frames `in_frame <= f < out_frame`.
+"""
+import bisect
+import heapq
+from typing import NamedTuple
+
+# Delivery specs ask for at least this many frames between consecutive subtitles.
+DEFAULT_MIN_GAP_FRAMES = 2
+
+
+class TimingIssue(NamedTuple):
+    """An overlap or a too-short gap between the subtitles at two rows."""
+    kind: str          # 'overlap' or 'gap'
+    first_row: int
+    second_row: int
+    frames: int        # Frames of overlap, or of the gap
+
+
+class SubtitleTimeIndex:
+    """Subtitle rows sorted by start frame, with the latest end per subtree."""
+
+    def __init__(self, subtitles):
+        self.subtitles = subtitles
+        entries = sorted(
+            (sub['in_frame'], sub['out_frame'], row)
+            for row, sub in enumerate(subtitles)
+            if sub.get('in_frame') is not None and sub.get('out_frame') is not None
+        )
+        self.starts = [start for start, _, _ in entries]
+        self.ends = [end for _, end, _ in entries]
+        self.rows = [row for _, _, row in entries]
+
+        # Segment tree of max end frames: leaves at [size, size + n), node i covers
+        # its children 2i and 2i+1. A subtree whose max end is at or before a frame
+        # holds no subtitle showing after it and is skipped whole.
+        size = 1
+        while size < len(entries):
+            size *= 2
+        self._size = size
+        tree = [float('-inf')] * (2 * size)
+        tree[size:size + len(entries)] = self.ends
+        for node in range(size - 1, 0, -1):
+            tree[node] = max(tree[2 * node], tree[2 * node + 1])
+        self._max_end = tree
+
+    def __len__(self):
+        return len(self.rows)
+
+    def _positions_ending_after(self, frame, limit):
+        """
+        Positions (in start order) below `limit` whose end is after `frame`, latest
+        start first. Lazily walks only the subtrees that contain such a position.
+        """
+        tree, size = self._max_end, self._size
+        if limit <= 0 or tree[1] <= frame:
+            return
+        stack = [(1, 0, size)]
+        while stack:
+            node, low, high = stack.pop()
+            if low >= limit or tree[node] <= frame:
+                continue
+            if node >= size:
+                yield node - size
+                continue
+            middle = (low + high) // 2
+            # Left pushed first so the right (later) half is visited first.
+            stack.append((2 * node, low, middle))
+            stack.append((2 * node + 1, middle, high))
+
+    def row_at(self, frame):
+        """
+        Row of the subtitle showing at `frame` (start <= frame < end), or None. If
+        subtitles overlap, the one that started last wins.
+        """
+        limit = bisect.bisect_right(self.starts, frame)
+        for position in self._positions_ending_after(frame, limit):
+            return self.rows[position]
+        return None
+
+    def rows_in_range(self, start, end):
+        """Sorted rows of the subtitles showing at any frame of [start, end)."""
+        if end <= start:
+            return []
+        limit = bisect.bisect_left(self.starts, end)
+        return sorted(self.rows[position] for position in self._positions_ending_after(start, limit))
+
+    def overlaps(self):
+        """
+        Every pair of subtitles showing at the same time, as 'overlap' TimingIssues
+        in start order. A sweep over the start order: O(n log n + pairs).
+        """
+        issues = []
+        active = []  # Heap of (end, position) of subtitles started but not yet ended
+        for position, (start, end) in enumerate(zip(self.starts, self.ends)):
+            while active and active[0][0] <= start:
+                heapq.heappop(active)
+            for other_end, other in sorted(active, key=lambda item: item[1]):
+                issues.append(TimingIssue('overlap', self.rows[other], self.rows[position],
+                                          min(end, other_end) - start))
+            heapq.heappush(active, (end, position))
+        return issues
+
+    def gaps(self, min_gap=DEFAULT_MIN_GAP_FRAMES):
+        """
+        Gaps of fewer than `min_gap` frames (but more than zero) between one
+        subtitle's end and the next subtitle's start, as 'gap' TimingIssues.
+        Subtitles that touch or overlap are not gaps.
+        """
+        issues = []
+        latest_end, latest_position = None, None
+        for position, (start, end) in enumerate(zip(self.starts, self.ends)):
+            if latest_end is not None and 0 < start - latest_end < min_gap:
+                issues.append(TimingIssue('gap', self.rows[latest_position], self.rows[position],
+                                          start - latest_end))
+            if latest_end is None or end > latest_end:
+                latest_end, latest_position = end, position
+        return issues
+
+    def timing_issues(self, min_gap=DEFAULT_MIN_GAP_FRAMES):
+        """Overlaps and short gaps, ordered by the row they start at."""
+        return sorted(self.overlaps() + self.gaps(min_gap), key=lambda issue: (issue.second_row, issue.first_row))
@@ -4,8 +4,22 @@ A static utility class for handling timecode conversions using the 'timecode' li
 This module simplifies the process of converting between timecode strings, frame counts,
 and SRT time formats. All methods are static and do not require an instance of the class.
 """
+from typing import NamedTuple
+
 from timecode import Timecode
 
+
+class Timebase(NamedTuple):
+    """A timeline's frame rate and whether its timecode is drop-frame."""
+    frame_rate: float
+    drop_frame: bool = False
+
+    @property
+    def nominal_fps(self) -> int:
+        """The integer rate timecode counts in (24 for 23.976, 30 for 29.97)."""
+        return int(round(self.frame_rate))
+
+
 class TimecodeUtils:
     """A collection of static methods for timecode conversion."""
 
@@ -76,4 +90,61 @@ class TimecodeUtils:
             return int(round(total_seconds * frame_rate))
             
         except (ValueError, TypeError) as e:
-            raise ValueError(f"Invalid SRT time format '{srt_time}'. Expected HH:MM:SS,ms. Original error: {e}")
\ No newline at end of file
+            raise ValueError(f"Invalid SRT time format '{srt_time}'. Expected HH:MM:SS,ms. Original error: {e}")
+
+    @staticmethod
+    def smpte_from_frame(frame: int, timebase: Timebase) -> str:
+        """
+        Converts a frame count to an SMPTE timecode string ('HH:MM:SS:FF', or
+        'HH:MM:SS;FF' for drop-frame) with integer arithmetic only. Equivalent to
+        timecode_from_frame, without building a Timecode object per call.
+        """
+        if frame < 0:
+            raise ValueError("Frame number cannot be negative.")
+        fps = timebase.nominal_fps
+        separator = ':'
+        if timebase.drop_frame and fps in (30, 60):
+            # Drop-frame skips the first 2 (or 4) frame numbers of every minute
+            # except each tenth minute.
+            dropped = fps // 15
+            frames_per_minute = fps * 60 - dropped
+            frames_per_10_minutes = frames_per_minute * 10 + dropped
+            tens, remainder = divmod(frame, frames_per_10_minutes)
+            frame += dropped * 9 * tens
+            if remainder > dropped:
+                frame += dropped * ((remainder - dropped) // frames_per_minute)
+            separator = ';'
+        seconds, frames = divmod(frame, fps)
+        minutes, seconds = divmod(seconds, 60)
+        hours, minutes = divmod(minutes, 60)
+        hours %= 24  # Timecode wraps at 24 hours
+        return f"{hours:02d}:{minutes:02d}:{seconds:02d}{separator}{frames:02d}"
+
+    @staticmethod
+    def frame_from_smpte(timecode_str: str, timebase: Timebase) -> int:
+        """
+        Converts an SMPTE timecode string to a frame count; the inverse of
+        smpte_from_frame. A ';' before the frames marks drop-frame timecode.
+        """
+        try:
+            hours, minutes, seconds, frames = (int(part) for part in timecode_str.replace(';', ':').split(':'))
+        except (AttributeError, ValueError) as e:
+            raise ValueError(f"Invalid SMPTE timecode '{timecode_str}': {e}")
+        fps = timebase.nominal_fps
+        frame = ((hours * 60 + minutes) * 60 + seconds) * fps + frames
+        if (';' in timecode_str or timebase.drop_frame) and fps in (30, 60):
+            total_minutes = hours * 60 + minutes
+            frame -= (fps // 15) * (total_minutes - total_minutes // 10)
+        return frame
+
+    @staticmethod
+    def frame_from_time_input(time_str: str, timebase: Timebase) -> int:
+        """
+        Converts a time typed by the user to a frame count: either the SRT format
+        shown in the table ('HH:MM:SS,mmm') or SMPTE timecode ('HH:MM:SS:FF').
+        Raises ValueError for anything else.
+        """
+        time_str = time_str.strip()
+        if ',' in time_str or '.' in time_str:
+            return TimecodeUtils.timecode_to_frames(time_str, timebase.frame_rate)
+        return TimecodeUtils.frame_from_smpte(time_str, timebase)
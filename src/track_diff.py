@@ -0,0 +1,175 @@
+# track_diff.py
+"""
+Structural diff between a track as it is in Resolve and its edited cache, for
+review before the cache is exported back.
+
+Each subtitle is reduced to a cue (in frame, out frame, clean text). The two cue
+sequences are aligned with the Myers O(ND) diff of text_diff, keyed on the text
+hash first: a retimed subtitle keeps its text, so a shift of the whole track is
+still a sequence of equal entries, each with new frames. If the texts differ in
+too many places (a replace-all over the whole track), the sequences are aligned
+on their frames instead, and as a last resort every unmatched cue is paired up
+by identical frames or identical text in one linear pass.
+
+Every difference is a DiffEntry: 'inserted', 'deleted', 'retimed' (same text,
+new frames) or 'retexted' (same frames, new text). A subtitle that changed both
+is reported as deleted and inserted.
+"""
+from typing import NamedTuple, Optional
+
+from .subtitle_store import SubtitleTrack
+from .text_diff import sequence_opcodes
+from .utils import clean_html
+
+INSERTED = 'inserted'
+DELETED = 'deleted'
+RETIMED = 'retimed'
+RETEXTED = 'retexted'
+
+CHANGE_LABELS = {
+    INSERTED: "新增",
+    DELETED: "删除",
+    RETIMED: "调整时间",
+    RETEXTED: "修改文本",
+}
+
+
+class Cue(NamedTuple):
+    in_frame: Optional[int]
+    out_frame: Optional[int]
+    text: str
+
+
+class DiffEntry(NamedTuple):
+    """One changed subtitle. Rows are positions in the Resolve (old) and edited (new) lists."""
+    kind: str
+    old_row: Optional[int]   # None for an insertion
+    new_row: Optional[int]   # None for a deletion
+    old: Optional[Cue]
+    new: Optional[Cue]
+
+
+class TrackDiff(NamedTuple):
+    entries: list
+    old_count: int
+    new_count: int
+
+    def counts(self):
+        """{kind: number of entries}, in CHANGE_LABELS order, for the kinds present."""
+        counts = {kind: 0 for kind in CHANGE_LABELS}
+        for entry in self.entries:
+            counts[entry.kind] += 1
+        return {kind: count for kind, count in counts.items() if count}
+
+    def to_report(self):
+        """The diff as JSON-serializable data."""
+        def cue_data(cue):
+            return None if cue is None else {'in_frame': cue.in_frame, 'out_frame': cue.out_frame, 'text': cue.text}
+        return {
+            'old_count': self.old_count,
+            'new_count': self.new_count,
+            'counts': self.counts(),
+            'changes': [
+                {'kind': entry.kind, 'old_row': entry.old_row, 'new_row': entry.new_row,
+                 'old': cue_data(entry.old), 'new': cue_data(entry.new)}
+                for entry in self.entries
+            ],
+        }
+
+
+def _cues(subtitles):
+    """The cue of every subtitle, in list order."""
+    if isinstance(subtitles, SubtitleTrack):
+        # Frames are columns (-1 when stored elsewhere); texts only need cleaning if they contain tags.
+        return [
+            Cue(start if start >= 0 else subtitles.get_value(row, 'in_frame'),
+                end if end >= 0 else subtitles.get_value(row, 'out_frame'),
+                clean_html(text) if '<' in text else text)
+            for row, (start, end, text) in enumerate(zip(subtitles.in_frames, subtitles.out_frames, subtitles.texts))
+        ]
+    cues = []
+    for sub in subtitles:
+        text = sub.get('text', '')
+        cues.append(Cue(sub.get('in_frame'), sub.get('out_frame'), clean_html(text) if '<' in text else text))
+    return cues
+
+
+def _frames_key(cue):
+    return None if cue.in_frame is None or cue.out_frame is None else (cue.in_frame, cue.out_frame)
+
+
+def _text_key(cue):
+    return cue.text
+
+
+def _change(i, j, old, new):
+    """The entry for old cue `i` matched with new cue `j`, or None if they are the same."""
+    if old == new:
+        return None
+    if _frames_key(old) is not None and (old.in_frame, old.out_frame) == (new.in_frame, new.out_frame):
+        return DiffEntry(RETEXTED, i, j, old, new)
+    if old.text == new.text:
+        return DiffEntry(RETIMED, i, j, old, new)
+    return None
+
+
+def _hunk_entries(a, b, i1, i2, j1, j2):
+    """
+    Entries for a changed region a[i1:i2] -> b[j1:j2], in time order. Cues with
+    the same frames, then cues with the same text, are paired in order; the rest
+    are deletions and insertions.
+    """
+    entries = []
+    old_rows, new_rows = list(range(i1, i2)), list(range(j1, j2))
+    for key in (_frames_key, _text_key):
+        waiting = {}
+        for i in reversed(old_rows):
+            waiting.setdefault(key(a[i]), []).append(i)
+        waiting.pop(None, None)
+        paired, unpaired_new = set(), []
+        for j in new_rows:
+            rows = waiting.get(key(b[j]))
+            if not rows:
+                unpaired_new.append(j)
+                continue
+            i = rows.pop()
+            paired.add(i)
+            entry = _change(i, j, a[i], b[j])
+            if entry is not None:
+                entries.append(entry)
+        old_rows, new_rows = [i for i in old_rows if i not in paired], unpaired_new
+    entries.extend(DiffEntry(DELETED, i, None, a[i], None) for i in old_rows)
+    entries.extend(DiffEntry(INSERTED, None, j, None, b[j]) for j in new_rows)
+    entries.sort(key=_entry_order)
+    return entries
+
+
+def _entry_order(entry):
+    cue = entry.new or entry.old
+    return (cue.in_frame is None, cue.in_frame or 0, entry.old_row is None)
+
+
+def diff_tracks(old, new):
+    """
+    The changes from `old` (the subtitles in Resolve) to `new` (the edited cache),
+    either a list of subtitle dicts or a SubtitleTrack. Returns a TrackDiff.
+    """
+    a, b = _cues(old), _cues(new)
+    for key in (_text_key, _frames_key):
+        opcodes = sequence_opcodes([key(cue) for cue in a], [key(cue) for cue in b])
+        if opcodes is not None:
+            break
+    else:
+        opcodes = [('replace', 0, len(a), 0, len(b))]
+
+    entries = []
+    for tag, i1, i2, j1, j2 in opcodes:
+        if tag != 'equal':
+            entries.extend(_hunk_entries(a, b, i1, i2, j1, j2))
+            continue
+        for i, j in zip(range(i1, i2), range(j1, j2)):
+            if a[i] != b[j]:
+                entry = _change(i, j, a[i], b[j])
+                # Equal keys but both fields changed (untimed cues): not the same subtitle.
+                entries.extend([entry] if entry is not None else _hunk_entries(a, b, i, i + 1, j, j + 1))
+    return TrackDiff(entries, len(a), len(b))
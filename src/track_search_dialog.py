@@ -0,0 +1,102 @@
+# track_search_dialog.py
+"""
+Results of a search across every fetched track (see SubtitleManager.search_all_tracks).
+"""
+from PySide6.QtCore import Qt, QAbstractTableModel, QModelIndex
+from PySide6.QtWidgets import (
+    QDialog,
+    QVBoxLayout,
+    QHBoxLayout,
+    QLabel,
+    QPushButton,
+    QTableView,
+    QHeaderView,
+    QAbstractItemView,
+)
+
+SEARCH_HEADERS = ['轨道', '#', '时间', '字幕']
+TRACK_COLUMN, ID_COLUMN, TIME_COLUMN, TEXT_COLUMN = range(len(SEARCH_HEADERS))
+
+DisplayRole = int(Qt.DisplayRole)
+
+
+def track_label(track_index):
+    """'ST n' for a Resolve track, 'SRT' for an imported file (track 0)."""
+    return f"ST {track_index}" if track_index else "SRT"
+
+
+class TrackSearchModel(QAbstractTableModel):
+    """One row per (track_index, subtitle) result; cell texts are built when a row is painted."""
+
+    def __init__(self, results, parent=None):
+        super().__init__(parent)
+        self.results = results
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.results)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(SEARCH_HEADERS)
+
+    def headerData(self, section, orientation, role=DisplayRole):
+        if orientation == Qt.Horizontal and role == DisplayRole:
+            return SEARCH_HEADERS[section]
+        return None
+
+    def data(self, index, role=DisplayRole):
+        if not index.isValid() or role != DisplayRole:
+            return None
+        track, subtitle = self.results[index.row()]
+        column = index.column()
+        if column == TRACK_COLUMN:
+            return track_label(track)
+        if column == ID_COLUMN:
+            return str(subtitle['index'])
+        if column == TIME_COLUMN:
+            return f"{subtitle['start']} → {subtitle['end']}"
+        if column == TEXT_COLUMN:
+            return subtitle['text']
+        return None
+
+
+class TrackSearchDialog(QDialog):
+    """Lists the matches with a summary line; double-clicking a result jumps to it."""
+
+    def __init__(self, results, title, parent=None):
+        super().__init__(parent)
+        self.setWindowTitle(title)
+        self.resize(900, 600)
+        self.model = TrackSearchModel(results, self)
+
+        self.summary_label = QLabel(self._summary(results))
+        self.table = QTableView()
+        self.table.setModel(self.model)
+        self.table.setSelectionBehavior(QAbstractItemView.SelectRows)
+        self.table.setEditTriggers(QAbstractItemView.NoEditTriggers)
+        self.table.setWordWrap(True)
+        self.table.verticalHeader().setVisible(False)
+        # Fixed widths from the font: ResizeToContents would measure every row.
+        header = self.table.horizontalHeader()
+        font_metrics = self.table.fontMetrics()
+        for column, sample in ((TRACK_COLUMN, "ST 00"), (ID_COLUMN, "00000"),
+                               (TIME_COLUMN, "00:00:00,000 → 00:00:00,000")):
+            header.setSectionResizeMode(column, QHeaderView.Fixed)
+            header.resizeSection(column, font_metrics.horizontalAdvance(sample) + 24)
+        header.setSectionResizeMode(TEXT_COLUMN, QHeaderView.Stretch)
+        self.close_button = QPushButton("关闭")
+        self.close_button.clicked.connect(self.reject)
+
+        layout = QVBoxLayout(self)
+        layout.addWidget(self.summary_label)
+        layout.addWidget(self.table)
+        buttons = QHBoxLayout()
+        buttons.addStretch()
+        buttons.addWidget(self.close_button)
+        layout.addLayout(buttons)
+
+    @staticmethod
+    def _summary(results):
+        if not results:
+            return "所有已获取的轨道中都没有匹配的字幕。"
+        tracks = sorted({track for track, _ in results})
+        return f"共 {len(results)} 条匹配，位于 " + "、".join(track_label(track) for track in tracks)
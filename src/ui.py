@@ -3,19 +3,28 @@ from PySide6.QtWidgets import (
     QMainWindow,
     QWidget,
     QHBoxLayout,
-    QTreeWidget,
+    QTableView,
     QHeaderView,
-    QTreeWidgetItemIterator,
+    QAbstractItemView,
 )
-from PySide6.QtCore import Qt, Signal
+from PySide6.QtCore import Signal, QModelIndex, QTimer
 from PySide6.QtGui import QFont
-import re
 import os
 from .resolve_integration import ResolveIntegration
-from .ui_components import CharCountDelegate, HtmlDelegate, NumericTreeWidgetItem
+from .ui_components import CharCountDelegate, HtmlDelegate
+from .subtitle_table_model import SubtitleTableModel, SubtitleFilterProxyModel, FRAME_COLUMN
 from .inspector_panel import InspectorPanel
 from . import ui_logic
 from .ui_model import UIModel
+from .find_replace import FindOptions
+from .timecode_utils import TimecodeUtils
+from .log_utils import get_logger
+from .metrics import metrics
+
+logger = get_logger("ui")
+
+# Delay after the last keystroke in the filter/find boxes before the view is re-filtered.
+FILTER_DEBOUNCE_MS = 150
 
 
 def load_stylesheet(script_dir):
@@ -25,14 +34,16 @@ def load_stylesheet(script_dir):
         with open(qss_path, "r", encoding="utf-8") as f:
             return f.read()
     except FileNotFoundError:
-        print(f"Warning: Stylesheet not found at {qss_path}")
+        logger.warning("Stylesheet not found at %s", qss_path)
         return ""
 
 class SubvigatorWindow(QMainWindow):
-    OriginalTextRole = Qt.UserRole + 1
+    OriginalTextRole = SubtitleTableModel.OriginalTextRole
     # Signal emitted when a subtitle's clean text data has been changed by the user.
     # Arguments: item_index (int), new_clean_text (str)
     subtitleDataChanged = Signal(int, str)
+    # Emitted when the user edits an In or Out cell. Arguments: item_index (int), 'start' or 'end', typed text
+    subtitleTimingEdited = Signal(int, str, str)
 
     def __init__(self, resolve_integration: ResolveIntegration, parent=None):
         super().__init__(parent)
@@ -40,6 +51,7 @@ class SubvigatorWindow(QMainWindow):
         self.setWindowTitle("xdd - 字幕编辑器")
         self.setGeometry(100, 100, 1200, 800) # Increased default size
         self.ui_model = UIModel()
+        self.time_range_error = None  # Message for an invalid time range in the inspector
 
         # --- Dynamic Stylesheet Injection ---
         script_dir = os.path.dirname(os.path.abspath(__file__))
@@ -70,18 +82,42 @@ class SubvigatorWindow(QMainWindow):
         self._connect_signals()
 
     def _create_widgets(self):
-        self.tree = QTreeWidget()
+        # The view reads rows straight from the subtitle store through the model;
+        # filtering is done by the proxy instead of hiding individual items.
+        self.model = SubtitleTableModel(self)
+        self.proxy_model = SubtitleFilterProxyModel(self)
+        self.proxy_model.setSourceModel(self.model)
+
+        # A table view rather than a tree view: QTreeView lays out every row on reset,
+        # while QTableView with fixed row heights only touches the visible ones.
+        self.tree = QTableView()
+        self.tree.setModel(self.proxy_model)
+        self.tree.setSelectionBehavior(QAbstractItemView.SelectRows)
+        self.tree.setShowGrid(False)
+        self.tree.setWordWrap(False)
         self.tree.setAlternatingRowColors(True)
-        self.tree.setColumnCount(6)
-        self.tree.setHeaderLabels(['#', '长度', '字幕', '入点', '出点', '开始帧'])
-        self.tree.setColumnHidden(5, True) # StartFrame is data-only
-
-        header = self.tree.header()
-        header.setSectionResizeMode(0, QHeaderView.ResizeToContents) # #
-        header.setSectionResizeMode(1, QHeaderView.ResizeToContents) # len
-        header.setSectionResizeMode(2, QHeaderView.Stretch)          # Subtitle
-        header.setSectionResizeMode(3, QHeaderView.ResizeToContents) # In
-        header.setSectionResizeMode(4, QHeaderView.ResizeToContents) # Out
+        self.tree.setColumnHidden(FRAME_COLUMN, True) # StartFrame is data-only
+
+        vertical_header = self.tree.verticalHeader()
+        vertical_header.setVisible(False)
+        vertical_header.setSectionResizeMode(QHeaderView.Fixed)
+        vertical_header.setDefaultSectionSize(self.tree.fontMetrics().height() + 16) # item padding: 8px
+
+        header = self.tree.horizontalHeader()
+        header.setHighlightSections(False)
+        # Fixed widths sized from the font instead of ResizeToContents, which measures
+        # every row whenever the filter changes.
+        font_metrics = self.tree.fontMetrics()
+        cell_padding = 24
+        header.setSectionResizeMode(0, QHeaderView.Fixed)   # #
+        header.setSectionResizeMode(1, QHeaderView.Fixed)   # len
+        header.setSectionResizeMode(2, QHeaderView.Stretch) # Subtitle
+        header.setSectionResizeMode(3, QHeaderView.Fixed)   # In
+        header.setSectionResizeMode(4, QHeaderView.Fixed)   # Out
+        header.resizeSection(0, font_metrics.horizontalAdvance("000000") + cell_padding)
+        header.resizeSection(1, font_metrics.height() * 2 + cell_padding)
+        header.resizeSection(3, font_metrics.horizontalAdvance("00:00:00,000") + cell_padding)
+        header.resizeSection(4, font_metrics.horizontalAdvance("00:00:00,000") + cell_padding)
         
         self.char_count_delegate = CharCountDelegate(self.tree)
         self.html_delegate = HtmlDelegate(self.tree)
@@ -93,6 +129,10 @@ class SubvigatorWindow(QMainWindow):
 
         self.inspector = InspectorPanel()
 
+        self.filter_timer = QTimer(self)
+        self.filter_timer.setSingleShot(True)
+        self.filter_timer.setInterval(FILTER_DEBOUNCE_MS)
+
     def _setup_layouts(self):
         # --- Main Layout ---
         # Left side: Tree Widget
@@ -104,170 +144,170 @@ class SubvigatorWindow(QMainWindow):
     def _connect_signals(self):
         # This will be connected in the ApplicationController
         # self.inspector.find_next_button.clicked.connect(self.find_next)
-        self.tree.itemChanged.connect(self.on_subtitle_edited)
+        self.model.subtitleTextEdited.connect(self.subtitleDataChanged)
+        self.model.subtitleTimingEdited.connect(self.subtitleTimingEdited)
+        self.tree.selectionModel().currentChanged.connect(self.update_match_counter)
+        self.model.dataChanged.connect(self.update_match_counter)
         
-        # Connect both filter inputs to the same slot
-        self.inspector.search_text.textChanged.connect(self.filter_tree)
-        self.inspector.find_text.textChanged.connect(self.filter_tree)
+        # Typing in either filter input restarts the debounce timer; the filter runs
+        # once the user pauses. Changing the filter type applies immediately.
+        self.inspector.search_text.textChanged.connect(self.schedule_filter)
+        self.inspector.find_text.textChanged.connect(self.schedule_filter)
+        self.inspector.time_from_text.textChanged.connect(self.schedule_filter)
+        self.inspector.time_to_text.textChanged.connect(self.schedule_filter)
+        self.filter_timer.timeout.connect(lambda: self.filter_tree())
         self.inspector.search_type_combo.currentIndexChanged.connect(self.filter_tree)
+        for checkbox in (self.inspector.regex_checkbox, self.inspector.ignore_case_checkbox,
+                         self.inspector.whole_word_checkbox):
+            checkbox.toggled.connect(self.filter_tree)
 
         # Connect returnPressed signals to replace_all_button
         self.inspector.find_text.returnPressed.connect(self.inspector.replace_all_button.click)
         self.inspector.replace_text.returnPressed.connect(self.inspector.replace_all_button.click)
 
 
-    def populate_table(self, subs_data, hide=False):
-        # The OriginalTextRole is a UI-specific concept for tracking edits.
-        # We need to handle it here before passing data to the logic function.
-        self.tree.blockSignals(True)
-        
-        # --- Performance Optimization: Intelligent Tree Update ---
-        # Instead of clearing, we'll update, add, or remove items as needed.
-        
-        # Create a map of existing items by their ID for quick lookup
-        existing_items = {}
-        root = self.tree.invisibleRootItem()
-        for i in range(root.childCount()):
-            item = root.child(i)
-            if item:
-                existing_items[item.text(0)] = item
-
-        new_data_map = {str(sub.get('index', sub.get('id', ''))): sub for sub in subs_data}
-        
-        # Update existing items and remove old ones
-        items_to_remove = []
-        for item_id_str, item in existing_items.items():
-            if item_id_str not in new_data_map:
-                items_to_remove.append(item)
-            else:
-                # Update existing item
-                sub = new_data_map[item_id_str]
-                text = sub.get('text', '')
-                item.setText(1, str(len(text)))
-                item.setText(2, text)
-                item.setData(2, self.OriginalTextRole, text) # Reset original text
-                item.setData(2, Qt.UserRole, text)
-                item.setText(3, sub.get('start', sub.get('in_timecode', '')))
-                item.setText(4, sub.get('end', sub.get('out_timecode', '')))
-                item.setText(5, str(sub.get('in_frame', '')))
-                item.setHidden(hide)
-
-        for item in items_to_remove:
-            root.removeChild(item)
-            
-        # Add new items
-        for sub in subs_data:
-            item_id_str = str(sub.get('index', sub.get('id', '')))
-            if item_id_str not in existing_items:
-                item = NumericTreeWidgetItem(self.tree)
-                item.setText(0, item_id_str)
-                text = sub.get('text', '')
-                item.setText(1, str(len(text)))
-                item.setText(2, text)
-                item.setData(2, self.OriginalTextRole, text) # Set original text
-                item.setData(2, Qt.UserRole, text)
-                item.setFlags(item.flags() | Qt.ItemIsEditable)
-                item.setText(3, sub.get('start', sub.get('in_timecode', '')))
-                item.setText(4, sub.get('end', sub.get('out_timecode', '')))
-                item.setText(5, str(sub.get('in_frame', '')))
-                if hide:
-                    item.setHidden(True)
-        
-        # ui_logic.populate_table(self.tree, self.ui_model, subs_data, hide)
-        self.ui_model.displayed_subtitles = subs_data
-        self.tree.sortItems(0, Qt.AscendingOrder)
-        self.tree.blockSignals(False)
+    @metrics.timed("ui.populate_table")
+    def populate_table(self, subs_data, hide=False, track=None):
+        """
+        Shows the given subtitle list. The list is referenced, not copied, so edits
+        made through the view land directly in the caller's (SubtitleManager's) data.
+        Reloading the track already shown (same `track`) only updates the rows that
+        changed instead of resetting the view.
+        """
+        self.proxy_model.hide_all = hide
+        if not self.model.reload_subtitles(subs_data, track) and hide:
+            self.proxy_model.refresh()
+        self.ui_model.displayed_subtitles = self.model.subtitles
+
+    def schedule_filter(self, *args):
+        """(Re)starts the debounce timer; `filter_tree` runs when it fires."""
+        self.filter_timer.start()
 
     def filter_tree(self):
         """
         Updates the UI model with the current filter criteria from the UI,
         then calls the logic function to apply the filter.
         """
+        self.filter_timer.stop()
         self.ui_model.search_text = self.inspector.search_text.text()
         self.ui_model.find_text = self.inspector.find_text.text()
         self.ui_model.filter_type = self.inspector.search_type_combo.currentText()
-        
-        ui_logic.filter_tree(self.tree, self.ui_model)
+        self.ui_model.find_options = self.current_find_options()
+        self.ui_model.frame_range, self.time_range_error = self.current_frame_range()
+
+        # A context manager rather than a decorator: this slot is connected to signals
+        # with arguments, and a *args wrapper would forward them.
+        with metrics.timer("ui.filter_tree"):
+            ui_logic.filter_tree(self.proxy_model, self.ui_model)
+        self.update_match_counter()
 
     def find_next(self):
         """
         Updates the UI model with the current find text,
         then calls the logic function to find the next occurrence.
         """
+        if self.filter_timer.isActive():
+            self.filter_tree() # Apply a pending filter first, so the search runs on what the user typed.
         self.ui_model.find_text = self.inspector.find_text.text()
+        self.ui_model.find_options = self.current_find_options()
         ui_logic.find_next(self.tree, self.ui_model)
+        self.update_match_counter()
 
+    def find_previous(self):
+        """Like `find_next`, but moves to the previous occurrence."""
+        if self.filter_timer.isActive():
+            self.filter_tree()
+        self.ui_model.find_text = self.inspector.find_text.text()
+        self.ui_model.find_options = self.current_find_options()
+        ui_logic.find_previous(self.tree, self.ui_model)
+        self.update_match_counter()
+
+    def current_find_options(self):
+        """The find/replace flags currently selected in the inspector."""
+        return FindOptions(
+            regex=self.inspector.regex_checkbox.isChecked(),
+            ignore_case=self.inspector.ignore_case_checkbox.isChecked(),
+            whole_word=self.inspector.whole_word_checkbox.isChecked(),
+        )
 
+    def current_frame_range(self):
+        """
+        The [start, end) frame range typed into the inspector's time boxes, as
+        ((start, end), None); (None, None) if both are empty, or (None, error).
+        An empty box leaves that side of the range open.
+        """
+        from_text = self.inspector.time_from_text.text().strip()
+        to_text = self.inspector.time_to_text.text().strip()
+        if not from_text and not to_text:
+            return None, None
+        timebase = self.resolve_integration.get_timebase()
+        if timebase is None:
+            return None, "没有时间线，无法按时间筛选"
+        try:
+            start = TimecodeUtils.frame_from_time_input(from_text, timebase) if from_text else 0
+            end = TimecodeUtils.frame_from_time_input(to_text, timebase) + 1 if to_text else float('inf')
+        except ValueError:
+            return None, "时间格式无效，请输入 HH:MM:SS,mmm 或 HH:MM:SS:FF"
+        return (start, end), None
+
+    def update_match_counter(self, *args):
+        """Shows "match k of N" for the find text in the inspector."""
+        current, total = ui_logic.match_position(self.tree, self.ui_model)
+        if self.time_range_error:
+            self.inspector.match_count_label.setText(self.time_range_error)
+        elif self.proxy_model.pattern_error:
+            self.inspector.match_count_label.setText(self.proxy_model.pattern_error)
+        elif not self.ui_model.find_text:
+            self.inspector.match_count_label.setText("")
+        elif current:
+            self.inspector.match_count_label.setText(f"第 {current} 个，共 {total} 个匹配")
+        else:
+            self.inspector.match_count_label.setText(f"共 {total} 个匹配")
 
-    def on_subtitle_edited(self, item, column):
-        style_config = {
-            'delete': '<font color="red"><s>{text}</s></font>',
-            'replace': '<font color="blue">{text}</font>',
-            'insert': '<font color="blue">{text}</font>',
-        }
 
-        clean_new_text, html_text, was_reverted = ui_logic.handle_subtitle_edited(
-            item, column, self.OriginalTextRole, style_config
-        )
 
-        if clean_new_text is None:
-            return
+    def set_search_index(self, search_index, track):
+        """Lets filtering and find use the subtitle manager's text index for the shown track."""
+        self.proxy_model.set_search_index(search_index, track)
 
-        self.tree.blockSignals(True)
-        if was_reverted:
-            item.setText(1, str(len(clean_new_text)))
-            item.setData(2, self.OriginalTextRole, None)
-            item.setText(2, html_text)
-            item.setData(2, Qt.UserRole, clean_new_text)
-        else:
-            item.setText(1, str(len(clean_new_text)))
-            item.setText(2, html_text)
-            item.setData(2, Qt.UserRole, clean_new_text)
-        self.tree.blockSignals(False)
+    def find_index_by_id(self, item_id, column=0):
+        """Returns the view (proxy) index of the subtitle with the given ID, or an invalid index."""
+        row = self.model.row_for_id(item_id)
+        if row < 0:
+            return QModelIndex()
+        return self.proxy_model.mapFromSource(self.model.index(row, column))
 
-        try:
-            item_index = int(item.text(0))
-            self.subtitleDataChanged.emit(item_index, clean_new_text)
-        except (ValueError, TypeError):
-            pass
-
-    def find_item_by_id(self, item_id):
-        """Finds a QTreeWidgetItem by its ID in the first column."""
-        for i in range(self.tree.topLevelItemCount()):
-            item = self.tree.topLevelItem(i)
-            if item.text(0) == str(item_id):
-                return item
-        return None
+    def select_source_row(self, row):
+        """
+        Makes the subtitle at `row` of the store current and scrolls to it, unless it
+        is already current or filtered out. Returns True if the selection moved.
+        """
+        index = self.proxy_model.mapFromSource(self.model.index(row, 0))
+        if not index.isValid() or index.row() == self.tree.currentIndex().row():
+            return False
+        self.tree.setCurrentIndex(index)
+        self.tree.scrollTo(index, QAbstractItemView.PositionAtCenter)
+        return True
 
     def update_item_for_replace(self, item_index, original_text, new_text):
         """Updates a single item's text with diff highlighting."""
-        item = self.find_item_by_id(item_index)
-        if not item:
-            return
-
-        style_config = {
-            'delete': '<font color="red"><s>{text}</s></font>',
-            'replace': '<font color="blue">{text}</font>',
-            'insert': '<font color="blue">{text}</font>',
-        }
-        
-        self.tree.blockSignals(True)
-        ui_logic.update_item_for_replace(
-            item, original_text, new_text, self.OriginalTextRole, style_config
-        )
-        self.tree.blockSignals(False)
+        self.model.apply_replacements([{'index': item_index, 'old': original_text, 'new': new_text}])
 
     def get_all_subtitles_data(self):
-        return ui_logic.get_all_subtitles_data(self.tree)
+        """Returns the subtitle store backing the view (not a copy)."""
+        return self.model.subtitles
 
+    def set_lint_flags(self, flags):
+        """Colors the rows that violate lint rules (bits per row of the shown list); None clears."""
+        self.model.set_lint_flags(flags)
+
+    def refresh_timing(self, row=None):
+        """Redraws the times of one row of the store, or of every row, after a retime."""
+        if row is None:
+            self.model.timing_changed()
+        else:
+            self.model.timing_changed(row, row)
 
     def update_all_items_for_replace(self, changes):
         """Updates all changed items with diff highlighting."""
-        style_config = {
-            'delete': '<font color="red"><s>{text}</s></font>',
-            'replace': '<font color="blue">{text}</font>',
-            'insert': '<font color="blue">{text}</font>',
-        }
-        ui_logic.update_all_items_for_replace(
-            self.tree, changes, self.find_item_by_id, self.OriginalTextRole, style_config
-        )
+        self.model.apply_replacements(changes)
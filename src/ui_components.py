@@ -2,23 +2,85 @@
 from PySide6.QtWidgets import (
     QStyledItemDelegate,
     QStyle,
-    QTreeWidgetItem,
     QLineEdit,
     QAbstractItemView,
 )
 from PySide6.QtCore import Qt
-from PySide6.QtGui import QTextDocument, QPalette, QColor, QPainter, QPen, QBrush
+from PySide6.QtGui import QTextDocument, QPalette, QColor, QPainter, QPen, QBrush, QFont, QPixmap
+import math
 import re
+from collections import OrderedDict
+
+from .utils import DEFAULT_CHAR_LIMIT
 
 class CharCountDelegate(QStyledItemDelegate):
+    """
+    Draws the character count as a coloured badge: green up to `char_limit`
+    characters, red above it. There are only a handful of distinct badges, so each
+    one is rendered once into a pixmap (at the screen's device pixel ratio) and
+    then just blitted on repaint.
+    """
+
+    def __init__(self, parent=None, char_limit=DEFAULT_CHAR_LIMIT):
+        super().__init__(parent)
+        self._char_limit = char_limit
+        self._badge_cache = {}  # (text, diameter, color, font, dpr) -> QPixmap
+
+    @property
+    def char_limit(self):
+        return self._char_limit
+
+    @char_limit.setter
+    def char_limit(self, limit):
+        if limit == self._char_limit:
+            return
+        self._char_limit = limit
+        self._badge_cache.clear()
+        view = self.parent()
+        if isinstance(view, QAbstractItemView):
+            view.viewport().update()
+
     def createEditor(self, parent, option, index):
         # This column is not editable, so we return None.
         return None
 
+    def _badge(self, text, diameter, color, font, dpr):
+        """Returns the badge pixmap for `text`, rendering it on first use."""
+        key = (text, diameter, color.rgba(), font.key(), dpr)
+        pixmap = self._badge_cache.get(key)
+        if pixmap is not None:
+            return pixmap
+
+        size = max(1, math.ceil(diameter * dpr))
+        pixmap = QPixmap(size, size)
+        pixmap.setDevicePixelRatio(dpr)
+        pixmap.fill(Qt.transparent)
+
+        painter = QPainter(pixmap)
+        painter.setRenderHint(QPainter.Antialiasing)
+
+        # Draw the circle background
+        painter.setBrush(QBrush(color))
+        painter.setPen(Qt.NoPen) # No border for the circle
+        painter.drawEllipse(0, 0, diameter, diameter)
+
+        # --- Text Drawing Logic ---
+        # Set text color
+        painter.setPen(QPen(Qt.white))
+        # Set font size relative to circle size
+        font = QFont(font)
+        font.setPixelSize(max(1, int(diameter / 2.0)))
+        painter.setFont(font)
+
+        # Draw text centered in the circle
+        painter.drawText(0, 0, diameter, diameter, Qt.AlignCenter, text)
+        painter.end()
+
+        self._badge_cache[key] = pixmap
+        return pixmap
+
     def paint(self, painter: QPainter, option, index):
-        # We don't call super().paint() because in a test environment, it can cause issues
-        # and we only want to test our custom drawing logic anyway.
-        # super().paint(painter, option, index)
+        # We don't call super().paint(): only the selection background and the badge are drawn.
 
         # Manually draw the background for selection state
         if option.state & QStyle.State_Selected:
@@ -28,46 +90,37 @@ class CharCountDelegate(QStyledItemDelegate):
         if not char_count_str or not char_count_str.isdigit():
             return
 
-        char_count = int(char_count_str)
-
         # Determine color based on character count
-        color = QColor("#28a745") if char_count <= 15 else QColor("#dc3545")
+        color = QColor("#28a745") if int(char_count_str) <= self._char_limit else QColor("#dc3545")
 
-        # --- Circle Drawing Logic ---
         rect = option.rect
         # Make the circle a bit smaller than the cell height
         diameter = min(rect.width(), rect.height()) - 14
-        radius = diameter / 2.0
-
-        # Center the circle in the cell
-        x = rect.x() + (rect.width() - diameter) / 2
-        y = rect.y() + (rect.height() - diameter) / 2
+        if diameter <= 0:
+            return
 
-        painter.save()
-        painter.setRenderHint(QPainter.Antialiasing)
+        device = painter.device()
+        dpr = device.devicePixelRatioF() if device is not None else 1.0
+        badge = self._badge(char_count_str, diameter, color, option.font, dpr)
 
-        # Draw the circle background
-        painter.setBrush(QBrush(color))
-        painter.setPen(Qt.NoPen) # No border for the circle
-        painter.drawEllipse(x, y, diameter, diameter)
+        # Center the circle in the cell
+        x = rect.x() + (rect.width() - diameter) // 2
+        y = rect.y() + (rect.height() - diameter) // 2
+        painter.drawPixmap(x, y, badge)
 
-        # --- Text Drawing Logic ---
-        # Set text color
-        painter.setPen(QPen(Qt.white))
-        # Set font size relative to circle size
-        font = painter.font()
-        font.setPixelSize(int(radius))
-        painter.setFont(font)
-        
-        # Draw text centered in the circle
-        painter.drawText(int(x), int(y), int(diameter), int(diameter), Qt.AlignCenter, char_count_str)
+class HtmlDelegate(QStyledItemDelegate):
+    """
+    Renders cell text that may contain diff markup.
 
-        painter.restore()
+    Laying out a QTextDocument is by far the most expensive part of painting a row,
+    so laid-out documents are kept in a small LRU cache keyed by everything that
+    affects their appearance. Cells without markup skip QTextDocument entirely.
+    """
+    CACHE_SIZE = 512
 
-class HtmlDelegate(QStyledItemDelegate):
     def __init__(self, parent=None):
         super(HtmlDelegate, self).__init__(parent)
-        self.doc = QTextDocument(self)
+        self._doc_cache = OrderedDict()  # (html, width, selected, color, font) -> QTextDocument
 
     def createEditor(self, parent, option, index):
         # Only create an editor for columns that should be editable.
@@ -85,12 +138,33 @@ class HtmlDelegate(QStyledItemDelegate):
             # For non-editable columns (like '#'), return None to prevent editing.
             return None
 
+    def _document(self, html, width, selected, color, font):
+        """Returns a laid-out document for the given HTML, reusing a cached one if possible."""
+        key = (html, width, selected, color.rgba(), font.key())
+        doc = self._doc_cache.get(key)
+        if doc is not None:
+            self._doc_cache.move_to_end(key)
+            return doc
+
+        doc = QTextDocument()
+        doc.setDefaultFont(font)
+        doc.setDefaultStyleSheet(f"body {{ color: {color.name()}; }}")
+        doc.setHtml(html)
+        # Set the available width so the height is computed for the real cell size.
+        doc.setTextWidth(width)
+        doc.size()  # Forces the layout now, so later paints only draw.
+        self._doc_cache[key] = doc
+        if len(self._doc_cache) > self.CACHE_SIZE:
+            self._doc_cache.popitem(last=False)
+        return doc
+
     def paint(self, painter, option, index):
         options = option
         self.initStyleOption(options, index)
 
         # Force a uniform selection color, overriding any alternate row color
-        if options.state & QStyle.State_Selected:
+        selected = bool(options.state & QStyle.State_Selected)
+        if selected:
             options.palette.setColor(QPalette.Highlight, QColor("#3266d0"))
             options.palette.setColor(QPalette.HighlightedText, QColor("#ffffff"))
 
@@ -108,29 +182,31 @@ class HtmlDelegate(QStyledItemDelegate):
         view = self.parent()
         is_editing = (view.state() == QAbstractItemView.EditingState) and (view.currentIndex() == index)
 
-        if not is_editing:
-            # Restore the original text to render it via QTextDocument
-            self.doc.setHtml(original_text)
-
-            # Get the rectangle for the text and draw the HTML document inside it.
+        if not is_editing and original_text:
+            # Get the rectangle for the text and draw it inside it.
             textRect = style.subElementRect(QStyle.SE_ItemViewItemText, options)
+            color = options.palette.color(QPalette.HighlightedText if selected else QPalette.Text)
+
+            if '<' not in original_text and '&' not in original_text:
+                # Plain-text fast path: no markup, so no document is needed.
+                painter.setFont(options.font)
+                painter.setPen(color)
+                elided = options.fontMetrics.elidedText(original_text, Qt.ElideRight, textRect.width())
+                painter.drawText(textRect, Qt.AlignLeft | Qt.AlignVCenter, elided)
+            else:
+                doc = self._document(original_text, textRect.width(), selected, color, options.font)
+                textHeight = doc.size().height()
 
-            # --- Start of Vertical Centering Logic ---
-            # Set the available width for the document to calculate its height correctly.
-            self.doc.setTextWidth(textRect.width())
-            textHeight = self.doc.size().height()
+                # Calculate the vertical offset to center the text.
+                offsetY = (textRect.height() - textHeight) / 2.0
 
-            # Calculate the vertical offset to center the text.
-            offsetY = (textRect.height() - textHeight) / 2.0
+                # Translate the painter to the new starting point, including the offset.
+                painter.translate(textRect.x(), textRect.y() + offsetY)
 
-            # Translate the painter to the new starting point, including the offset.
-            painter.translate(textRect.x(), textRect.y() + offsetY)
-            
-            # Clip the painter to the actual text area to prevent drawing outside bounds.
-            painter.setClipRect(0, 0, textRect.width(), textHeight)
-            
-            self.doc.drawContents(painter)
-            # --- End of Vertical Centering Logic ---
+                # Clip the painter to the actual text area to prevent drawing outside bounds.
+                painter.setClipRect(0, 0, textRect.width(), textHeight)
+
+                doc.drawContents(painter)
 
         painter.restore()
 
@@ -145,15 +221,6 @@ class HtmlDelegate(QStyledItemDelegate):
         editor.setText(text)
 
     def setModelData(self, editor, model, index):
-        # When editing finishes, get the plain text from the editor
-        # and set it as the item's text. This will trigger itemChanged.
+        # When editing finishes, get the plain text from the editor and hand it
+        # to the model, which stores it and computes the diff highlighting.
         model.setData(index, editor.text(), Qt.EditRole)
-
-class NumericTreeWidgetItem(QTreeWidgetItem):
-    def __lt__(self, other):
-        if not isinstance(other, QTreeWidgetItem):
-            return NotImplemented
-        try:
-            return int(self.text(0)) < int(other.text(0))
-        except (ValueError, TypeError):
-            return self.text(0) < other.text(0)
\ No newline at end of file
@@ -1,240 +1,172 @@
-import re
-import difflib
-from PySide6.QtCore import Qt
+import bisect
 from .ui_model import UIModel
+from .utils import FILTER_TYPE_ALIASES
+from .find_replace import MatchGuard, PatternError, compile_query, compile_wildcard
+from .text_diff import diff_opcodes
+
+# Markup used to highlight differences between the original and the edited text.
+DIFF_STYLE = {
+    'delete': '<font color="red"><s>{text}</s></font>',
+    'replace': '<font color="blue">{text}</font>',
+    'insert': '<font color="blue">{text}</font>',
+}
 
 def _generate_diff_html(original_text, new_text, style_config):
-    html_text = ""
-    s = difflib.SequenceMatcher(None, original_text, new_text)
-    for tag, i1, i2, j1, j2 in s.get_opcodes():
+    parts = []
+    for tag, i1, i2, j1, j2 in diff_opcodes(original_text, new_text):
         if tag == 'equal':
-            html_text += new_text[j1:j2]
+            parts.append(new_text[j1:j2])
         elif tag == 'replace':
-            html_text += style_config['delete'].format(text=original_text[i1:i2])
-            html_text += style_config['replace'].format(text=new_text[j1:j2])
+            parts.append(style_config['delete'].format(text=original_text[i1:i2]))
+            parts.append(style_config['replace'].format(text=new_text[j1:j2]))
         elif tag == 'delete':
-            html_text += style_config['delete'].format(text=original_text[i1:i2])
+            parts.append(style_config['delete'].format(text=original_text[i1:i2]))
         elif tag == 'insert':
-            html_text += style_config['insert'].format(text=new_text[j1:j2])
-    return html_text
+            parts.append(style_config['insert'].format(text=new_text[j1:j2]))
+    return ''.join(parts)
 
-def get_all_subtitles_data(tree):
+def make_matcher(filter_text, filter_type, guard=None):
     """
-    Retrieves all subtitle entries from the tree as a list of dictionaries,
-    ensuring the text is the clean, underlying data, not the display HTML.
+    Builds a predicate `match(text, folded_text)` for the given filter. `folded_text`
+    is `text.casefold()`, which callers can precompute once per row. Contains,
+    Starts With and Ends With are case-insensitive; Exact, Wildcard and Regex are not.
+    Raises PatternError for an invalid regex.
     """
-    subs_data = []
-    root = tree.invisibleRootItem()
-    for i in range(root.childCount()):
-        item = root.child(i)
-        
-        # Prioritize UserRole for the most up-to-date clean text
-        clean_text = item.data(2, Qt.UserRole)
-        
-        # If UserRole is not set (e.g., for unmodified items), get the display text and clean it
-        if clean_text is None:
-            clean_text = re.sub(r'<[^>]+>', '', item.text(2))
-
-        try:
-            index = int(item.text(0))
-        except (ValueError, TypeError):
-            index = -1 # Or some other default
-
-        try:
-            start_frame = int(item.text(5))
-        except (ValueError, TypeError):
-            start_frame = -1 # Or some other default
-
-        subs_data.append({
-            'id': index,
-            'index': index,
-            'text': clean_text,
-            'start': item.text(3),
-            'end': item.text(4),
-            'in_frame': start_frame,
-        })
-    return subs_data
-
-def _match_text(text, filter_text, filter_type):
-    """Helper function to perform the actual text matching logic."""
+    filter_type = FILTER_TYPE_ALIASES.get(filter_type, filter_type)
     if not filter_text:
-        return True
+        return lambda text, folded_text: True
+    folded_filter = filter_text.casefold()
     if filter_type == 'Contains':
-        return filter_text.lower() in text.lower()
+        return lambda text, folded_text: folded_filter in folded_text
     elif filter_type == 'Exact':
-        return filter_text == text
+        return lambda text, folded_text: text == filter_text
     elif filter_type == 'Starts With':
-        return text.lower().startswith(filter_text.lower())
+        return lambda text, folded_text: folded_text.startswith(folded_filter)
     elif filter_type == 'Ends With':
-        return text.lower().endswith(filter_text.lower())
-    elif filter_type == 'Wildcard':
-        try:
-            regex_pattern = '^' + '.*'.join(re.escape(part) for part in filter_text.split('*')) + '$'
-            return re.search(regex_pattern, text) is not None
-        except re.error:
-            return False # Invalid regex
-    return False
-
-def populate_table(tree, ui_model: UIModel, subs_data, hide=False):
-    """Populates the tree widget with subtitle data and updates the UI model."""
-    from .ui_components import NumericTreeWidgetItem
-    from PySide6.QtCore import Qt
-
-    tree.blockSignals(True)
-    tree.clear()
-
-    if not subs_data:
-        ui_model.displayed_subtitles = []
-        tree.blockSignals(False)
-        return
+        return lambda text, folded_text: folded_text.endswith(folded_filter)
+    elif filter_type in ('Wildcard', 'Regex'):
+        query = _filter_query(filter_text, filter_type)
+        guard = guard or MatchGuard()
+        return lambda text, folded_text: guard.search(query, text)
+    return lambda text, folded_text: False
+
+def _filter_query(filter_text, filter_type):
+    """The CompiledQuery of a Wildcard or Regex filter, None for the other types. Raises PatternError."""
+    # Compiled once per query (and cached across keystrokes), not per row.
+    if filter_type == 'Wildcard':
+        return compile_wildcard(filter_text)
+    if filter_type == 'Regex':
+        return compile_query(filter_text, regex=True)
+    return None
+
+def match_texts(filter_text, filter_type, texts, folded_texts, guard=None):
+    """
+    The batch form of make_matcher: for each of `texts` (with its casefolded form
+    in `folded_texts`), True if it passes the filter. Wildcard and Regex filters
+    match the whole batch in one call under the guard's time budget.
+    Raises PatternError (or MatchTimeout).
+    """
+    filter_type = FILTER_TYPE_ALIASES.get(filter_type, filter_type)
+    if filter_text and filter_type in ('Wildcard', 'Regex'):
+        return (guard or MatchGuard()).search_all(_filter_query(filter_text, filter_type), texts)
+    match = make_matcher(filter_text, filter_type, guard)
+    return [match(text, folded_text) for text, folded_text in zip(texts, folded_texts)]
 
-    displayed_subs = []
-    for sub in subs_data:
-        item = NumericTreeWidgetItem(tree)
-        item.setText(0, str(sub.get('index', sub.get('id', ''))))
-        text = sub.get('text', '')
-        item.setText(1, str(len(text)))
-        item.setText(2, text)
-        item.setData(2, Qt.UserRole, text)
-        item.setFlags(item.flags() | Qt.ItemIsEditable)
-        item.setText(3, sub.get('start', sub.get('in_timecode', '')))
-        item.setText(4, sub.get('end', sub.get('out_timecode', '')))
-        item.setText(5, str(sub.get('in_frame', '')))
-        if hide:
-            item.setHidden(True)
-        displayed_subs.append(sub)
-
-    tree.sortItems(0, Qt.AscendingOrder)
-    tree.blockSignals(False)
-    ui_model.displayed_subtitles = displayed_subs
-
-
-def filter_tree(tree, ui_model: UIModel):
-    """Filters the tree based on search and find criteria from the UI model."""
-    root = tree.invisibleRootItem()
-
-    for i in range(root.childCount()):
-        item = root.child(i)
-        subtitle_text = item.text(2)
-
-        # Check primary filter
-        search_matches = _match_text(subtitle_text, ui_model.search_text, ui_model.filter_type)
-        
-        # Check find filter (always 'Contains')
-        find_matches = not ui_model.find_text or ui_model.find_text in subtitle_text
-
-        # Both must match
-        item.setHidden(not (search_matches and find_matches))
-
-def find_next(tree, ui_model: UIModel):
-    """Finds the next occurrence of text in the tree."""
-    from PySide6.QtWidgets import QTreeWidgetItemIterator
+def _match_text(text, filter_text, filter_type):
+    """Helper function to perform the actual text matching logic."""
+    try:
+        return make_matcher(filter_text, filter_type)(text, text.casefold())
+    except PatternError:
+        return False # Invalid regex
 
+def query_narrows(old_query, new_query):
+    """
+    True if every row matching `new_query` must also match `old_query`, so the new
+    result can be computed from the old one instead of the whole track. Queries are
+    (search_text, filter_type, find_text, find_options) tuples.
+    """
+    old_search, old_type, old_find, old_options = old_query
+    new_search, new_type, new_find, new_options = new_query
+    if old_options != new_options:
+        return False
+    if old_find != new_find and (new_options.regex or new_options.whole_word or old_find not in new_find):
+        return False
+    if not old_search:
+        return True
+    if FILTER_TYPE_ALIASES.get(old_type, old_type) != FILTER_TYPE_ALIASES.get(new_type, new_type):
+        return False
+    filter_type = FILTER_TYPE_ALIASES.get(new_type, new_type)
+    old_folded, new_folded = old_search.casefold(), new_search.casefold()
+    if filter_type == 'Contains':
+        return old_folded in new_folded
+    if filter_type == 'Starts With':
+        return new_folded.startswith(old_folded)
+    if filter_type == 'Ends With':
+        return new_folded.endswith(old_folded)
+    return old_search == new_search
+
+def filter_tree(proxy_model, ui_model: UIModel):
+    """Filters the subtitle view based on search and find criteria from the UI model."""
+    proxy_model.set_filter(ui_model.search_text, ui_model.filter_type, ui_model.find_text, ui_model.find_options,
+                           ui_model.frame_range)
+
+def find_next(view, ui_model: UIModel, backwards=False):
+    """
+    Selects the next (or previous) visible row, after (before) the current one, whose
+    text contains the find text, wrapping around at the ends.
+    """
     if not ui_model.find_text:
         return
 
-    start_item = tree.currentItem()
-    item_iterator = QTreeWidgetItemIterator(tree, QTreeWidgetItemIterator.All)
-    
-    # If a start_item is selected, move the iterator to it before starting the search.
-    if start_item:
-        while item_iterator.value():
-            if item_iterator.value() == start_item:
-                # Move to the next item to start the search from there
-                item_iterator += 1
-                break
-            item_iterator += 1
-    
-    # Start search from the current iterator position
-    while item_iterator.value():
-        item = item_iterator.value()
-        if ui_model.find_text in item.text(2):
-            tree.setCurrentItem(item)
-            tree.scrollToItem(item)
-            return
-        item_iterator += 1
-    
-    # If we reached the end, wrap around and search from the beginning
-    item_iterator = QTreeWidgetItemIterator(tree, QTreeWidgetItemIterator.All)
-    while item_iterator.value() and item_iterator.value() != start_item:
-        item = item_iterator.value()
-        if ui_model.find_text in item.text(2):
-            tree.setCurrentItem(item)
-            tree.scrollToItem(item)
-            return
-        item_iterator += 1
-
-    # Check the start item itself if we've wrapped
-    if start_item and ui_model.find_text in start_item.text(2) and tree.currentItem() != start_item:
-         tree.setCurrentItem(start_item)
-         tree.scrollToItem(start_item)
-
-def handle_subtitle_edited(item, column, original_text_role, style_config):
-    """
-    Handles the logic for when a subtitle item is edited.
-    Returns a tuple: (clean_new_text, html_text, was_reverted)
-    """
-    import re
-    from PySide6.QtCore import Qt
+    model = view.model()
+    rows = model.match_rows(ui_model.find_text, ui_model.find_options)
+    if not rows:
+        return
 
-    if column != 2:
-        return None, None, False
+    current = view.currentIndex()
+    current_row = current.row() if current.isValid() else -1
+    if backwards:
+        position = bisect.bisect_left(rows, current_row) - 1 if current_row >= 0 else -1
+    else:
+        position = bisect.bisect_right(rows, current_row)
 
-    new_text = item.text(2)
-    clean_new_text = re.sub(r'<[^>]+>', '', new_text)
-    
-    original_text = item.data(2, original_text_role)
-    
-    if original_text is None:
-        original_text = item.data(2, Qt.UserRole)
+    index = model.index(rows[position % len(rows)], 0)
+    if index != current:
+        view.setCurrentIndex(index)
+        view.scrollTo(index)
+
+def find_previous(view, ui_model: UIModel):
+    """Selects the previous visible row, before the current one, containing the find text."""
+    find_next(view, ui_model, backwards=True)
 
+def match_position(view, ui_model: UIModel):
+    """
+    Returns (k, n): the current row is match k (1-based, 0 if it is not a match)
+    of the n visible rows containing the find text.
+    """
+    if not ui_model.find_text:
+        return 0, 0
+    rows = view.model().match_rows(ui_model.find_text, ui_model.find_options)
+    current = view.currentIndex()
+    if current.isValid():
+        position = bisect.bisect_left(rows, current.row())
+        if position < len(rows) and rows[position] == current.row():
+            return position + 1, len(rows)
+    return 0, len(rows)
+
+def handle_subtitle_edited(original_text, new_text, style_config):
+    """
+    Computes how an edited subtitle should be displayed.
+    `original_text` is the text before the first edit; `new_text` is the clean edited text.
+    Returns a tuple: (clean_new_text, html_text, was_reverted)
+    """
     if original_text is None:
         original_text = ""
-    
-    if clean_new_text == original_text:
+
+    if new_text == original_text:
         # Text was reverted to original
         return original_text, original_text, True
 
-    html_text = _generate_diff_html(original_text, clean_new_text, style_config)
-    
-    return clean_new_text, html_text, False
-
-def update_item_for_replace(item, original_text, new_text, original_text_role, style_config):
-    """Updates a single item's text with diff highlighting for replacement."""
-    from PySide6.QtCore import Qt
-
-    if not item:
-        return
-
-    # If this is the first replacement, store the original text
-    if item.data(2, original_text_role) is None:
-        item.setData(2, original_text_role, original_text)
-
-    # The original_text for the diff should be the one from OriginalTextRole if available
-    base_text = item.data(2, original_text_role) or original_text
-
-    diff_html = _generate_diff_html(base_text, new_text, style_config)
-
-    item.setText(2, diff_html)
-    item.setData(2, Qt.UserRole, new_text) # Update the user role with the new clean text
-
-def update_all_items_for_replace(tree, changes, find_item_by_id_func, original_text_role, style_config):
-    """Updates all changed items with diff highlighting."""
-    from PySide6.QtCore import Qt
-
-    tree.blockSignals(True)
-    for change in changes:
-        item = find_item_by_id_func(change['index'])
-        if item:
-            # If this is the first replacement for this item, store its original text
-            if item.data(2, original_text_role) is None:
-                item.setData(2, original_text_role, change['old'])
-            
-            # The original_text for the diff should be the one from OriginalTextRole if available
-            base_text = item.data(2, original_text_role) or change['old']
-
-            diff_html = _generate_diff_html(base_text, change['new'], style_config)
-            item.setText(2, diff_html)
-            item.setData(2, Qt.UserRole, change['new'])
+    html_text = _generate_diff_html(original_text, new_text, style_config)
 
-    tree.blockSignals(False)
\ No newline at end of file
+    return new_text, html_text, False
@@ -1,5 +1,7 @@
 from dataclasses import dataclass, field
-from typing import List
+from typing import List, Optional, Tuple
+
+from .find_replace import FindOptions
 
 @dataclass
 class UIModel:
@@ -9,4 +11,6 @@ class UIModel:
     search_text: str = ""
     find_text: str = ""
     filter_type: str = "包含"
+    find_options: FindOptions = FindOptions()
+    frame_range: Optional[Tuple[int, int]] = None
     displayed_subtitles: List[dict] = field(default_factory=list)
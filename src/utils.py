@@ -1,9 +1,52 @@
 import re
 
+# Subtitles longer than this many characters are flagged in the length column.
+DEFAULT_CHAR_LIMIT = 15
+
+# The inspector's filter combo box shows Chinese labels; the matching logic uses English names.
+FILTER_TYPE_ALIASES = {
+    '包含': 'Contains',
+    '精确': 'Exact',
+    '开头是': 'Starts With',
+    '结尾是': 'Ends With',
+    '通配符': 'Wildcard',
+    '正则': 'Regex',
+}
+
+
 def clean_html(raw_html: str) -> str:
     """
     Removes HTML tags from a string.
     """
     clean_re = re.compile('<.*?>')
     clean_text = re.sub(clean_re, '', raw_html)
-    return clean_text
\ No newline at end of file
+    return clean_text
+
+
+def subtitle_sort_key(sub: dict):
+    """
+    Orders subtitles numerically by id ('index' or 'id'), falling back to
+    text order for ids that are not numbers.
+    """
+    item_id = sub.get('index', sub.get('id', ''))
+    try:
+        return (0, int(item_id), '')
+    except (ValueError, TypeError):
+        return (1, 0, str(item_id))
+
+
+def sort_subtitles_by_id(subtitles: list) -> list:
+    """Sorts a subtitle list (or SubtitleTrack) in place by id, skipping the sort if it is already in order."""
+    keys = [subtitle_sort_key(sub) for sub in subtitles]
+    if any(keys[i] > keys[i + 1] for i in range(len(keys) - 1)):
+        subtitles[:] = sorted(subtitles, key=subtitle_sort_key)
+    return subtitles
+
+
+def subtitle_content_hash(sub: dict) -> int:
+    """Hash of what a row displays: its text and timing. Used to detect changed rows on reload."""
+    return hash((
+        sub.get('text', ''),
+        sub.get('start', sub.get('in_timecode', '')),
+        sub.get('end', sub.get('out_timecode', '')),
+    ))
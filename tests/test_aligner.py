@@ -0,0 +1,104 @@
+# tests/test_aligner.py
+import random
+
+import pytest
+
+from src import aligner
+from src.aligner import _intervals, _overlapping_pairs, align_tracks, bilingual_srt
+from src.subtitle_store import SubtitleTrack, ms_to_srt_time
+
+
+def make_track(*cues):
+    """A track from (start_ms, end_ms, text) cues."""
+    return SubtitleTrack([
+        {'index': i, 'start': ms_to_srt_time(start), 'end': ms_to_srt_time(end), 'text': text}
+        for i, (start, end, text) in enumerate(cues, 1)
+    ])
+
+
+def kinds(groups):
+    return [(group.kind, group.primary_rows, group.secondary_rows) for group in groups]
+
+
+def test_align_pairs_splits_and_gaps():
+    primary = make_track((0, 2000, "Hello"), (3000, 6000, "How are you?"), (7000, 8000, "Bye"), (9000, 9500, "Hm"))
+    secondary = make_track(
+        (40, 1960, "你好"),
+        (3000, 4500, "你"), (4500, 6000, "好吗？"),
+        (6950, 8040, "再见"),
+        (12000, 13000, "（音乐）"),
+    )
+    groups = align_tracks(primary, secondary)
+    assert kinds(groups) == [
+        (aligner.ONE_TO_ONE, (0,), (0,)),
+        (aligner.ONE_TO_MANY, (1,), (1, 2)),
+        (aligner.ONE_TO_ONE, (2,), (3,)),
+        (aligner.PRIMARY_ONLY, (3,), ()),
+        (aligner.SECONDARY_ONLY, (), (4,)),
+    ]
+    assert (groups[2].start_ms, groups[2].end_ms) == (6950, 8040)
+
+def test_many_to_one():
+    primary = make_track((0, 1000, "Wait,"), (1000, 2000, "wait for me"))
+    secondary = make_track((0, 2000, "等等我"))
+    assert kinds(align_tracks(primary, secondary)) == [(aligner.MANY_TO_ONE, (0, 1), (0,))]
+
+def test_short_handover_overlap_does_not_link():
+    # The secondary cue overlaps the next primary cue by 80 ms only.
+    primary = make_track((0, 1000, "a"), (1000, 2000, "b"))
+    secondary = make_track((0, 1080, "甲"), (1080, 2000, "乙"))
+    assert kinds(align_tracks(primary, secondary)) == [
+        (aligner.ONE_TO_ONE, (0,), (0,)), (aligner.ONE_TO_ONE, (1,), (1,)),
+    ]
+
+def test_rows_without_times_are_left_out():
+    primary = [{'index': 1, 'start': '00:00:01,000', 'end': '00:00:02,000', 'text': 'a'}, {'index': 2, 'text': 'b'}]
+    secondary = [{'index': 1, 'start': '00:00:01,000', 'end': '00:00:02,000', 'text': '甲'}]
+    assert kinds(align_tracks(primary, secondary)) == [(aligner.ONE_TO_ONE, (0,), (0,))]
+
+@pytest.mark.parametrize("seed", range(5))
+def test_sweep_finds_the_same_pairs_as_a_nested_loop(seed):
+    random.seed(seed)
+
+    def random_track(count):
+        cues = []
+        for _ in range(count):
+            start = random.randrange(0, 60000)
+            cues.append((start, start + random.randrange(200, 5000), "x"))
+        return make_track(*cues)
+
+    primary, secondary = random_track(150), random_track(120)
+    a, b = _intervals(primary), _intervals(secondary)
+    expected = {
+        (a_row, b_row, min(a_end, b_end) - max(a_start, b_start))
+        for a_start, a_end, a_row in a for b_start, b_end, b_row in b
+        if min(a_end, b_end) - max(a_start, b_start) >= 0.25 * min(a_end - a_start, b_end - b_start)
+        and min(a_end, b_end) > max(a_start, b_start)
+    }
+    assert set(_overlapping_pairs(a, b, 0.25)) == expected
+
+    groups = align_tracks(primary, secondary)
+    assert sorted(row for group in groups for row in group.primary_rows) == list(range(150))
+    assert sorted(row for group in groups for row in group.secondary_rows) == list(range(120))
+
+def test_bilingual_srt_stacks_texts():
+    primary = make_track((0, 2000, "<i>Hello</i>"), (3000, 4000, "Alone"))
+    secondary = make_track((0, 1000, "你"), (1000, 2000, "好"))
+    content = bilingual_srt(align_tracks(primary, secondary), primary, secondary)
+    assert content == (
+        "1\n00:00:00,000 --> 00:00:02,000\nHello\n你\n好\n\n"
+        "2\n00:00:03,000 --> 00:00:04,000\nAlone\n"
+    )
+    assert bilingual_srt([], primary, secondary) == ""
+
+def test_alignment_model_shows_groups(qtbot):
+    from src.alignment_dialog import AlignmentDialog, SECONDARY_COLUMN, KIND_COLUMN
+    primary = make_track((0, 2000, "Hello"), (3000, 4000, "Alone"))
+    secondary = make_track((0, 2000, "你好"))
+    dialog = AlignmentDialog(align_tracks(primary, secondary), primary, secondary, "对齐")
+    qtbot.addWidget(dialog)
+    model = dialog.model
+    assert model.rowCount() == 2
+    assert model.index(0, SECONDARY_COLUMN).data() == "你好"
+    assert model.index(1, KIND_COLUMN).data() == "仅原文"
+    assert dialog.summary_label.text() == "共 2 组：一对一 1，仅原文 1"
@@ -0,0 +1,103 @@
+# tests/test_binary_cache.py
+import json
+
+import pytest
+
+from src import binary_cache
+from src.binary_cache import BinaryTrackFile, CacheFormatError, read_track, write_track
+from src.subtitle_manager import SubtitleManager
+from src.subtitle_store import SubtitleTrack
+
+
+def make_dicts():
+    return [
+        {'index': 1, 'start': '00:00:01,000', 'end': '00:00:02,500', 'text': 'Hello'},
+        {'index': 2, 'start': '00:00:03,000', 'end': '00:00:04,000', 'text': '你好，世界', 'in_frame': 72, 'out_frame': 96},
+        {'index': 'x', 'start': '3.5s', 'text': ''},
+    ]
+
+def test_write_and_read_round_trip(tmp_path):
+    path = tmp_path / "track_1.svt"
+    write_track(path, make_dicts())
+    track = read_track(path)
+    assert isinstance(track, SubtitleTrack)
+    assert track.to_dicts() == make_dicts()
+
+def test_rows_are_read_lazily(tmp_path):
+    path = tmp_path / "track_1.svt"
+    write_track(path, [{'index': i, 'start': '00:00:01,000', 'end': '00:00:02,000', 'text': f"第{i}行"}
+                       for i in range(1, 1001)])
+    with BinaryTrackFile(path) as track_file:
+        assert len(track_file) == 1000
+        assert track_file.text(499) == "第500行"
+        assert [row['index'] for row in track_file.rows(998, 2000)] == [999, 1000]
+        assert track_file.rows(5, 5) == []
+        assert list(track_file.column('ids')[:3]) == [1, 2, 3]
+
+@pytest.mark.parametrize("start, stop, expected", [
+    (3, 5, []),
+    (10, 20, []),
+    (2, 1, []),
+    (-2, 2, [1, 2]),
+    (-5, -1, []),
+])
+def test_out_of_range_rows_are_clamped(tmp_path, start, stop, expected):
+    path = tmp_path / "track_1.svt"
+    write_track(path, make_dicts())
+    with BinaryTrackFile(path) as track_file:
+        assert [row['index'] for row in track_file.rows(start, stop)] == expected
+        assert len(track_file.to_track_rows(start, stop)) == len(expected)
+
+def test_texts_can_be_replaced_when_writing(tmp_path):
+    path = tmp_path / "track_1.svt"
+    write_track(path, [{'index': 1, 'text': '<i>a</i>'}], texts=['a'])
+    assert read_track(path)[0]['text'] == 'a'
+
+@pytest.mark.parametrize("content", [b"", b"SVTRACK", b"not a cache file at all, but long enough to hold a header"])
+def test_invalid_files_are_rejected(tmp_path, content):
+    path = tmp_path / "bad.svt"
+    path.write_bytes(content)
+    with pytest.raises(CacheFormatError):
+        read_track(path)
+
+def test_truncated_file_is_rejected(tmp_path):
+    path = tmp_path / "track_1.svt"
+    write_track(path, make_dicts())
+    path.write_bytes(path.read_bytes()[:-3])
+    with pytest.raises(CacheFormatError):
+        read_track(path)
+
+def test_conversion_tools_round_trip(tmp_path):
+    subtitles = [{'index': sub['index'], 'start': sub['start'], 'end': sub.get('end'), 'text': sub['text']}
+                 for sub in make_dicts()]
+    (tmp_path / "a.json").write_text(json.dumps(subtitles, ensure_ascii=False), encoding='utf-8')
+    assert binary_cache.json_to_binary(tmp_path / "a.json", tmp_path / "a.svt") == 3
+    assert binary_cache.binary_to_json(tmp_path / "a.svt", tmp_path / "b.json") == 3
+    assert json.loads((tmp_path / "b.json").read_text(encoding='utf-8')) == subtitles
+
+def test_manager_saves_and_loads_binary_cache(tmp_path, mocker):
+    resolve_integration = mocker.MagicMock()
+    resolve_integration.get_timebase.return_value = None
+    manager = SubtitleManager(resolve_integration, cache_format='binary')
+    manager.cache_dir = str(tmp_path)
+    resolve_integration.export_subtitles_to_json.return_value = make_dicts()[:2]
+
+    assert len(manager.load_subtitles(1)) == 2
+    assert manager.current_json_path == str(tmp_path / "track_1.svt")
+    manager.update_subtitle_text(1, "<b>Hi</b>")
+
+    reloaded = SubtitleManager(resolve_integration, cache_format='binary')
+    reloaded.cache_dir = str(tmp_path)
+    assert reloaded.load_subtitles(1)[0]['text'] == "Hi"
+    resolve_integration.export_subtitles_to_json.assert_called_once()
+
+    json_path = manager.json_export_path()
+    assert json_path == str(tmp_path / "track_1.json")
+    assert json.loads(open(json_path, encoding='utf-8').read())[0] == {
+        'index': 1, 'start': '00:00:01,000', 'end': '00:00:02,500', 'text': 'Hi'}
+
+def test_cache_format_setting(monkeypatch, mocker):
+    monkeypatch.setenv("SUBVIGATOR_CACHE_FORMAT", "binary")
+    assert SubtitleManager(mocker.MagicMock()).cache_format == 'binary'
+    monkeypatch.setenv("SUBVIGATOR_CACHE_FORMAT", "xml")
+    assert SubtitleManager(mocker.MagicMock()).cache_format == 'json'
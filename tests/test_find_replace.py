@@ -0,0 +1,102 @@
+# tests/test_find_replace.py
+import time
+
+import pytest
+from unittest.mock import MagicMock, patch
+
+from src import find_replace
+from src.find_replace import (
+    FindOptions, MatchGuard, MatchTimeout, PatternError, compile_query, compile_wildcard, make_find_matcher,
+    replace_in_text, replace_in_texts,
+)
+from src.subtitle_manager import SubtitleManager
+
+
+def test_compiled_patterns_are_cached():
+    compile_query.cache_clear()
+    first = compile_query(r"\d+", True)
+    assert compile_query(r"\d+", True) is first
+    assert compile_query.cache_info().hits == 1
+
+@pytest.mark.parametrize("options, text, expected", [
+    (FindOptions(), "Hello World", False),
+    (FindOptions(ignore_case=True), "Hello World", True),
+    (FindOptions(whole_word=True), "worldwide", False),
+    (FindOptions(whole_word=True), "the world.", True),
+    (FindOptions(regex=True), "w.rld", True),
+])
+def test_find_matcher_flags(options, text, expected):
+    query = "w.rld" if options.regex else "world"
+    assert make_find_matcher(query, options)(text) is expected
+
+def test_regex_replace_expands_capture_groups():
+    assert replace_in_text("John Smith", r"(\w+) (\w+)", r"\2, \1", regex=True) == "Smith, John"
+    assert replace_in_text("a1 b22", r"(?P<n>\d+)", r"<\g<n>>", regex=True) == "a<1> b<22>"
+
+def test_literal_replace_inserts_text_verbatim():
+    """Outside regex mode, backslashes in the replacement are not group references."""
+    assert replace_in_text("Cat cat", "cat", r"\1", ignore_case=True) == r"\1 \1"
+    assert replace_in_text("a.b.c", ".", "-", count=1) == "a-b.c"
+
+def test_invalid_patterns_raise_pattern_error():
+    with pytest.raises(PatternError):
+        compile_query("(unclosed", True)
+    with pytest.raises(PatternError):
+        replace_in_text("abc", "(b)", r"\2", regex=True)
+
+@pytest.mark.skipif(find_replace._regex is not None,
+                    reason="With the regex module, nested quantifiers are handled by match timeouts")
+@pytest.mark.parametrize("pattern", [r"(a+)+$", r"(a|a)*b", r"(a|aa)+$", r"(.*a){20}"])
+def test_catastrophic_patterns_are_rejected(pattern):
+    with pytest.raises(PatternError):
+        compile_query(pattern, True)
+
+def test_backtracking_match_is_stopped_per_match():
+    """A pattern the up-front check lets through still cannot hang a single row."""
+    pattern = compile_query(r"(a?){28}a{28}", True)
+    assert MatchGuard().search(compile_query(r"a", True), "a")  # Start the worker outside the timed call
+    start = time.monotonic()
+    with pytest.raises(MatchTimeout):
+        MatchGuard(budget=0.5).search(pattern, "a" * 28)
+    assert time.monotonic() - start < 5
+    assert MatchGuard().search_all(compile_query(r"\d+", True), ["a1", "b"]) == [True, False]
+
+def test_only_user_regexes_are_matched_in_the_worker():
+    """re.compile shares pattern objects, so the flag must not depend on identity."""
+    regex_query = compile_query("abc", True)
+    assert not compile_query("abc").in_worker
+    assert regex_query.in_worker is (find_replace._regex is None)
+    assert not compile_wildcard("a*c").in_worker
+    assert MatchGuard().search_all(compile_wildcard("a*c"), ["abc", "abd"]) == [True, False]
+
+def test_falls_back_in_process_without_a_worker(monkeypatch):
+    def fail_to_start():
+        raise find_replace._WorkerUnavailable("no interpreter")
+    monkeypatch.setattr(find_replace, '_worker', None)
+    monkeypatch.setattr(find_replace, '_worker_unavailable', False)
+    monkeypatch.setattr(find_replace, '_can_spawn', lambda: True)
+    monkeypatch.setattr(find_replace, '_MatchWorker', fail_to_start)
+    query = find_replace.CompiledQuery(compile_query(r"\d", True).pattern, in_worker=True)
+    assert MatchGuard().search_all(query, ["a1", "b"]) == [True, False]
+    assert find_replace._worker_unavailable
+    assert replace_in_texts(["a1"], r"(\d)", r"<\1>", regex=True) == ["a<1>"]
+
+def test_guard_stops_after_budget():
+    guard = MatchGuard(budget=0)
+    with pytest.raises(MatchTimeout):
+        guard.search(compile_query("a"), "aaa")
+
+def test_manager_regex_replace_all_is_all_or_nothing():
+    manager = SubtitleManager(MagicMock())
+    manager.subtitles_data = [
+        {'index': 1, 'text': 'Scene 1'},
+        {'index': 2, 'text': 'Scene 22'},
+    ]
+    changes = manager.handle_replace_all(r"Scene (\d+)", r"Act \1", regex=True)
+    assert [c['new'] for c in changes] == ["Act 1", "Act 22"]
+
+    with patch('src.find_replace.MATCH_TIME_BUDGET', 0), \
+            patch('src.subtitle_manager.MatchGuard', lambda: MatchGuard(budget=0)):
+        with pytest.raises(MatchTimeout):
+            manager.handle_replace_all("Act", "Scene", ignore_case=True)
+    assert [s['text'] for s in manager.subtitles_data] == ["Act 1", "Act 22"]
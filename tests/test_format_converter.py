@@ -75,7 +75,7 @@ def test_format_subtitles_to_srt_empty_list():
     """Test with an empty list of subtitles, should return an empty string."""
     assert format_subtitles_to_srt([], 24.0) == ""
 
-def test_format_subtitles_to_srt_invalid_entry(mock_timecode_utils, capsys):
+def test_format_subtitles_to_srt_invalid_entry(mock_timecode_utils, caplog):
     """Test that invalid subtitle entries are skipped gracefully."""
     subtitles = [
         {'start': '00:00:01,000', 'text': 'Missing end time.'}, # Invalid
@@ -89,9 +89,9 @@ def test_format_subtitles_to_srt_invalid_entry(mock_timecode_utils, capsys):
     assert "This is valid." in result
     assert "Missing end time." not in result
     
-    # Check that an error was printed for the invalid entry
-    captured = capsys.readouterr()
-    assert "Skipping invalid subtitle entry at index 0" in captured.out
+    # Check that a single aggregated warning was logged for the invalid entry
+    assert "Skipping invalid subtitle entries: 1 occurrence(s)" in caplog.text
+    assert "index 0" in caplog.text
 
 # --- Tests for convert_json_to_srt ---
 
@@ -120,25 +120,23 @@ def test_convert_json_to_srt_success(mocker):
     
     assert result == "EXPECTED_SRT_CONTENT"
 
-def test_convert_json_to_srt_file_not_found(mocker, capsys):
+def test_convert_json_to_srt_file_not_found(mocker, caplog):
     """Test handling of a non-existent JSON file."""
     mocker.patch('builtins.open', side_effect=FileNotFoundError("File not found"))
     
     result = convert_json_to_srt('non/existent/file.json', 24.0)
     
     assert result == ""
-    captured = capsys.readouterr()
-    assert "Error reading or parsing JSON file" in captured.out
+    assert "Error reading or parsing JSON file" in caplog.text
 
-def test_convert_json_to_srt_invalid_json(mocker, capsys):
+def test_convert_json_to_srt_invalid_json(mocker, caplog):
     """Test handling of a file with invalid JSON content."""
     mocker.patch('builtins.open', mock_open(read_data="{not-valid-json}"))
     
     result = convert_json_to_srt('bad/file.json', 24.0)
     
     assert result == ""
-    captured = capsys.readouterr()
-    assert "Error reading or parsing JSON file" in captured.out
+    assert "Error reading or parsing JSON file" in caplog.text
 
 # --- Tests for parse_srt_content ---
 
@@ -225,19 +223,18 @@ def test_parse_srt_content_extra_newlines():
     ]
     assert parse_srt_content(srt_content) == expected
 
-def test_parse_srt_content_invalid_block_missing_parts(capsys):
+def test_parse_srt_content_invalid_block_missing_parts(caplog):
     """Test that blocks with missing parts are skipped."""
     srt_content = (
         "1\n"
         "00:00:01,000 --> 00:00:02,500"
     )
     assert parse_srt_content(srt_content) == []
-    # This case does not print an error because it's filtered out by `if len(lines) >= 3`
+    # This case does not log an error because it's filtered out by `if len(lines) >= 3`
     # so we just check for an empty list.
-    captured = capsys.readouterr()
-    assert captured.out == ""
+    assert caplog.text == ""
 
-def test_parse_srt_content_invalid_block_bad_index(capsys):
+def test_parse_srt_content_invalid_block_bad_index(caplog):
     """Test that blocks with a non-integer index are skipped."""
     srt_content = (
         "A\n"
@@ -245,8 +242,7 @@ def test_parse_srt_content_invalid_block_bad_index(capsys):
         "Some text."
     )
     assert parse_srt_content(srt_content) == []
-    captured = capsys.readouterr()
-    assert "Skipping invalid SRT block" in captured.out
+    assert "Skipping invalid SRT blocks: 1 occurrence(s)" in caplog.text
 
 def test_parse_srt_content_empty_input():
     """Test parsing an empty string."""
@@ -0,0 +1,37 @@
+# tests/test_glossary.py
+import pytest
+
+from src.glossary import GlossaryAutomaton, GlossaryError, parse_glossary_rules
+
+
+@pytest.mark.parametrize("rules, text, expected", [
+    # Leftmost wins over longer matches starting later
+    ({'he': 'A', 'she': 'B', 'hers': 'C'}, 'ushers', 'uBrs'),
+    # Longest wins among matches starting at the same position
+    ({'中国': 'X', '中国人': 'Y', '国人': 'Z'}, '中国人民中国', 'Y民X'),
+    # A shorter rule inside an unfinished longer candidate still applies
+    ({'ab': '1', 'abcdX': '2', 'c': '3'}, 'abcdY', '13dY'),
+    # Replaced text is not matched again
+    ({'a': 'b', 'b': 'c'}, 'aabb', 'bbcc'),
+    ({'x': 'y'}, 'no match', 'no match'),
+])
+def test_leftmost_longest_replacement(rules, text, expected):
+    assert GlossaryAutomaton(rules).replace(text) == expected
+
+def test_matches_agree_with_sequential_scan():
+    """On non-overlapping rules the automaton agrees with plain str.replace calls."""
+    rules = {f"term{i:03d}": f"T{i}" for i in range(300)}
+    text = " ".join(f"term{i:03d}" for i in range(0, 300, 7))
+    expected = text
+    for find_text, replace_text in rules.items():
+        expected = expected.replace(find_text, replace_text)
+    assert GlossaryAutomaton(rules).replace(text) == expected
+
+def test_parse_glossary_rules():
+    content = "# names\nTony Stark\t托尼·斯塔克\n\nJ.A.R.V.I.S. => 贾维斯\nTony Stark\t钢铁侠\n"
+    assert parse_glossary_rules(content) == {'Tony Stark': '钢铁侠', 'J.A.R.V.I.S.': '贾维斯'}
+
+@pytest.mark.parametrize("content", ["no separator here", "\tmissing find"])
+def test_parse_glossary_rules_rejects_bad_lines(content):
+    with pytest.raises(GlossaryError):
+        parse_glossary_rules(content)
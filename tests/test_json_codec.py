@@ -0,0 +1,71 @@
+# tests/test_json_codec.py
+import json
+
+import pytest
+
+from src import json_codec
+from src.json_codec import available_codecs, resolve_codec, write_cache_json
+from src.subtitle_manager import SubtitleManager
+from src.subtitle_store import SubtitleTrack, ms_to_srt_time, ms_to_srt_times
+
+
+def make_track():
+    return SubtitleTrack([
+        {'index': 1, 'start': '00:00:01,000', 'end': '00:00:02,500', 'text': '<i>Hello</i>'},
+        {'index': 2, 'start': '00:00:03,000', 'end': '00:00:04,000', 'text': '他说："走吧"\n\\ok', 'in_frame': 72},
+        {'index': 'x', 'start': '3.5s', 'text': 'Odd'},
+    ])
+
+EXPECTED = [
+    {'index': 1, 'start': '00:00:01,000', 'end': '00:00:02,500', 'text': 'Hello'},
+    {'index': 2, 'start': '00:00:03,000', 'end': '00:00:04,000', 'text': '他说："走吧"\n\\ok'},
+    {'index': 'x', 'start': '3.5s', 'end': None, 'text': 'Odd'},
+]
+
+@pytest.mark.parametrize("codec", available_codecs())
+@pytest.mark.parametrize("chunk_rows", [1, 2, 5000])
+def test_every_codec_writes_the_same_json(tmp_path, monkeypatch, codec, chunk_rows):
+    monkeypatch.setattr(json_codec, 'CHUNK_ROWS', chunk_rows)
+    path = tmp_path / "track_1.json"
+    write_cache_json(path, make_track(), codec)
+    assert json.loads(path.read_text(encoding='utf-8')) == EXPECTED
+
+@pytest.mark.parametrize("codec", available_codecs())
+def test_empty_track(tmp_path, codec):
+    path = tmp_path / "track_1.json"
+    write_cache_json(path, SubtitleTrack(), codec)
+    assert json.loads(path.read_text(encoding='utf-8')) == []
+
+def test_compact_codecs_write_no_whitespace(tmp_path):
+    path = tmp_path / "track_1.json"
+    write_cache_json(path, SubtitleTrack([{'index': 1, 'start': '00:00:01,000', 'end': '00:00:02,000', 'text': 'a'}]), 'json')
+    assert path.read_text(encoding='utf-8') == '[{"index":1,"start":"00:00:01,000","end":"00:00:02,000","text":"a"}]'
+
+def test_resolve_codec_falls_back(monkeypatch):
+    monkeypatch.setattr(json_codec, 'orjson', None)
+    monkeypatch.setattr(json_codec, 'msgspec', None)
+    assert resolve_codec('auto') == 'json'
+    assert resolve_codec('orjson') == 'json'
+    assert resolve_codec('indent') == 'indent'
+    assert resolve_codec('yaml') == 'json'
+
+def test_manager_codec_setting(monkeypatch, mocker):
+    monkeypatch.setenv("SUBVIGATOR_JSON_CODEC", "indent")
+    assert SubtitleManager(mocker.MagicMock()).json_codec == 'indent'
+    monkeypatch.delenv("SUBVIGATOR_JSON_CODEC")
+    assert SubtitleManager(mocker.MagicMock()).json_codec == available_codecs()[0]
+
+def test_cache_miss_is_written_with_the_codec(tmp_path, mocker):
+    resolve_integration = mocker.MagicMock()
+    resolve_integration.export_subtitles_to_json.return_value = EXPECTED[:2]
+    manager = SubtitleManager(resolve_integration, json_codec='json')
+    manager.cache_dir = str(tmp_path)
+
+    assert len(manager.load_subtitles(1)) == 2
+    content = (tmp_path / "track_1.json").read_text(encoding='utf-8')
+    assert '\n  ' not in content
+    assert json.loads(content) == EXPECTED[:2]
+
+def test_ms_to_srt_times_matches_ms_to_srt_time():
+    values = [0, 999, 61001, 3599999, 99 * 3600000 + 1, 123 * 3600000]
+    assert ms_to_srt_times(values + [-1]) == [ms_to_srt_time(value) for value in values] + [None]
@@ -0,0 +1,121 @@
+# tests/test_jsonl_cache.py
+import json
+
+import pytest
+
+from src import jsonl_cache
+from src.jsonl_cache import patch_row, read_rows, read_track, row_count, write_track
+from src.subtitle_manager import SubtitleManager
+from src.subtitle_store import SubtitleTrack, ms_to_srt_time
+
+
+def make_track(count=5):
+    return SubtitleTrack([
+        {'index': i, 'start': ms_to_srt_time(i * 1000), 'end': ms_to_srt_time(i * 1000 + 800), 'text': f"第{i}行"}
+        for i in range(1, count + 1)
+    ])
+
+def test_write_and_read_round_trip(tmp_path):
+    path = tmp_path / "track_1.jsonl"
+    track = make_track()
+    track.append({'index': 'x', 'start': '3.5s', 'text': '<i>odd</i>'})
+    write_track(path, track)
+    assert read_track(path) == [
+        {'index': sub['index'], 'start': sub.get('start'), 'end': sub.get('end'), 'text': sub['text']}
+        for sub in track[:5]
+    ] + [{'index': 'x', 'start': '3.5s', 'end': None, 'text': 'odd'}]
+    assert path.read_bytes().count(b'\n') == 6
+    assert row_count(path) == 6
+
+def test_read_rows_reads_a_range(tmp_path):
+    path = tmp_path / "track_1.jsonl"
+    write_track(path, make_track(100))
+    assert [row['index'] for row in read_rows(path, 40, 43)] == [41, 42, 43]
+    assert [row['index'] for row in read_rows(path, 98, 200)] == [99, 100]
+    assert read_rows(path, 50, 50) == []
+
+def test_shorter_edit_is_patched_in_place(tmp_path):
+    path = tmp_path / "track_1.jsonl"
+    track = make_track()
+    write_track(path, track)
+    size = path.stat().st_size
+    track[1]['text'] = "短"
+    assert patch_row(path, track, 1)
+    assert path.stat().st_size == size
+    assert read_track(path)[1]['text'] == "短"
+    assert read_rows(path, 1, 2)[0]['text'] == "短"
+
+def test_longer_edit_is_appended(tmp_path):
+    path = tmp_path / "track_1.jsonl"
+    track = make_track()
+    write_track(path, track)
+    track[3]['text'] = "a much longer line than before"
+    assert patch_row(path, track, 3)
+    last_line = path.read_bytes().splitlines()[-1]
+    assert json.loads(last_line)['row'] == 3
+    assert read_track(path) == [{'index': sub['index'], 'start': sub['start'], 'end': sub['end'], 'text': sub['text']}
+                                for sub in track]
+    assert read_rows(path, 3, 4)[0] == {'index': 4, 'start': '00:00:04,000', 'end': '00:00:04,800',
+                                        'text': "a much longer line than before"}
+
+def test_shorter_edit_after_an_appended_edit_keeps_the_row(tmp_path):
+    path = tmp_path / "track_1.jsonl"
+    track = make_track()
+    write_track(path, track)
+    track[2]['text'] = "a much longer line than before"
+    assert patch_row(path, track, 2)
+    track[2]['text'] = "短"
+    assert patch_row(path, track, 2)
+    expected = [{'index': sub['index'], 'start': sub['start'], 'end': sub['end'], 'text': sub['text']}
+                for sub in track]
+    assert read_track(path) == expected
+    assert read_rows(path, 2, 3)[0]['text'] == "短"
+    assert jsonl_cache.rebuild_index(path) == 5
+    assert read_track(path) == expected
+
+def test_patching_declines_when_the_file_must_be_rewritten(tmp_path, monkeypatch):
+    path = tmp_path / "track_1.jsonl"
+    track = make_track()
+    write_track(path, track)
+    track.append({'index': 6, 'text': 'new'})
+    assert not patch_row(path, track, 5)  # Rows were added
+
+    track = make_track()
+    monkeypatch.setattr(jsonl_cache, 'COMPACT_RATIO', 0)
+    track[0]['text'] = "longer than the first line was"
+    assert not patch_row(path, track, 0)
+
+def test_stale_index_is_rebuilt(tmp_path):
+    path = tmp_path / "track_1.jsonl"
+    write_track(path, make_track())
+    with open(path, 'ab') as f:
+        f.write(b'{"row":0,"index":1,"start":null,"end":null,"text":"appended elsewhere"}\n')
+    assert read_rows(path, 0, 1)[0]['text'] == "appended elsewhere"
+    (tmp_path / "track_1.jsonl.idx").unlink()
+    assert row_count(path) == 5
+
+def test_replacement_for_unknown_row_is_an_error(tmp_path):
+    path = tmp_path / "track_1.jsonl"
+    path.write_bytes(b'{"row":3,"index":1,"text":"a"}\n')
+    with pytest.raises(ValueError):
+        read_track(path)
+
+def test_manager_patches_text_edits(tmp_path, mocker):
+    resolve_integration = mocker.MagicMock()
+    resolve_integration.get_timebase.return_value = None
+    resolve_integration.export_subtitles_to_json.return_value = make_track(3).to_dicts()
+    manager = SubtitleManager(resolve_integration, cache_format='jsonl')
+    manager.cache_dir = str(tmp_path)
+    manager.load_subtitles(1)
+    save = mocker.spy(manager, '_save_changes_to_json')
+
+    assert manager.update_subtitle_text(2, "<b>changed</b>, and longer")
+    save.assert_not_called()
+    assert read_rows(str(tmp_path / "track_1.jsonl"), 1, 2)[0]['text'] == "changed, and longer"
+
+    reloaded = SubtitleManager(resolve_integration, cache_format='jsonl')
+    reloaded.cache_dir = str(tmp_path)
+    assert [sub['text'] for sub in reloaded.load_subtitles(1)] == ["第1行", "changed, and longer", "第3行"]
+    json_path = manager.json_export_path()
+    assert json_path == str(tmp_path / "track_1.json")
+    assert json.loads(open(json_path, encoding='utf-8').read())[1]['text'] == "changed, and longer"
@@ -0,0 +1,72 @@
+# tests/test_lint.py
+import random
+
+import pytest
+
+from src import lint
+from src.lint import (CPS, LINE_COUNT, LINE_LENGTH, MAX_DURATION, MIN_DURATION, MIN_GAP, OVERLAP, PROFILES,
+                      describe_flags, lint_subtitles)
+
+
+def sub(text, start=None, end=None):
+    return {'text': text, 'in_frame': start, 'out_frame': end}
+
+@pytest.fixture(params=['numpy', 'python'])
+def engine(request, monkeypatch):
+    """Runs each test on the NumPy path (if installed) and on the pure-Python path."""
+    if request.param == 'numpy':
+        if lint.np is None:
+            pytest.skip("NumPy is not installed")
+    else:
+        monkeypatch.setattr(lint, 'np', None)
+    return request.param
+
+def test_text_rules(engine):
+    result = lint_subtitles([
+        sub("短句"),
+        sub("这一行字幕明显超过了十五个字的限制呢"),
+        sub("一\n二\n三"),
+        sub("<i>十五个字以内的字幕加上标签</i>"),
+    ], frame_rate=0)
+    assert result.flags == [0, LINE_LENGTH, LINE_COUNT, 0]
+
+def test_timing_rules(engine):
+    result = lint_subtitles([
+        sub("好", 0, 10),              # 0.42 s: too short
+        sub("好", 48, 48 + 24 * 8),    # 8 s: too long
+        sub("这是十个字的一句话啊", 250, 274),  # 10 chars in 1 s: too fast
+        sub("好的", 275, 323),          # 1-frame gap after the previous one
+        sub("好的", 400, 460),
+        sub("好的", 450, 500),          # Overlaps the previous one
+        sub("没有时间"),
+    ], frame_rate=24)
+    assert result.flags == [MIN_DURATION, MAX_DURATION, CPS, MIN_GAP, OVERLAP, OVERLAP, 0]
+    assert result.counts() == {CPS: 1, MIN_DURATION: 1, MAX_DURATION: 1, MIN_GAP: 1, OVERLAP: 2}
+    assert result.rows_with_violations() == [0, 1, 2, 3, 4, 5]
+
+def test_profiles_change_limits(engine):
+    line = sub("A subtitle line that is thirty-nine long", 0, 96)
+    assert lint_subtitles([line], 24, PROFILES['cjk']).flags == [LINE_LENGTH | CPS]
+    assert lint_subtitles([line], 24, PROFILES['latin']).flags == [0]
+
+def test_cjk_line_length_follows_the_char_limit(engine):
+    line = sub("二十个字" * 5, 0, 120)
+    assert lint_subtitles([line], 24, PROFILES['cjk']).flags == [LINE_LENGTH]
+    assert lint_subtitles([line], 24, PROFILES['cjk'], char_limit=20).flags == [0]
+    assert lint_subtitles([line], 24, PROFILES['latin'], char_limit=10).flags == [0]
+
+def test_numpy_and_python_paths_agree(monkeypatch):
+    if lint.np is None:
+        pytest.skip("NumPy is not installed")
+    random.seed(11)
+    subs, start = [], 0
+    for _ in range(2000):
+        start += random.randrange(0, 60)
+        subs.append(sub("字" * random.randrange(0, 30), start, start + random.randrange(1, 250)))
+    expected = lint_subtitles(subs, 25).flags
+    monkeypatch.setattr(lint, 'np', None)
+    assert lint_subtitles(subs, 25).flags == expected
+
+def test_describe_flags():
+    assert describe_flags(CPS | OVERLAP) == ["阅读速度过快", "与其他字幕重叠"]
+    assert describe_flags(0) == []
@@ -0,0 +1,106 @@
+# tests/test_log_utils.py
+import json
+import logging
+import pytest
+from unittest.mock import MagicMock
+
+from src.log_utils import ErrorAggregator, RateLimitFilter, SpanTracer, get_logger, traced, tracer
+
+
+def _record(msg, *args, level=logging.WARNING):
+    return logging.LogRecord("subvigator.test", level, __file__, 1, msg, args, None)
+
+def test_rate_limit_filter_drops_repeats_within_window():
+    """Only `burst` records with the same template should pass within one window."""
+    limiter = RateLimitFilter(burst=2, interval=60.0)
+    results = [limiter.filter(_record("bad entry %d", i)) for i in range(5)]
+    assert results == [True, True, False, False, False]
+
+def test_rate_limit_filter_reports_suppressed_count(mocker):
+    """The first record after a window reset is preceded by a separate suppression note."""
+    clock = mocker.patch('src.log_utils.time.monotonic', return_value=0.0)
+    handler = logging.Handler()
+    handler.handle = MagicMock()
+    limiter = RateLimitFilter(burst=1, interval=10.0, handler=handler)
+    limiter.filter(_record("bad entry %d", 1))
+    limiter.filter(_record("bad entry %d", 2))
+    limiter.filter(_record("bad entry %d", 3))
+
+    clock.return_value = 11.0
+    record = _record("bad entry %d", 4)
+    assert limiter.filter(record) is True
+    assert record.getMessage() == "bad entry 4"
+    note = handler.handle.call_args[0][0]
+    assert note.getMessage() == "2 similar messages suppressed: bad entry %d"
+
+def test_rate_limit_filter_does_not_alter_shared_records(caplog):
+    """Other handlers (here caplog) must see records exactly as they were logged."""
+    logger = get_logger("test.ratelimit")
+    handler = logging.NullHandler()
+    handler.addFilter(RateLimitFilter(burst=1, interval=60.0, handler=handler))
+    logger.addHandler(handler)
+    try:
+        with caplog.at_level(logging.WARNING, logger="subvigator"):
+            for i in range(3):
+                logger.warning("bad entry %d", i)
+    finally:
+        logger.removeHandler(handler)
+
+    assert [r.getMessage() for r in caplog.records] == ["bad entry 0", "bad entry 1", "bad entry 2"]
+
+def test_rate_limit_filter_ignores_info_records():
+    limiter = RateLimitFilter(burst=1, interval=60.0)
+    assert all(limiter.filter(_record("progress", level=logging.INFO)) for _ in range(3))
+
+def test_error_aggregator_logs_single_summary(caplog):
+    """Many errors produce one log record with the count and the first N samples."""
+    logger = get_logger("test")
+    with caplog.at_level(logging.WARNING, logger="subvigator"):
+        with ErrorAggregator(logger, "Skipping rows", max_samples=2) as errors:
+            for i in range(10):
+                errors.add("row %d", i)
+
+    assert len(caplog.records) == 1
+    assert "Skipping rows: 10 occurrence(s), first 2: row 0; row 1" in caplog.text
+
+def test_error_aggregator_is_silent_without_errors(caplog):
+    with ErrorAggregator(get_logger("test"), "Skipping rows"):
+        pass
+    assert caplog.text == ""
+
+def test_span_tracer_writes_jsonl(tmp_path):
+    """Each span, including nested ones, becomes one JSON line."""
+    trace_file = tmp_path / "trace.jsonl"
+    span_tracer = SpanTracer()
+    span_tracer.enable(str(trace_file))
+    with span_tracer.span("outer", track=1):
+        with span_tracer.span("inner"):
+            pass
+    with pytest.raises(ValueError):
+        with span_tracer.span("failing"):
+            raise ValueError("boom")
+    span_tracer.disable()
+
+    entries = [json.loads(line) for line in trace_file.read_text(encoding='utf-8').splitlines()]
+    assert [e['name'] for e in entries] == ["inner", "outer", "failing"]
+    assert entries[0]['parent'] == "outer"
+    assert entries[1]['attrs'] == {"track": 1}
+    assert entries[2]['status'] == "ValueError"
+
+def test_traced_decorator_uses_global_tracer(tmp_path):
+    @traced("demo.op")
+    def op(x):
+        return x * 2
+
+    assert op(2) == 4  # Tracing disabled: plain call
+
+    trace_file = tmp_path / "trace.jsonl"
+    tracer.enable(str(trace_file))
+    try:
+        assert op(3) == 6
+    finally:
+        tracer.disable()
+
+    entries = [json.loads(line) for line in trace_file.read_text(encoding='utf-8').splitlines()]
+    assert len(entries) == 1
+    assert entries[0]['name'] == "demo.op"
@@ -5,8 +5,9 @@ from unittest.mock import MagicMock, patch
 # Add src to path to allow imports
 sys.path.insert(0, './src')
 
-from PySide6.QtWidgets import QApplication, QTreeWidget, QTreeWidgetItem
+from PySide6.QtWidgets import QApplication, QTreeView
 from src.main import ApplicationController
+from src.subtitle_table_model import SubtitleTableModel
 
 @pytest.fixture
 def mock_resolve_integration():
@@ -19,8 +20,8 @@ def mock_resolve_integration():
 def mock_subtitle_manager():
     mock = MagicMock()
     mock.get_subtitles.return_value = [
-        {'index': 1, 'start': '00:00:10,500', 'text': 'Subtitle 1'},
-        {'index': 2, 'start': '00:00:20,000', 'text': 'Subtitle 2'},
+        {'index': 1, 'start': '00:00:10,500', 'text': 'Subtitle 1', 'in_frame': 252},
+        {'index': 2, 'start': '00:00:20,000', 'text': 'Subtitle 2', 'in_frame': 480},
     ]
     return mock
 
@@ -47,80 +48,266 @@ def controller(mock_resolve_integration, mock_subtitle_manager, mock_timecode_ut
 
     # Mock the window and its components
     with patch('src.main.SubvigatorWindow') as mock_window:
-        # We need a real QTreeWidget to test item interaction
-        tree = QTreeWidget()
+        # We need a real view and model to test item interaction
+        tree = QTreeView()
         qtbot.addWidget(tree)
+        model = SubtitleTableModel(tree)
+        tree.setModel(model)
         mock_window.return_value.tree = tree
         
         controller = ApplicationController(
             resolve_integration=mock_resolve_integration,
             subtitle_manager=mock_subtitle_manager
         )
-        # Manually populate the tree for the test
-        for sub in mock_subtitle_manager.get_subtitles():
-            item = QTreeWidgetItem([str(sub['index']), sub['start'], sub['text']])
-            controller.window.tree.addTopLevelItem(item)
+        # Manually populate the view for the test
+        model.set_subtitles(list(mock_subtitle_manager.get_subtitles()))
 
         yield controller
 
-def test_on_item_clicked_jumps_to_correct_timecode(controller, mock_resolve_integration):
-    """
-    Test that clicking a subtitle item in the UI triggers a timecode jump in Resolve.
-    """
-    # GIVEN an item in the tree
-    item_to_click = controller.window.tree.topLevelItem(0) # First item: index 1, start '00:00:10,500'
-    column_to_click = 0
-    
-    # WHEN the item is clicked
-    controller.on_item_clicked(item_to_click, column_to_click)
+def add_row(controller, sub):
+    """Appends a subtitle row to the controller's view and returns its index."""
+    model = controller.window.tree.model()
+    model.set_subtitles(model.subtitles + [sub])
+    return model.index(model.rowCount() - 1, 0)
 
-    # THEN the timecode utilities are called with the correct parameters
-    frame_rate = mock_resolve_integration.get_current_timeline_info()[0]['frame_rate']
-    mock_tc_utils = mock_resolve_integration.get_timecode_utils()
-    mock_tc_utils.timecode_to_frames.assert_called_once_with('00:00:10,500', frame_rate)
-    
-    # AND the resolve integration is called to set the new timecode
-    # Calculation: (10s + 500ms) * 24fps = 10.5 * 24 = 252 frames
-    # Converted back to timecode: 10s and 12 frames -> 00:00:10:12
-    expected_frames = 252
-    expected_resolve_tc = "00:00:10:12"
-    mock_tc_utils.timecode_from_frame.assert_called_once_with(expected_frames, frame_rate)
-    mock_resolve_integration.timeline.SetCurrentTimecode.assert_called_once_with(expected_resolve_tc)
-
-def test_on_item_clicked_with_invalid_item_id(controller, mock_resolve_integration, capsys):
+def test_on_item_clicked_jumps_to_correct_timecode(controller, mock_resolve_integration, mock_subtitle_manager):
     """
-    Test that clicking an item with a non-numeric ID does not cause a crash.
+    Test that clicking a subtitle item seeks Resolve to the row's stored start frame
+    with a single call, without reloading subtitles or timeline info.
     """
-    # GIVEN an item with an invalid ID
-    item_to_click = QTreeWidgetItem(["invalid_id", "00:00:00,000", "some text"])
-    controller.window.tree.addTopLevelItem(item_to_click)
-    column_to_click = 0
+    mock_resolve_integration.seek_to_frame.return_value = (True, None)
+    mock_subtitle_manager.get_subtitles.reset_mock()
+    mock_resolve_integration.get_current_timeline_info.reset_mock()
+
+    # GIVEN an item in the tree (first item: index 1, start '00:00:10,500' = frame 252 at 24fps)
+    item_to_click = controller.window.tree.model().index(0, 0)
 
     # WHEN the item is clicked
-    controller.on_item_clicked(item_to_click, column_to_click)
+    controller.on_item_clicked(item_to_click)
 
-    # THEN no timecode jump is attempted
-    mock_resolve_integration.timeline.SetCurrentTimecode.assert_not_called()
-    
-    # AND a warning is logged
-    captured = capsys.readouterr()
-    assert "LOG: WARNING: Failed to process item click for ID invalid_id" in captured.out
-    
-def test_on_item_clicked_with_nonexistent_subtitle_object(controller, mock_resolve_integration, capsys):
+    # THEN Resolve is asked to seek to the stored frame, and nothing else is fetched
+    mock_resolve_integration.seek_to_frame.assert_called_once_with(252)
+    mock_subtitle_manager.get_subtitles.assert_not_called()
+    mock_resolve_integration.get_current_timeline_info.assert_not_called()
+
+def test_on_item_clicked_without_start_frame(controller, mock_resolve_integration, caplog):
     """
-    Test that clicking an item whose ID does not correspond to a subtitle object is handled gracefully.
+    Test that clicking a row whose start frame is unknown does not cause a crash.
     """
-    # GIVEN an item with a valid but non-existent ID
-    item_to_click = QTreeWidgetItem(["999", "00:00:00,000", "some text"])
-    controller.window.tree.addTopLevelItem(item_to_click)
-    column_to_click = 0
+    # GIVEN an item without timing information
+    item_to_click = add_row(controller, {'index': "invalid_id", 'text': "some text"})
 
     # WHEN the item is clicked
-    controller.on_item_clicked(item_to_click, column_to_click)
+    controller.on_item_clicked(item_to_click)
+
+    # THEN no seek is attempted
+    mock_resolve_integration.seek_to_frame.assert_not_called()
 
-    # THEN no timecode jump is attempted
-    mock_resolve_integration.timeline.SetCurrentTimecode.assert_not_called()
-    
     # AND a warning is logged
-    captured = capsys.readouterr()
-    assert "LOG: WARNING: Failed to get subtitle object for ID 999" in captured.out
+    assert "No start frame for subtitle invalid_id" in caplog.text
+
+def test_keyboard_navigation_seeks(controller, mock_resolve_integration):
+    """Moving the current row without the mouse seeks to the new row."""
+    mock_resolve_integration.seek_to_frame.return_value = (False, "No active timeline.")
+    tree = controller.window.tree
+
+    controller.on_current_changed(tree.model().index(1, 2), tree.model().index(0, 2))
+
+    # Failures while arrowing through rows are logged, not shown in a dialog
+    mock_resolve_integration.seek_to_frame.assert_called_once_with(480)
+
+def test_follow_tick_selects_row_and_backs_off(controller, mock_resolve_integration, mock_subtitle_manager):
+    """Each tick makes one playhead call; the interval grows while the playhead is idle."""
+    from src.main import FOLLOW_MIN_INTERVAL_MS
+    from src.time_index import SubtitleTimeIndex
+    mock_subtitle_manager.get_time_index.return_value = SubtitleTimeIndex([
+        {'in_frame': 0, 'out_frame': 100}, {'in_frame': 100, 'out_frame': 200},
+    ])
+    mock_resolve_integration.get_playhead_frame.return_value = (150, None)
+
+    controller.on_follow_tick()
+    controller.window.select_source_row.assert_called_once_with(1)
+    assert controller.follow_interval == FOLLOW_MIN_INTERVAL_MS
+
+    controller.on_follow_tick()
+    controller.on_follow_tick()
+    assert controller.follow_interval == FOLLOW_MIN_INTERVAL_MS * 4
+    assert controller.window.select_source_row.call_count == 1
+    assert mock_resolve_integration.get_playhead_frame.call_count == 3
+
+    mock_resolve_integration.get_playhead_frame.return_value = (50, None)
+    controller.on_follow_tick()
+    controller.window.select_source_row.assert_called_with(0)
+    assert controller.follow_interval == FOLLOW_MIN_INTERVAL_MS
+    controller.follow_timer.stop()
+
+def test_timing_check_shows_report(controller, mocker):
+    mocker.patch.object(controller.app_service, 'check_timing', return_value=("report", None))
+    info = mocker.patch('src.main.QMessageBox.information')
+    controller.on_timing_check_clicked()
+    info.assert_called_once_with(controller.window, "时间轴检查", "report")
+
+def test_check_timing_reports_overlaps_and_short_gaps(controller, mock_subtitle_manager):
+    from src.time_index import SubtitleTimeIndex
+    subs = [
+        {'index': 1, 'start': '00:00:00,000', 'in_frame': 0, 'out_frame': 100},
+        {'index': 2, 'start': '00:00:03,750', 'in_frame': 90, 'out_frame': 150},
+        {'index': 3, 'start': '00:00:06,292', 'in_frame': 151, 'out_frame': 200},
+    ]
+    mock_subtitle_manager.subtitles_data = subs
+    mock_subtitle_manager.get_time_index.return_value = SubtitleTimeIndex(subs)
+
+    report, error = controller.app_service.check_timing()
+    assert error is None
+    assert "1 处重叠" in report
+    assert "#1 与 #2 重叠 10 帧 (00:00:03,750)" in report
+    assert "#2 与 #3 间隔 1 帧 (00:00:06,292)" in report
+
+def test_lint_colors_rows_and_shows_summary(controller, mocker):
+    from src.lint import LintResult
+    result = LintResult([0, 1])
+    lint_track = mocker.patch.object(controller.app_service, 'lint_current_track', return_value=((result, "summary"), None))
+    controller.window.inspector.lint_profile_combo.currentData.return_value = 'cjk'
+    controller.window.char_count_delegate.char_limit = 20
+    info = mocker.patch('src.main.QMessageBox.information')
+
+    controller.on_lint_clicked()
+
+    lint_track.assert_called_once_with('cjk', 20)
+    controller.window.set_lint_flags.assert_called_once_with([0, 1])
+    info.assert_called_once_with(controller.window, "字幕规范检查", "summary")
+
+def test_timing_cell_edit_goes_through_retime(controller, mocker):
+    set_time = mocker.patch.object(controller.app_service, 'set_subtitle_time', return_value=(1, None))
+    controller.on_subtitle_timing_edited(2, 'start', '00:00:21,000')
+    set_time.assert_called_once_with(2, 'start', '00:00:21,000')
+    controller.window.refresh_timing.assert_called_once_with(1)
+
+    set_time.return_value = (None, "出点必须晚于入点")
+    show_error = mocker.patch.object(controller, 'show_error_message')
+    controller.on_subtitle_timing_edited(2, 'end', '00:00:01,000')
+    show_error.assert_called_once_with("出点必须晚于入点", "时间调整失败")
+    assert controller.window.refresh_timing.call_count == 1
+
+def test_ripple_shift_starts_at_current_row(controller, mock_subtitle_manager, mock_resolve_integration):
+    from src.timecode_utils import Timebase
+    mock_resolve_integration.get_timebase.return_value = Timebase(24.0)
+    mock_subtitle_manager.shift_subtitles.return_value = 1
+    controller.window.tree.setCurrentIndex(controller.window.tree.model().index(1, 0))
+    controller.window.proxy_model.mapToSource.side_effect = lambda index: index
+    controller.window.inspector.shift_offset_text.text.return_value = "-00:00:01,000"
+
+    controller.on_shift_clicked(ripple=True)
+
+    mock_subtitle_manager.shift_subtitles.assert_called_once_with(-24, 1)
+    controller.window.refresh_timing.assert_called_once_with()
+
+def test_conform_anchors_at_timeline_start(controller, mock_subtitle_manager, mock_resolve_integration):
+    from src.retime import conform_factor
+    mock_subtitle_manager.start_frame.return_value = 86400
+    mock_subtitle_manager.scale_subtitles.return_value = 2
+    controller.window.inspector.conform_combo.currentData.return_value = (25, 23.976)
+
+    controller.on_conform_clicked()
+
+    mock_subtitle_manager.scale_subtitles.assert_called_once_with(conform_factor(25, 23.976), 86400)
+
+def test_align_shows_dialog_for_current_and_selected_track(controller, mock_subtitle_manager, mocker):
+    mock_subtitle_manager.current_track_index = 1
+    mock_subtitle_manager.align_tracks.return_value = ([], [], [])
+    controller.window.inspector.align_track_combo.currentData.return_value = 2
+    dialog = mocker.patch('src.main.AlignmentDialog')
+
+    controller.on_align_clicked()
+
+    mock_subtitle_manager.align_tracks.assert_called_once_with(1, 2)
+    dialog.assert_called_once_with([], [], [], "双语对齐 - ST 2", controller.window)
+    dialog.return_value.exec.assert_called_once()
+
+def test_align_same_track_is_an_error(controller, mock_subtitle_manager, mocker):
+    mock_subtitle_manager.current_track_index = 2
+    controller.window.inspector.align_track_combo.currentData.return_value = 2
+    show_error = mocker.patch.object(controller, 'show_error_message')
+    controller.on_align_clicked()
+    show_error.assert_called_once_with("请选择另一条轨道进行对齐。", "双语对齐")
+    mock_subtitle_manager.align_tracks.assert_not_called()
+
+def test_search_all_tracks_shows_results(controller, mock_subtitle_manager, mocker):
+    results = [(1, {'index': 3, 'start': '', 'end': '', 'text': 'hello'})]
+    mock_subtitle_manager.search_all_tracks.return_value = results
+    controller.window.inspector.search_text.text.return_value = "hello"
+    controller.window.inspector.search_type_combo.currentText.return_value = "包含"
+    dialog = mocker.patch('src.main.TrackSearchDialog')
+
+    controller.on_search_all_tracks_clicked()
+
+    mock_subtitle_manager.search_all_tracks.assert_called_once_with("hello", "包含")
+    dialog.assert_called_once_with(results, "搜索全部轨道 - hello", controller.window)
+    dialog.return_value.exec.assert_called_once()
+
+def test_search_all_tracks_rejects_unindexed_filter_type(controller, mock_subtitle_manager, mocker):
+    mock_subtitle_manager.search_all_tracks.side_effect = ValueError("Unsupported filter type")
+    controller.window.inspector.search_text.text.return_value = "h*o"
+    controller.window.inspector.search_type_combo.currentText.return_value = "通配符"
+    show_error = mocker.patch.object(controller, 'show_error_message')
+    dialog = mocker.patch('src.main.TrackSearchDialog')
+
+    controller.on_search_all_tracks_clicked()
+
+    show_error.assert_called_once_with("搜索全部轨道仅支持“包含”、“开头是”和“结尾是”。", "搜索全部轨道")
+    dialog.assert_not_called()
+
+def test_track_search_result_switches_track_and_selects_row(controller, mock_subtitle_manager):
+    mock_subtitle_manager.current_track_index = 1
+    controller.window.inspector.track_combo.setCurrentIndex.side_effect = (
+        lambda index: setattr(mock_subtitle_manager, 'current_track_index', index + 1)
+    )
+    controller.window.model.row_for_id.return_value = 4
+    dialog = MagicMock()
+
+    controller.on_track_search_result_activated(dialog, (3, {'index': 5}))
+
+    controller.window.inspector.track_combo.setCurrentIndex.assert_called_once_with(2)
+    dialog.accept.assert_called_once()
+    controller.window.model.row_for_id.assert_called_once_with(5)
+    controller.window.select_source_row.assert_called_once_with(4)
+
+def test_export_asks_for_review_and_stops_when_cancelled(controller, mock_subtitle_manager, mock_resolve_integration, mocker):
+    mock_subtitle_manager.current_track_index = 1
+    mock_subtitle_manager.subtitles_data = [{'index': 1, 'text': 'new', 'in_frame': 0, 'out_frame': 24}]
+    mock_resolve_integration.get_subtitles_with_timecode.return_value = (
+        [{'id': 1, 'text': 'old', 'in_frame': 0, 'out_frame': 24}], None)
+    dialog = mocker.patch('src.main.ExportReviewDialog')
+    dialog.return_value.exec.return_value = 0
+
+    controller.on_export_reimport_clicked()
+
+    diff = dialog.call_args.args[0]
+    assert diff.counts() == {'retexted': 1}
+    mock_resolve_integration.reimport_from_json_file.assert_not_called()
+
+def test_export_without_changes_skips_review(controller, mock_subtitle_manager, mock_resolve_integration, mocker):
+    mock_subtitle_manager.current_track_index = 1
+    mock_subtitle_manager.subtitles_data = [{'index': 1, 'text': 'same', 'in_frame': 0, 'out_frame': 24}]
+    mock_resolve_integration.get_subtitles_with_timecode.return_value = (
+        [{'id': 1, 'text': 'same', 'in_frame': 0, 'out_frame': 24}], None)
+    mock_resolve_integration.reimport_from_json_file.return_value = (True, None)
+    dialog = mocker.patch('src.main.ExportReviewDialog')
+    mocker.patch('src.main.QMessageBox')
+
+    controller.on_export_reimport_clicked()
+
+    dialog.assert_not_called()
+    mock_resolve_integration.reimport_from_json_file.assert_called_once()
+
+def test_export_goes_ahead_when_the_track_cannot_be_read(controller, mock_subtitle_manager, mock_resolve_integration, mocker):
+    mock_subtitle_manager.current_track_index = 1
+    mock_resolve_integration.get_subtitles_with_timecode.return_value = (None, "No active timeline.")
+    mock_resolve_integration.reimport_from_json_file.return_value = (True, None)
+    dialog = mocker.patch('src.main.ExportReviewDialog')
+    mocker.patch('src.main.QMessageBox')
+
+    controller.on_export_reimport_clicked()
+
+    dialog.assert_not_called()
+    mock_resolve_integration.reimport_from_json_file.assert_called_once()
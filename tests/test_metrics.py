@@ -0,0 +1,115 @@
+# tests/test_metrics.py
+import json
+import time
+import pytest
+from unittest.mock import MagicMock
+
+from src.metrics import Histogram, MetricsRegistry, metrics
+from src.services import AppService
+from src.subtitle_manager import SubtitleManager
+
+
+@pytest.fixture
+def registry():
+    return MetricsRegistry()
+
+def test_histogram_tracks_count_sum_min_max():
+    h = Histogram()
+    for value in (0.05, 3.0, 40.0, 20000.0):
+        h.observe(value)
+
+    data = h.to_dict()
+    assert data['count'] == 4
+    assert data['min_ms'] == 0.05
+    assert data['max_ms'] == 20000.0
+    assert data['buckets'] == {"<=0.1": 1, "<=5": 1, "<=50": 1, ">10000": 1}
+    assert h.quantile(0.5) == 5
+
+def test_counters_and_timer(registry):
+    registry.incr("cache_hit")
+    registry.incr("cache_hit", 2)
+    with registry.timer("op"):
+        pass
+    with pytest.raises(RuntimeError):
+        with registry.timer("op"):
+            raise RuntimeError("boom")
+
+    snap = registry.snapshot()
+    assert snap['counters'] == {"cache_hit": 3, "op.errors": 1}
+    assert snap['histograms']['op']['count'] == 2
+
+def test_timed_decorator_records_latency(registry):
+    @registry.timed("service.op")
+    def op(x):
+        return x + 1
+
+    assert op(1) == 2
+    assert registry.snapshot()['histograms']['service.op']['count'] == 1
+    assert "service.op: n=1" in registry.format_report()
+
+def test_dump_json_writes_snapshot(registry, tmp_path):
+    registry.incr("saves")
+    registry.observe("save_json", 12.5)
+    out = tmp_path / "metrics.json"
+    registry.dump_json(str(out))
+
+    data = json.loads(out.read_text(encoding='utf-8'))
+    assert data['counters'] == {"saves": 1}
+    assert data['histograms']['save_json']['total_ms'] == 12.5
+
+def test_subtitle_manager_counts_cache_hits_and_misses(tmp_path):
+    """load_subtitles should count a miss on first fetch and a hit once the cache file exists."""
+    resolve_integration = MagicMock()
+    resolve_integration.export_subtitles_to_json.return_value = [
+        {'index': 1, 'start': '00:00:01,000', 'end': '00:00:02,000', 'text': 'Hello'}
+    ]
+    manager = SubtitleManager(resolve_integration)
+    manager.cache_dir = str(tmp_path)
+
+    metrics.reset()
+    manager.load_subtitles(1)
+    manager.load_subtitles(1)
+
+    counters = metrics.snapshot()['counters']
+    assert counters["subtitle_manager.cache_miss"] == 1
+    assert counters["subtitle_manager.cache_hit"] == 1
+    assert metrics.snapshot()['histograms']["subtitle_manager.load_subtitles"]['count'] == 2
+
+def test_import_srt_file_excludes_dialog_time(tmp_path, mocker):
+    """Only reading and parsing the file is timed, not the user's time in the dialog."""
+    srt_file = tmp_path / "in.srt"
+    srt_file.write_text("1\n00:00:01,000 --> 00:00:02,000\nHello\n", encoding='utf-8')
+
+    def slow_dialog(*args, **kwargs):
+        time.sleep(0.2)
+        return str(srt_file), ""
+    mocker.patch('src.services.QFileDialog.getOpenFileName', side_effect=slow_dialog)
+    subtitle_manager = MagicMock()
+    subtitle_manager.load_subtitles_from_srt_content.return_value = [{'index': 1}]
+
+    metrics.reset()
+    subtitles, error = AppService(MagicMock(), subtitle_manager).import_srt_file(None)
+
+    assert subtitles == [{'index': 1}] and error is None
+    histogram = metrics.snapshot()['histograms']["service.import_srt_file"]
+    assert histogram['count'] == 1
+    assert histogram['max_ms'] < 200
+
+def test_export_diff_report_excludes_dialog_time(tmp_path, mocker):
+    """Saving a report is timed and traced on its own, without the save dialog."""
+    report_file = tmp_path / "report.json"
+
+    def slow_dialog(*args, **kwargs):
+        time.sleep(0.2)
+        return str(report_file), ""
+    mocker.patch('src.services.QFileDialog.getSaveFileName', side_effect=slow_dialog)
+    diff = MagicMock()
+    diff.to_report.return_value = {'changes': []}
+
+    metrics.reset()
+    file_path, error = AppService(MagicMock(), MagicMock()).export_diff_report(None, diff)
+
+    assert file_path == str(report_file) and error is None
+    histogram = metrics.snapshot()['histograms']["service.export_diff_report"]
+    assert histogram['count'] == 1
+    assert histogram['max_ms'] < 200
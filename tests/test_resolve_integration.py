@@ -3,6 +3,7 @@ import pytest
 from unittest.mock import MagicMock, patch
 import sys
 import os
+import logging
 
 from src.resolve_integration import ResolveIntegration
 from src.timecode_utils import TimecodeUtils
@@ -40,14 +41,14 @@ def test_init_online_with_davinci_resolve_script(mocker):
     assert integration.resolve is not None
     mock_dvr_script.scriptapp.assert_called_once_with("Resolve")
 
-def test_init_offline_mode(mocker):
+def test_init_offline_mode(mocker, caplog):
     """Test correct initialization when no Resolve API is found."""
     mocker.patch.dict(sys.modules, {'fusionscript': None, 'DaVinciResolveScript': None})
     
-    with patch('builtins.print') as mock_print:
+    with caplog.at_level(logging.INFO, logger="subvigator"):
         integration = ResolveIntegration()
         assert integration.initialized is False
-        mock_print.assert_any_call("LOG: INFO: DaVinci Resolve instance not found. Running in offline mode.")
+        assert "DaVinci Resolve instance not found. Running in offline mode." in caplog.text
 
 @pytest.mark.parametrize("error_type, log_message_fragment", [
     (TypeError("Invalid config"), "LOG: ERROR: Error initializing TimecodeUtils due to invalid configuration:"),
@@ -192,3 +193,34 @@ def test_export_subtitles_to_srt_calls_formatter(mocker):
 
 if __name__ == "__main__":
     pytest.main()
+
+def test_seek_to_frame_uses_cached_timebase(mocker):
+    """Seeking builds the timecode locally and makes exactly one API call per seek."""
+    mocker.patch.dict(sys.modules, {'fusionscript': None, 'DaVinciResolveScript': None})
+    integration = ResolveIntegration()
+    integration.timeline = MagicMock()
+    integration.timeline.GetSetting.side_effect = lambda name: {
+        'timelineFrameRate': '29.97', 'timelineDropFrameTimecode': '1'}[name]
+    integration.timeline.SetCurrentTimecode.return_value = True
+
+    assert integration.seek_to_frame(1800) == (True, None)
+    assert integration.seek_to_frame(17982) == (True, None)
+
+    integration.timeline.SetCurrentTimecode.assert_has_calls([mocker.call("00:01:00;02"), mocker.call("00:10:00;00")])
+    assert integration.timeline.GetSetting.call_count == 2  # Frame rate and drop-frame flag, read once
+
+def test_seek_to_frame_offline(mocker):
+    mocker.patch.dict(sys.modules, {'fusionscript': None, 'DaVinciResolveScript': None})
+    integration = ResolveIntegration()
+    assert integration.seek_to_frame(10) == (False, "No active timeline.")
+
+def test_get_playhead_frame(mocker):
+    mocker.patch.dict(sys.modules, {'fusionscript': None, 'DaVinciResolveScript': None})
+    integration = ResolveIntegration()
+    integration.timeline = MagicMock()
+    integration.timeline.GetSetting.side_effect = lambda name: {
+        'timelineFrameRate': '24', 'timelineDropFrameTimecode': '0'}[name]
+    integration.timeline.GetCurrentTimecode.return_value = "01:00:00:12"
+
+    assert integration.get_playhead_frame() == (86412, None)
+    integration.timeline.GetCurrentTimecode.assert_called_once_with()
@@ -0,0 +1,121 @@
+# tests/test_retime.py
+import math
+import random
+from fractions import Fraction
+
+import pytest
+
+from src import retime
+from src.retime import RetimeError
+from src.subtitle_store import SubtitleTrack, ms_to_srt_time
+from src.timecode_utils import Timebase
+
+
+def make_track(*ranges, frame_rate=25):
+    """A track with the given (in, out) frames and the matching times."""
+    rate = retime.timeline_rate(frame_rate)
+    subs = []
+    for i, (start, end) in enumerate(ranges, 1):
+        start_ms, end_ms = retime.frames_to_ms([start, end], rate)
+        subs.append({'index': i, 'text': f'line {i}', 'in_frame': start, 'out_frame': end,
+                     'start': ms_to_srt_time(start_ms), 'end': ms_to_srt_time(end_ms)})
+    return SubtitleTrack(subs)
+
+
+def frames(track):
+    return list(zip(track.in_frames, track.out_frames))
+
+
+def test_timeline_and_exact_rates():
+    assert retime.timeline_rate(23.976) == Fraction(2997, 125)
+    assert retime.timeline_rate(24000 / 1001) == Fraction(24000, 1001)
+    assert retime.exact_rate(23.976) == Fraction(24000, 1001)
+    assert retime.exact_rate(25.0) == 25
+    assert retime.conform_factor(25, 23.976) == Fraction(25 * 1001, 24000)
+
+@pytest.mark.parametrize("text, expected", [
+    ("12", 12), ("-12", -12), ("+ 3", 3),
+    ("00:00:01,000", 25), ("-00:00:02,000", -50), ("+00:00:01:05", 30),
+])
+def test_parse_offset(text, expected):
+    assert retime.parse_offset(text, Timebase(25.0)) == expected
+
+def test_parse_offset_rejects_garbage():
+    with pytest.raises(ValueError):
+        retime.parse_offset("soon", Timebase(25.0))
+
+def test_shift_moves_frames_and_times():
+    track = SubtitleTrack([
+        {'index': 1, 'text': 'a', 'start': '00:00:01,000', 'end': '00:00:02,000'},
+        {'index': 2, 'text': 'b', 'start': '00:00:03,000', 'end': '00:00:04,000', 'raw_obj': 'x'},
+        {'index': 3, 'text': 'no frames'},
+    ])
+    assert track.assign_frames_from_times(25) == [2]
+    assert retime.shift(track, 25, 25) == 2
+    assert frames(track)[:2] == [(50, 75), (100, 125)]
+    assert track[0]['start'] == '00:00:02,000' and track[1]['end'] == '00:00:05,000'
+    assert track[1]['raw_obj'] == 'x'
+    assert 'start' not in track[2]
+
+def test_ripple_shift_starts_at_row():
+    track = make_track((0, 10), (20, 30), (40, 50))
+    assert retime.shift(track, -5, 25, first_row=1) == 2
+    assert frames(track) == [(0, 10), (15, 25), (35, 45)]
+
+def test_shift_before_zero_changes_nothing():
+    track = make_track((10, 20), (30, 40))
+    with pytest.raises(RetimeError):
+        retime.shift(track, -11, 25)
+    assert frames(track) == [(10, 20), (30, 40)]
+
+def test_retime_before_timeline_start_is_rejected():
+    """Frames are absolute, so the limit is the timeline's first frame, not frame 0."""
+    track = make_track((86410, 86420))
+    with pytest.raises(RetimeError):
+        retime.shift(track, -11, 25, start_frame=86400)
+    with pytest.raises(RetimeError):
+        retime.set_row_frames(track, 0, 86399, 86420, 25, start_frame=86400)
+    assert frames(track) == [(86410, 86420)]
+    assert retime.shift(track, -10, 25, start_frame=86400) == 1
+
+def test_conform_matches_exact_rational_scaling():
+    random.seed(5)
+    ranges = sorted((start, start + random.randint(1, 100)) for start in random.sample(range(90000, 250000), 500))
+    track = make_track(*ranges, frame_rate=23.976)
+    factor = retime.conform_factor(25, 23.976)
+    retime.scale(track, factor, 23.976, origin=86400)
+    half = Fraction(1, 2)
+    for (start, end), (new_start, new_end) in zip(ranges, frames(track)):
+        assert new_start == 86400 + math.floor((start - 86400) * factor + half)
+        assert new_end == max(86400 + math.floor((end - 86400) * factor + half), new_start + 1)
+
+def test_scale_keeps_one_frame_minimum():
+    track = make_track((100, 101))
+    retime.scale(track, Fraction(1, 2), 25)
+    assert frames(track) == [(50, 51)]
+    with pytest.raises(RetimeError):
+        retime.scale(track, 0, 25)
+
+@pytest.mark.parametrize("frame_rate", [23.976, 24, 25, 29.97, 59.94])
+def test_times_written_convert_back_to_the_same_frames(frame_rate):
+    random.seed(11)
+    ranges = [(start, start + random.randint(1, 200)) for start in random.sample(range(0, 400000), 300)]
+    track = make_track(*ranges, frame_rate=frame_rate)
+    retime.shift(track, 7, frame_rate)
+    expected = frames(track)
+    assert track.assign_frames_from_times(frame_rate) == []
+    assert frames(track) == expected
+
+def test_snap_rewrites_times_off_the_frame_grid():
+    track = SubtitleTrack([{'index': 1, 'text': 'a', 'start': '00:00:01,013', 'end': '00:00:02,000'}])
+    track.assign_frames_from_times(25)
+    assert retime.snap(track, 25) == 1
+    assert track[0]['start'] == '00:00:01,000'
+    assert retime.snap(track, 25) == 0
+
+def test_set_row_frames_validates_order():
+    track = make_track((10, 20))
+    with pytest.raises(RetimeError):
+        retime.set_row_frames(track, 0, 30, 20, 25)
+    retime.set_row_frames(track, 0, 5, 20, 25)
+    assert frames(track) == [(5, 20)] and track[0]['start'] == '00:00:00,200'
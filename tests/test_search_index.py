@@ -0,0 +1,80 @@
+# tests/test_search_index.py
+import json
+import pytest
+from unittest.mock import MagicMock
+
+from src.search_index import SubtitleSearchIndex, query_grams
+from src.subtitle_manager import SubtitleManager
+
+
+@pytest.fixture
+def index():
+    search_index = SubtitleSearchIndex()
+    search_index.index_track(1, ["Hello world", "Another line", "WORLD again", "今天天气很好"])
+    return search_index
+
+def test_candidates_are_superset_of_matches(index):
+    """Trigram candidates include every row containing the query, case-insensitively."""
+    assert index.candidates(1, "World") == [0, 2]
+    assert index.candidates(1, "xyz") == []
+
+def test_short_queries_cannot_be_narrowed_unless_cjk(index):
+    assert index.candidates(1, "wo") is None
+    assert query_grams("天气") == {"天气"}
+    assert index.candidates(1, "天气") == [3]
+    assert index.candidates(1, "好") == [3]
+
+def test_search_verifies_modes(index):
+    assert index.search("world") == [(1, 0), (1, 2)]
+    assert index.search("world", "Starts With") == [(1, 2)]
+    assert index.search("很好", "结尾是") == [(1, 3)]
+    with pytest.raises(ValueError):
+        index.search("world", "Wildcard")
+
+def test_update_reindexes_row(index):
+    index.candidates(1, "world")  # Build the postings first
+    index.update(1, 1, "A new world")
+    index.update(1, 0, "Goodbye")
+
+    assert index.candidates(1, "world") == [1, 2]
+    assert index.search("hello") == []
+
+def test_search_spans_tracks(index):
+    index.index_track(2, ["world of track two"])
+    assert index.search("world") == [(1, 0), (1, 2), (2, 0)]
+    assert index.search("world", tracks=[2]) == [(2, 0)]
+
+def test_manager_keeps_index_in_sync_and_searches_cached_tracks(tmp_path):
+    """Edits and replaces update the index; other tracks' cache files are searched too."""
+    (tmp_path / "track_2.json").write_text(
+        json.dumps([{'index': 1, 'start': '', 'end': '', 'text': 'Cached hello'}]), encoding='utf-8'
+    )
+    resolve_integration = MagicMock()
+    resolve_integration.export_subtitles_to_json.return_value = [
+        {'index': 1, 'start': '', 'end': '', 'text': 'Hello there'},
+        {'index': 2, 'start': '', 'end': '', 'text': 'Goodbye'},
+    ]
+    manager = SubtitleManager(resolve_integration)
+    manager.cache_dir = str(tmp_path)
+    manager.load_subtitles(1)
+
+    manager.update_subtitle_text(2, "hello again")
+    manager.handle_replace_all("Hello there", "Bye")
+
+    results = manager.search_all_tracks("hello")
+    assert [(track, sub['text']) for track, sub in results] == [(1, "hello again"), (2, "Cached hello")]
+
+def test_track_search_dialog_lists_results(qtbot):
+    from src.track_search_dialog import TrackSearchDialog, TRACK_COLUMN, TIME_COLUMN, TEXT_COLUMN
+    results = [
+        (0, {'index': 1, 'start': '00:00:01,000', 'end': '00:00:02,000', 'text': 'Imported hello'}),
+        (2, {'index': 7, 'start': '00:00:03,000', 'end': '00:00:04,000', 'text': 'Cached hello'}),
+    ]
+    dialog = TrackSearchDialog(results, "搜索全部轨道")
+    qtbot.addWidget(dialog)
+    model = dialog.model
+    assert model.rowCount() == 2
+    assert [model.index(row, TRACK_COLUMN).data() for row in range(2)] == ["SRT", "ST 2"]
+    assert model.index(1, TIME_COLUMN).data() == "00:00:03,000 → 00:00:04,000"
+    assert model.index(1, TEXT_COLUMN).data() == "Cached hello"
+    assert dialog.summary_label.text() == "共 2 条匹配，位于 SRT、ST 2"
@@ -20,9 +20,8 @@ class TestSubtitleManager:
 
     @patch('os.makedirs')
     @patch('os.path.exists')
-    @patch('builtins.open', new_callable=mock_open)
-    @patch('json.dump')
-    def test_load_subtitles_cache_miss(self, mock_json_dump, mock_file_open, mock_path_exists, mock_makedirs, subtitle_manager, mock_dependencies):
+    @patch('src.subtitle_manager.write_cache_json')
+    def test_load_subtitles_cache_miss(self, mock_write_cache_json, mock_path_exists, mock_makedirs, subtitle_manager, mock_dependencies):
         """Test loading subtitles from Resolve when cache is missed."""
         
         def path_exists_side_effect(path):
@@ -45,8 +44,11 @@ class TestSubtitleManager:
         mock_makedirs.assert_called_once_with(subtitle_manager.cache_dir)
         
         expected_file_path = os.path.join(subtitle_manager.cache_dir, f"track_{track_index}.json")
-        mock_file_open.assert_called_once_with(expected_file_path, 'w', encoding='utf-8')
-        mock_json_dump.assert_called_once_with(mock_subs, mock_file_open(), ensure_ascii=False, indent=2)
+        mock_write_cache_json.assert_called_once()
+        file_path, track, codec = mock_write_cache_json.call_args.args
+        assert file_path == expected_file_path
+        assert track == mock_subs
+        assert codec == subtitle_manager.json_codec
         assert loaded_data == mock_subs
 
     @patch('os.path.exists', return_value=True)
@@ -118,6 +120,7 @@ class TestSubtitleManager:
 
     def test_save_changes_to_json(self, subtitle_manager):
         """Test saving subtitle changes to a JSON file."""
+        subtitle_manager.json_codec = 'indent'
         subtitle_manager.current_track_index = 1
         subtitle_manager.subtitles_data = [
             {'index': 1, 'start': '00:01', 'end': '00:02', 'text': 'Line 1'},
@@ -138,12 +141,11 @@ class TestSubtitleManager:
                 ]
                 mock_json_dump.assert_called_once_with(expected_data, m_open(), ensure_ascii=False, indent=2)
 
-    def test_save_changes_to_json_no_path(self, subtitle_manager, capsys):
+    def test_save_changes_to_json_no_path(self, subtitle_manager, caplog):
         """Test saving changes when no JSON path is set."""
         subtitle_manager.current_track_index = None
         subtitle_manager._save_changes_to_json()
-        captured = capsys.readouterr()
-        assert "Error: No current track index or json path is set. Cannot save." in captured.out
+        assert "No current track index or json path is set. Cannot save." in caplog.text
 
     @patch('src.subtitle_manager.parse_srt_content')
     def test_load_subtitles_from_valid_srt_content(self, mock_parse_srt, subtitle_manager):
@@ -164,12 +166,23 @@ class TestSubtitleManager:
             mock_save.assert_called_once()
             assert result == mock_parsed_data
 
+    @patch('src.subtitle_manager.parse_srt_content')
+    def test_load_subtitles_from_srt_sorts_by_index(self, mock_parse_srt, subtitle_manager):
+        """The store is kept in ascending numeric id order, which the subtitle view relies on."""
+        mock_parse_srt.return_value = [{'index': 10, 'text': 'c'}, {'index': 2, 'text': 'a'}, {'index': 9, 'text': 'b'}]
+
+        with patch.object(subtitle_manager, '_save_changes_to_json'):
+            result = subtitle_manager.load_subtitles_from_srt_content("...")
+
+        assert [sub['index'] for sub in result] == [2, 9, 10]
+
     @patch('src.subtitle_manager.parse_srt_content')
     def test_load_subtitles_from_srt_creates_cache_file(self, mock_parse_srt, subtitle_manager):
         """Test that loading from SRT content creates a cache file."""
         srt_content = "1\n00:00:03,000 --> 00:00:04,000\nTesting file creation"
         mock_parsed_data = [{'index': 1, 'start': '00:00:03,000', 'end': '00:00:04,000', 'text': 'Testing file creation'}]
         mock_parse_srt.return_value = mock_parsed_data
+        subtitle_manager.json_codec = 'indent'
         
         m_open = mock_open()
         with patch('builtins.open', m_open), patch('json.dump') as mock_json_dump:
@@ -195,3 +208,95 @@ class TestSubtitleManager:
             assert result == []
             assert subtitle_manager.subtitles_data == [] # Assuming it was initially empty
             mock_save.assert_not_called()
+
+    def test_handle_glossary_replace(self, subtitle_manager):
+        """All glossary rules are applied in one pass and reported as replace changes."""
+        subtitle_manager.subtitles_data = [
+            {'index': 1, 'text': 'Tony Stark meets Pepper'},
+            {'index': 2, 'text': 'Nothing here'},
+            {'index': 3, 'text': 'Stark Industries'},
+        ]
+        rules = {'Stark': '斯塔克', 'Stark Industries': '斯塔克工业', 'Pepper': '小辣椒'}
+
+        changes = subtitle_manager.handle_glossary_replace(rules)
+
+        assert changes == [
+            {'index': 1, 'old': 'Tony Stark meets Pepper', 'new': 'Tony 斯塔克 meets 小辣椒'},
+            {'index': 3, 'old': 'Stark Industries', 'new': '斯塔克工业'},
+        ]
+        assert subtitle_manager.is_dirty is True
+        assert subtitle_manager.subtitles_data[1]['text'] == 'Nothing here'
+
+    def test_sort_subtitles_by_id(self):
+        """Ids sort numerically, with non-numeric ids after the numbers."""
+        from src import utils
+        subs = [{'index': i} for i in (5, 3, 10, 1, 'x', 2)]
+        assert utils.sort_subtitles_by_id(subs) is subs
+        assert [s['index'] for s in subs] == [1, 2, 3, 5, 10, 'x']
+
+def test_subtitles_are_stored_as_columns(subtitle_manager):
+    """Any subtitle list assigned to the manager is kept as a columnar SubtitleTrack."""
+    from src.subtitle_store import SubtitleTrack
+    subtitle_manager.subtitles_data = [{'index': 1, 'start': '00:00:01,000', 'end': '00:00:02,000', 'text': 'a'}]
+    assert isinstance(subtitle_manager.subtitles_data, SubtitleTrack)
+    assert subtitle_manager.update_subtitle_text(1, 'b') is True
+    assert subtitle_manager.subtitles_data.texts == ['b']
+
+def test_shift_subtitles_retimes_saves_and_rebuilds_time_index(subtitle_manager, mock_dependencies):
+    from src.timecode_utils import Timebase
+    mock_dependencies.get_timebase.return_value = Timebase(25.0)
+    mock_dependencies.get_start_frame.return_value = 0
+    subtitle_manager.subtitles_data = [
+        {'index': 1, 'start': '00:00:01,000', 'end': '00:00:02,000', 'text': 'a'},
+        {'index': 2, 'start': '00:00:03,000', 'end': '00:00:04,000', 'text': 'b'},
+    ]
+    subtitle_manager._assign_frames(subtitle_manager.subtitles_data)
+    assert subtitle_manager.get_time_index().row_at(30) == 0
+
+    with patch.object(subtitle_manager, '_save_changes_to_json') as save:
+        assert subtitle_manager.shift_subtitles(25, first_row=1) == 1
+        save.assert_called_once()
+    assert subtitle_manager.subtitles_data[1]['start'] == '00:00:04,000'
+    assert subtitle_manager.is_dirty
+    assert subtitle_manager.get_time_index().row_at(80) is None
+    assert subtitle_manager.get_time_index().row_at(100) == 1
+
+def test_imported_srt_retimes_from_frame_zero(subtitle_manager, mock_dependencies):
+    """An imported SRT's frames count from 0, whatever the timeline's start frame."""
+    from src.retime import RetimeError
+    from src.timecode_utils import Timebase
+    mock_dependencies.get_timebase.return_value = Timebase(25.0)
+    mock_dependencies.get_start_frame.return_value = 90000
+    with patch.object(subtitle_manager, '_save_changes_to_json'):
+        subtitle_manager.load_subtitles_from_srt_content(
+            "1\n00:00:01,000 --> 00:00:02,000\na\n\n2\n00:00:03,000 --> 00:00:04,000\nb\n")
+        assert subtitle_manager.start_frame() == 0
+
+        assert subtitle_manager.shift_subtitles(5) == 2
+        assert subtitle_manager.scale_subtitles(2, subtitle_manager.start_frame()) == 2
+        assert subtitle_manager.set_subtitle_frames(1, in_frame=10) == 0
+        with pytest.raises(RetimeError):
+            subtitle_manager.shift_subtitles(-11)
+    subs = subtitle_manager.subtitles_data
+    assert [(sub['in_frame'], sub['out_frame']) for sub in subs] == [(10, 110), (160, 210)]
+
+def test_set_subtitle_frames_needs_a_timeline(subtitle_manager, mock_dependencies):
+    from src.retime import RetimeError
+    mock_dependencies.get_timebase.return_value = None
+    subtitle_manager.subtitles_data = [{'index': 1, 'text': 'a', 'in_frame': 0, 'out_frame': 10}]
+    with pytest.raises(RetimeError):
+        subtitle_manager.set_subtitle_frames(1, in_frame=5)
+    assert subtitle_manager.set_subtitle_frames(2, in_frame=5) == -1
+
+def test_align_tracks_reads_unopened_tracks_from_cache(subtitle_manager, tmp_path):
+    subtitle_manager.cache_dir = str(tmp_path)
+    (tmp_path / "track_2.json").write_text(json.dumps([
+        {'index': 1, 'start': '00:00:01,000', 'end': '00:00:02,000', 'text': '你好'},
+    ]), encoding='utf-8')
+    subtitle_manager.subtitles_data = [{'index': 1, 'start': '00:00:01,000', 'end': '00:00:02,000', 'text': 'Hello'}]
+    subtitle_manager._index_track(1, subtitle_manager.subtitles_data)
+
+    groups, primary, secondary = subtitle_manager.align_tracks(1, 2)
+    assert [(group.primary_rows, group.secondary_rows) for group in groups] == [((0,), (0,))]
+    assert primary is subtitle_manager.subtitles_data and secondary[0]['text'] == '你好'
+    assert subtitle_manager.align_tracks(1, 3) is None
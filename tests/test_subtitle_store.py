@@ -0,0 +1,70 @@
+# tests/test_subtitle_store.py
+import pytest
+
+from src.subtitle_store import SubtitleTrack, srt_time_to_ms
+from src.utils import sort_subtitles_by_id
+
+
+def make_dicts():
+    return [
+        {'index': 1, 'start': '00:00:01,000', 'end': '00:00:02,500', 'text': 'Hello'},
+        {'index': 2, 'start': '00:00:03,000', 'end': '00:00:04,000', 'text': '<i>World</i>', 'in_frame': 72},
+        {'index': 'x', 'start': '3.5s', 'text': 'Odd', 'raw_obj': 'resolve item'},
+    ]
+
+def test_track_round_trips_dicts():
+    dicts = make_dicts()
+    track = SubtitleTrack(dicts)
+    assert len(track) == 3
+    assert track == dicts
+    assert track.to_dicts() == dicts
+    # Values that do not fit a column are kept as they were.
+    assert track[2]['index'] == 'x' and track[2]['start'] == '3.5s' and track[2]['raw_obj'] == 'resolve item'
+    assert 'end' not in track[2] and track[2].get('end') is None
+    with pytest.raises(KeyError):
+        track[2]['end']
+
+def test_rows_are_views_on_the_columns():
+    track = SubtitleTrack(make_dicts())
+    row = track[0]
+    row['text'] = 'Hi'
+    row['in_frame'] = 24
+    assert track.texts[0] == 'Hi'
+    assert track.in_frames[0] == 24
+    row['start'] = 'soon'
+    assert track[0]['start'] == 'soon'
+    del row['start']
+    assert 'start' not in track[0]
+
+def test_char_count_is_a_derived_column():
+    track = SubtitleTrack(make_dicts())
+    assert track[1]['char_count'] == 5  # HTML tags are not counted
+    track[1]['text'] = 'Longer text'
+    assert track[1]['char_count'] == 11
+
+def test_insert_delete_and_sort():
+    track = SubtitleTrack(make_dicts()[:2])
+    track.insert(0, {'index': 5, 'text': 'Five'})
+    track.append({'index': 3, 'text': 'Three'})
+    del track[1]
+    assert [sub['index'] for sub in track] == [5, 2, 3]
+    sort_subtitles_by_id(track)
+    assert [sub['text'] for sub in track] == ['<i>World</i>', 'Three', 'Five']
+
+def test_assign_frames_and_find_row():
+    track = SubtitleTrack(make_dicts())
+    assert track.assign_frames_from_times(24) == [2]  # Row 2 has no canonical times
+    assert (track[0]['in_frame'], track[0]['out_frame']) == (24, 60)
+    assert track.find_row(2) == 1
+    assert track.find_row('x') == 2
+    assert track.find_row(9) == -1
+
+@pytest.mark.parametrize("value, expected", [
+    ('01:02:03,004', 3723004),
+    ('00:60:00,000', None),     # Would not format back to the same text
+    ('1:02:03,004', None),
+    ('01:02:03.004', None),
+    (None, None),
+])
+def test_srt_time_to_ms(value, expected):
+    assert srt_time_to_ms(value) == expected
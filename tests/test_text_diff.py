@@ -0,0 +1,56 @@
+# tests/test_text_diff.py
+import random
+
+import pytest
+
+from src import ui_logic
+from src.text_diff import diff_opcodes, graphemes
+
+
+def apply_opcodes(original_text, new_text, opcodes):
+    """Rebuilds the new text from opcodes, checking that 'equal' spans really match."""
+    parts = []
+    for tag, i1, i2, j1, j2 in opcodes:
+        if tag == 'equal':
+            assert original_text[i1:i2] == new_text[j1:j2]
+        parts.append(new_text[j1:j2])
+    return ''.join(parts)
+
+def edit_count(opcodes):
+    return sum(max(i2 - i1, j2 - j1) if tag == 'replace' else (i2 - i1) + (j2 - j1)
+               for tag, i1, i2, j1, j2 in opcodes if tag != 'equal')
+
+@pytest.mark.parametrize("text, expected", [
+    ("abc", ["a", "b", "c"]),
+    ("中文字幕", ["中", "文", "字", "幕"]),
+    ("été", ["é", "t", "é"]),
+    ("ok👍🏽!", ["o", "k", "👍🏽", "!"]),
+    ("👨‍👩‍👧x", ["👨‍👩‍👧", "x"]),
+    ("🇨🇳🇯🇵", ["🇨🇳", "🇯🇵"]),
+])
+def test_graphemes(text, expected):
+    assert graphemes(text) == expected
+
+def test_opcodes_rebuild_new_text():
+    random.seed(3)
+    alphabet = "ab 的了é👍🏽"
+    for _ in range(2000):
+        a = "".join(random.choice(alphabet) for _ in range(random.randint(0, 10)))
+        b = "".join(random.choice(alphabet) for _ in range(random.randint(0, 10)))
+        assert apply_opcodes(a, b, diff_opcodes(a, b)) == b
+
+def test_combining_marks_are_not_split():
+    opcodes = diff_opcodes("café", "cafe")
+    assert opcodes == [('equal', 0, 3, 0, 3), ('replace', 3, 5, 3, 4)]
+
+def test_repetitive_cjk_gets_minimal_diff():
+    """difflib's autojunk gives up on long runs of one character; Myers does not."""
+    original_text = "哈" * 150 + "好的" + "哈" * 150
+    opcodes = diff_opcodes(original_text, original_text.replace("好的", "好吧"))
+    assert edit_count(opcodes) == 1
+
+def test_diff_html_keeps_markup():
+    html = ui_logic._generate_diff_html("Hello world", "Hello there world", ui_logic.DIFF_STYLE)
+    assert html == 'Hello <font color="blue">there </font>world'
+    html = ui_logic._generate_diff_html("I have a cat", "I have a dog", ui_logic.DIFF_STYLE)
+    assert html == 'I have a <font color="red"><s>cat</s></font><font color="blue">dog</font>'
@@ -0,0 +1,53 @@
+# tests/test_time_index.py
+from src.time_index import SubtitleTimeIndex
+
+
+def make_subs(*ranges):
+    return [{'index': i, 'in_frame': start, 'out_frame': end} for i, (start, end) in enumerate(ranges, 1)]
+
+def test_row_at_finds_subtitle_under_frame():
+    index = SubtitleTimeIndex(make_subs((100, 150), (0, 50), (200, 260)))
+    assert index.row_at(0) == 1
+    assert index.row_at(49) == 1
+    assert index.row_at(50) is None   # End frame is exclusive
+    assert index.row_at(120) == 0
+    assert index.row_at(259) == 2
+    assert index.row_at(1000) is None
+    assert index.row_at(-5) is None
+
+def test_row_at_with_overlaps_prefers_latest_start():
+    index = SubtitleTimeIndex(make_subs((0, 1000), (100, 200), (300, 400)))
+    assert index.row_at(150) == 1
+    assert index.row_at(250) == 0     # Only the long subtitle is still showing
+    assert index.row_at(350) == 2
+
+def test_rows_without_frames_are_skipped():
+    subs = make_subs((0, 10)) + [{'index': 2, 'text': 'no timing'}]
+    assert len(SubtitleTimeIndex(subs)) == 1
+
+def test_rows_in_range_matches_brute_force():
+    import random
+    random.seed(3)
+    ranges = []
+    for _ in range(300):
+        start = random.randrange(0, 5000)
+        ranges.append((start, start + random.randrange(1, 400)))
+    ranges.append((0, 6000))  # One subtitle spanning everything
+    subs = make_subs(*ranges)
+    index = SubtitleTimeIndex(subs)
+    for _ in range(200):
+        a = random.randrange(-100, 6000)
+        b = a + random.randrange(1, 300)
+        expected = [row for row, (start, end) in enumerate(ranges) if start < b and end > a]
+        assert index.rows_in_range(a, b) == expected
+    assert index.rows_in_range(10, 10) == []
+
+def test_overlaps_and_gaps():
+    index = SubtitleTimeIndex(make_subs((0, 100), (90, 150), (151, 200), (200, 250), (260, 300), (95, 120)))
+    overlaps = index.overlaps()
+    assert [(issue.first_row, issue.second_row, issue.frames) for issue in overlaps] == [
+        (0, 1, 10), (0, 5, 5), (1, 5, 25)]
+    gaps = index.gaps(min_gap=2)
+    # 150 -> 151 is one frame; 200 -> 200 touches; 250 -> 260 is long enough.
+    assert [(issue.first_row, issue.second_row, issue.frames) for issue in gaps] == [(1, 2, 1)]
+    assert [issue.kind for issue in index.timing_issues()] == ['overlap', 'gap', 'overlap', 'overlap']
@@ -1,6 +1,6 @@
 # tests/test_timecode_utils.py
 import pytest
-from src.timecode_utils import TimecodeUtils
+from src.timecode_utils import TimecodeUtils, Timebase
 
 # --- Test cases for frame_from_timecode ---
 @pytest.mark.parametrize("timecode_str, frame_rate, expected_frames", [
@@ -75,3 +75,25 @@ def test_timecode_to_frames_invalid_format():
 
     with pytest.raises(ValueError):
         TimecodeUtils.timecode_to_frames("00:00:00", 24) # Missing milliseconds
+
+
+# --- Test cases for smpte_from_frame ---
+@pytest.mark.parametrize("frames, frame_rate, drop_frame, expected_timecode_str", [
+    (24, 24, False, "00:00:01:00"),
+    (90000, 25, False, "01:00:00:00"),
+    (864000, 23.976, False, "10:00:00:00"),
+    (1800, 29.97, True, "00:01:00;02"),  # ;00 and ;01 are dropped
+    (17982, 29.97, True, "00:10:00;00"),
+    (3600, 59.94, True, "00:01:00;04"),
+    (24 * 86400, 24, False, "00:00:00:00"),
+])
+def test_smpte_from_frame(frames, frame_rate, drop_frame, expected_timecode_str):
+    """smpte_from_frame matches timecode_from_frame without the timecode library."""
+    assert TimecodeUtils.smpte_from_frame(frames, Timebase(frame_rate, drop_frame)) == expected_timecode_str
+
+@pytest.mark.parametrize("frames, frame_rate, drop_frame", [
+    (0, 24, False), (86412, 24, False), (1800, 29.97, True), (17982, 29.97, True), (3600, 59.94, True),
+])
+def test_frame_from_smpte_round_trips(frames, frame_rate, drop_frame):
+    timebase = Timebase(frame_rate, drop_frame)
+    assert TimecodeUtils.frame_from_smpte(TimecodeUtils.smpte_from_frame(frames, timebase), timebase) == frames
@@ -0,0 +1,95 @@
+# tests/test_track_diff.py
+import json
+
+from src import track_diff
+from src.subtitle_store import SubtitleTrack
+from src.track_diff import Cue, diff_tracks
+
+
+def resolve_track(*cues):
+    """Subtitles as from get_subtitles_with_timecode, from (in_frame, out_frame, text) cues."""
+    return [{'id': i, 'text': text, 'in_frame': start, 'out_frame': end} for i, (start, end, text) in enumerate(cues, 1)]
+
+
+def changes(diff):
+    return [(entry.kind, entry.old_row, entry.new_row) for entry in diff.entries]
+
+
+def test_identical_tracks_have_no_changes():
+    old = resolve_track((0, 24, "a"), (30, 48, "b"))
+    diff = diff_tracks(old, SubtitleTrack(old))
+    assert diff.entries == []
+    assert (diff.old_count, diff.new_count) == (2, 2)
+
+def test_each_kind_of_change():
+    old = resolve_track((0, 24, "one"), (30, 48, "two"), (50, 70, "three"), (80, 90, "four"))
+    new = resolve_track((0, 24, "one"), (30, 48, "TWO"), (52, 72, "three"), (95, 99, "five"))
+    assert changes(diff_tracks(old, new)) == [
+        (track_diff.RETEXTED, 1, 1),
+        (track_diff.RETIMED, 2, 2),
+        (track_diff.DELETED, 3, None),
+        (track_diff.INSERTED, None, 3),
+    ]
+
+def test_insertion_does_not_shift_later_rows_into_changes():
+    old = resolve_track(*[(i * 10, i * 10 + 8, f"line {i}") for i in range(50)])
+    new = old[:20] + resolve_track((205, 207, "new")) + old[20:]
+    assert changes(diff_tracks(old, new)) == [(track_diff.INSERTED, None, 20)]
+
+def test_whole_track_shift_is_all_retimed():
+    old = resolve_track(*[(i * 10, i * 10 + 8, f"line {i}") for i in range(500)])
+    new = resolve_track(*[(i * 10 + 3, i * 10 + 11, f"line {i}") for i in range(500)])
+    diff = diff_tracks(old, new)
+    assert diff.counts() == {track_diff.RETIMED: 500}
+
+def test_replace_all_falls_back_to_frames():
+    # More text changes than the text-keyed diff allows: rows are matched by frames.
+    old = resolve_track(*[(i * 10, i * 10 + 8, f"colour {i}") for i in range(500)])
+    new = resolve_track(*[(i * 10, i * 10 + 8, f"color {i}") for i in range(500)])
+    diff = diff_tracks(old, new)
+    assert diff.counts() == {track_diff.RETEXTED: 500}
+    assert diff.entries[7] == track_diff.DiffEntry(
+        track_diff.RETEXTED, 7, 7, Cue(70, 78, "colour 7"), Cue(70, 78, "color 7"))
+
+def test_everything_changed_pairs_what_it_can():
+    old = resolve_track(*[(i * 10, i * 10 + 8, f"a {i}") for i in range(450)])
+    new = resolve_track(*[(i * 10 + 1, i * 10 + 9, f"b {i}") for i in range(450)])
+    new[3] = {'id': 4, 'text': 'a 3', 'in_frame': 500, 'out_frame': 510}
+    diff = diff_tracks(old, new)
+    assert diff.counts() == {track_diff.INSERTED: 449, track_diff.DELETED: 449, track_diff.RETIMED: 1}
+    assert (track_diff.RETIMED, 3, 3) in changes(diff)
+
+def test_texts_are_compared_without_tags():
+    old = resolve_track((0, 24, "Hello"))
+    new = SubtitleTrack([{'index': 1, 'start': '00:00:00,000', 'end': '00:00:01,000', 'text': '<b>Hello</b>',
+                          'in_frame': 0, 'out_frame': 24}])
+    assert diff_tracks(old, new).entries == []
+
+def test_untimed_rows_changed_in_text_are_replaced():
+    old = [{'index': 1, 'text': 'a'}, {'index': 2, 'text': 'b'}]
+    new = [{'index': 1, 'text': 'a'}, {'index': 2, 'text': 'c'}]
+    assert changes(diff_tracks(old, new)) == [(track_diff.DELETED, 1, None), (track_diff.INSERTED, None, 1)]
+
+def test_report_is_json():
+    old = resolve_track((0, 24, "one"))
+    new = resolve_track((0, 24, "uno"), (30, 40, "dos"))
+    report = json.loads(json.dumps(diff_tracks(old, new).to_report()))
+    assert report['counts'] == {'inserted': 1, 'retexted': 1}
+    assert report['changes'][0] == {
+        'kind': 'retexted', 'old_row': 0, 'new_row': 0,
+        'old': {'in_frame': 0, 'out_frame': 24, 'text': 'one'},
+        'new': {'in_frame': 0, 'out_frame': 24, 'text': 'uno'},
+    }
+
+def test_review_dialog_lists_changes(qtbot):
+    from src.export_review_dialog import ExportReviewDialog, KIND_COLUMN, NEW_TIME_COLUMN, TEXT_COLUMN
+    old = resolve_track((0, 24, "one"), (30, 48, "two"))
+    new = resolve_track((0, 24, "uno"), (31, 48, "two"))
+    dialog = ExportReviewDialog(diff_tracks(old, new), 24.0, "导出前检查")
+    qtbot.addWidget(dialog)
+    model = dialog.model
+    assert model.rowCount() == 2
+    assert model.index(0, KIND_COLUMN).data() == "修改文本"
+    assert '<' in model.index(0, TEXT_COLUMN).data()
+    assert model.index(1, NEW_TIME_COLUMN).data() == "00:00:01,291 → 00:00:02,000"
+    assert dialog.summary_label.text() == "Resolve 中 2 条，导出 2 条，共 2 处修改：调整时间 1，修改文本 1"